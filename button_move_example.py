@@ -1,4 +1,18 @@
 from functools import partial
+import base64
+import collections
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
 
 from PySide2 import QtCore
 from PySide2 import QtGui
@@ -7,11 +21,64 @@ from shiboken2 import wrapInstance
 
 # import maya.OpenMayaUI as om
 import maya.OpenMayaUI as omui
+import maya.api.OpenMaya as om2
 import maya.cmds as cmds
+import maya.mel as mel
+
+from custom_color_button import ColorSwatchButton
+from mirror_names import get_mirror_name
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 EDIT_MODE = False
 
 
+class PickerNamespaceBinding(object):
+    '''
+    Retarget the node references of a picker layout to a rig namespace.
+    Bindings are shared per namespace and cache every resolved node list.
+    '''
+
+    _bindings = {}
+
+    @classmethod
+    def get_binding(cls, namespace):
+        namespace = (namespace or '').strip(':')
+        if namespace not in cls._bindings:
+            cls._bindings[namespace] = cls(namespace)
+        return cls._bindings[namespace]
+
+    @classmethod
+    def clear_bindings(cls):
+        cls._bindings = {}
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.resolved_cache = {}
+
+    def retarget_node(self, node):
+        components = []
+        for component in node.split('|'):
+            short_name = component.split(':')[-1]
+            if component and self.namespace:
+                short_name = '{}:{}'.format(self.namespace, short_name)
+            components.append(short_name)
+
+        return '|'.join(components)
+
+    def resolve(self, nodes):
+        nodes = tuple(nodes)
+        resolved = self.resolved_cache.get(nodes)
+        if resolved is None:
+            resolved = [self.retarget_node(node) for node in nodes]
+            self.resolved_cache[nodes] = resolved
+
+        return resolved
+
+
 def maya_main_window():
     '''
     Return the Maya main window widget as a Python object
@@ -21,10 +88,235 @@ def maya_main_window():
     return wrapInstance(long(main_window_ptr), QtWidgets.QWidget)
 
 
+class PickerButtonAction(object):
+    '''
+    Action run by a picker button. The action is compiled once per resolved node list
+    into a plain callable and the time of every run is recorded.
+    '''
+
+    SELECT = 'select'
+    RESET_POSE = 'reset_pose'
+    KEY_SELECTED = 'key_selected'
+    MIRROR = 'mirror'
+    PYTHON = 'python'
+    MEL = 'mel'
+
+    ACTION_TYPES = [SELECT, RESET_POSE, KEY_SELECTED, MIRROR, PYTHON, MEL]
+
+    MIRROR_NEGATED_ATTRIBUTES = 'translateX rotateY rotateZ'
+
+    mel_proc_count = 0
+
+    def __init__(self, action_type=SELECT, source=''):
+        self.action_type = action_type
+        self.source = source or ''
+
+        self.compiled = {}
+
+        self.run_count = 0
+        self.total_time = 0.0
+        self.last_time = 0.0
+        self.max_time = 0.0
+
+    def get_data(self):
+        return {'type': self.action_type, 'source': self.source}
+
+    @classmethod
+    def from_data(cls, data):
+        if not data:
+            return cls()
+        return cls(data.get('type', cls.SELECT), data.get('source', ''))
+
+    def compile(self, nodes):
+        nodes = tuple(nodes)
+        action_callable = self.compiled.get(nodes)
+        if action_callable is None:
+            compiler = getattr(self, 'compile_{}'.format(self.action_type), self.compile_select)
+            action_callable = compiler(list(nodes))
+            if action_callable is None:
+                # Nothing resolved, e.g. the rig is not referenced yet, compile again on the next run
+                return self.run_nothing
+            self.compiled[nodes] = action_callable
+        return action_callable
+
+    def run_nothing(self):
+        pass
+
+    def run(self, nodes):
+        action_callable = self.compile(nodes)
+
+        start_time = time.time()
+        try:
+            action_callable()
+        finally:
+            self.last_time = time.time() - start_time
+            self.total_time += self.last_time
+            self.max_time = max(self.max_time, self.last_time)
+            self.run_count += 1
+
+    def get_timing_report(self):
+        average = self.total_time / self.run_count if self.run_count else 0.0
+        return '{}: {} runs, avg {:.2f}ms, max {:.2f}ms'.format(self.action_type, self.run_count,
+                                                                average * 1000.0, self.max_time * 1000.0)
+
+    def compile_select(self, nodes):
+        def select_nodes():
+            cmds.select(nodes, replace=True)
+        return select_nodes
+
+    def compile_key_selected(self, nodes):
+        def key_nodes():
+            cmds.setKeyframe(nodes)
+        return key_nodes
+
+    def compile_reset_pose(self, nodes):
+        default_values = []
+        for node in cmds.ls(nodes):
+            for attr in cmds.listAttr(node, keyable=True, unlocked=True, scalar=True) or []:
+                default_value = cmds.attributeQuery(attr.split('.')[-1], node=node, listDefault=True)
+                if default_value:
+                    default_values.append(('{}.{}'.format(node, attr), default_value[0]))
+        if not default_values:
+            return None
+
+        def reset_pose():
+            cmds.undoInfo(openChunk=True, chunkName='pickerResetPose')
+            try:
+                for plug, value in default_values:
+                    cmds.setAttr(plug, value)
+            finally:
+                cmds.undoInfo(closeChunk=True)
+        return reset_pose
+
+    def compile_mirror(self, nodes):
+        negated = set((self.source or self.MIRROR_NEGATED_ATTRIBUTES).split())
+
+        mirror_plugs = []
+        for node in cmds.ls(nodes):
+            mirror_node = get_mirror_name(node)
+            if mirror_node == node or not cmds.objExists(mirror_node):
+                continue
+            for attr in cmds.listAttr(node, keyable=True, unlocked=True, scalar=True) or []:
+                if cmds.objExists('{}.{}'.format(mirror_node, attr)):
+                    sign = -1 if attr in negated else 1
+                    mirror_plugs.append(('{}.{}'.format(node, attr), '{}.{}'.format(mirror_node, attr), sign))
+        if not mirror_plugs:
+            return None
+
+        def mirror_pose():
+            values = [(target, cmds.getAttr(source) * sign) for source, target, sign in mirror_plugs]
+            cmds.undoInfo(openChunk=True, chunkName='pickerMirrorPose')
+            try:
+                for plug, value in values:
+                    cmds.setAttr(plug, value)
+            finally:
+                cmds.undoInfo(closeChunk=True)
+        return mirror_pose
+
+    def compile_python(self, nodes):
+        code = compile(self.source, '<picker action>', 'exec')
+
+        def run_python():
+            exec(code, {'cmds': cmds, 'mel': mel, 'nodes': nodes})
+        return run_python
+
+    def compile_mel(self, nodes):
+        # Wrap the code in a global proc once, every click only calls the proc
+        PickerButtonAction.mel_proc_count += 1
+        proc_name = 'pickerAction{}'.format(PickerButtonAction.mel_proc_count)
+        nodes_array = ', '.join(['"{}"'.format(node) for node in nodes])
+        mel.eval('global proc {}() {{ string $nodes[] = {{{}}};\n{}\n}}'.format(proc_name, nodes_array, self.source))
+
+        def run_mel():
+            mel.eval('{}()'.format(proc_name))
+        return run_mel
+
+
+class PickerUndoEntry(object):
+    '''
+    One undo step: a list of (operation, button_id, old_data, new_data) deltas
+    '''
+
+    __slots__ = ('deltas', 'timestamp', 'mergeable')
+
+    def __init__(self, deltas, mergeable=False):
+        self.deltas = deltas
+        self.timestamp = time.time()
+        self.mergeable = mergeable
+
+    def can_merge(self, deltas):
+        if not self.mergeable or len(deltas) != 1 or len(self.deltas) != 1:
+            return False
+        if time.time() - self.timestamp > PickerUndoStack.MERGE_INTERVAL:
+            return False
+
+        operation, button_id, old_data, new_data = deltas[0]
+        last_operation, last_button_id, last_old_data, last_new_data = self.deltas[0]
+        return (operation == last_operation == PickerJournal.CHANGE and
+                button_id == last_button_id and
+                sorted(new_data.keys()) == sorted(last_new_data.keys()))
+
+    def merge(self, deltas):
+        # Keep the oldest values and take the newest ones
+        operation, button_id, old_data, new_data = self.deltas[0]
+        self.deltas = [(operation, button_id, old_data, deltas[0][3])]
+        self.timestamp = time.time()
+
+
+class PickerUndoStack(object):
+    '''
+    Bounded undo/redo history of picker property deltas
+    '''
+
+    DEFAULT_LIMIT = 100
+    MERGE_INTERVAL = 1.0
+
+    def __init__(self, limit=DEFAULT_LIMIT):
+        self.undo_entries = collections.deque(maxlen=limit)
+        self.redo_entries = []
+
+    def set_limit(self, limit):
+        self.undo_entries = collections.deque(self.undo_entries, maxlen=limit)
+        self.redo_entries = self.redo_entries[-limit:]
+
+    def push(self, deltas, mergeable=False):
+        self.redo_entries = []
+
+        if self.undo_entries and self.undo_entries[-1].can_merge(deltas):
+            self.undo_entries[-1].merge(deltas)
+        else:
+            self.undo_entries.append(PickerUndoEntry(deltas, mergeable))
+
+    def can_undo(self):
+        return bool(self.undo_entries)
+
+    def can_redo(self):
+        return bool(self.redo_entries)
+
+    def undo(self):
+        if not self.undo_entries:
+            return None
+        entry = self.undo_entries.pop()
+        entry.mergeable = False
+        self.redo_entries.append(entry)
+        return entry
+
+    def redo(self):
+        if not self.redo_entries:
+            return None
+        entry = self.redo_entries.pop()
+        self.undo_entries.append(entry)
+        return entry
+
+    def clear(self):
+        self.undo_entries.clear()
+        self.redo_entries = []
+
+
 class PickerWidget(QtWidgets.QWidget):
     global EDIT_MODE
 
-    def __init__(self, image_path, edit_shelf, parent=None):
+    def __init__(self, image_path, edit_shelf, undo_limit=PickerUndoStack.DEFAULT_LIMIT, parent=None):
         super(PickerWidget, self).__init__(parent)
 
         self.rubberBand = QtWidgets.QRubberBand(QtWidgets.QRubberBand.Rectangle, self)
@@ -44,6 +336,13 @@ class PickerWidget(QtWidgets.QWidget):
         self.buttons_list = []
         self.buttons_in_selection_list = []
 
+        self.namespace_binding = None
+
+        self.picker_id = uuid.uuid4().hex
+        self.journal = None
+
+        self.undo_stack = PickerUndoStack(undo_limit)
+
         self.move_enabled = True
         self.image_visibility = True
         self.mouse_right_click_pos = (0, 0)
@@ -62,6 +361,9 @@ class PickerWidget(QtWidgets.QWidget):
 
     def create_actions(self):
         self.create_btn_action = QtWidgets.QAction('Create Button', self)
+        self.delete_btn_action = QtWidgets.QAction('Delete Buttons', self)
+        self.create_slider_action = QtWidgets.QAction('Create Slider', self)
+        self.create_pad_action = QtWidgets.QAction('Create 2D Pad', self)
 
     def create_widgets(self):
         self.internal_wdg = PickerBackgroundWidget(self.image_path, self)
@@ -74,11 +376,18 @@ class PickerWidget(QtWidgets.QWidget):
 
     def create_connections(self):
         self.create_btn_action.triggered.connect(self.create_selection_button_on_point)
+        self.delete_btn_action.triggered.connect(self.delete_selected_buttons)
+        self.create_slider_action.triggered.connect(self.create_slider_button_on_point)
+        self.create_pad_action.triggered.connect(self.create_pad_button_on_point)
 
     def show_context_menu(self, point):
         context_menu = QtWidgets.QMenu()
         if EDIT_MODE:
             context_menu.addAction(self.create_btn_action)
+            context_menu.addAction(self.create_slider_action)
+            context_menu.addAction(self.create_pad_action)
+            context_menu.addSeparator()
+            context_menu.addAction(self.delete_btn_action)
 
         context_menu.exec_(self.mapToGlobal(point))
 
@@ -111,31 +420,243 @@ class PickerWidget(QtWidgets.QWidget):
             for sel_btn in self.buttons_list:
                 sel_btn.set_moveable(False)
 
+    def get_namespace(self):
+        if self.namespace_binding:
+            return self.namespace_binding.namespace
+        return None
+
+    def set_namespace(self, namespace):
+        # Swap the binding only, buttons keep sharing the same layout data
+        if namespace is None:
+            self.namespace_binding = None
+        else:
+            self.namespace_binding = PickerNamespaceBinding.get_binding(namespace)
+
+    def resolve_nodes(self, nodes):
+        if self.namespace_binding:
+            return self.namespace_binding.resolve(nodes)
+        return list(nodes)
+
+    def start_journal(self, journal_dir, name):
+        self.journal = PickerJournal(journal_dir, self.picker_id)
+        self.compact_journal(name)
+
+    def stop_journal(self, remove_files=True):
+        if self.journal:
+            self.journal.close(remove_files)
+            self.journal = None
+
+    def compact_journal(self, name=None):
+        if self.journal:
+            if name:
+                self.journal.name = name
+            # The snapshot is built here in memory, the worker thread writes it
+            self.journal.write_snapshot(self.get_data())
+
+    def journal_edit(self, operation, button_id, data=None):
+        if not self.journal:
+            return
+
+        self.journal.record(operation, button_id, data)
+        if self.journal.needs_compaction():
+            self.compact_journal()
+
+    def get_button_data(self, button, properties=None):
+        button_data = button.get_data()
+        if properties:
+            button_data = dict([(prop, button_data[prop]) for prop in properties])
+        return button_data
+
+    def record_edit(self, operation, button, properties=None, old_data=None, mergeable=False):
+        new_data = None
+        if operation != PickerJournal.DELETE:
+            new_data = self.get_button_data(button, properties)
+
+        self.record_edits([(operation, button.button_id, old_data, new_data)], mergeable)
+
+    def record_edits(self, deltas, mergeable=False):
+        for operation, button_id, old_data, new_data in deltas:
+            self.journal_edit(operation, button_id, new_data)
+
+        self.undo_stack.push(deltas, mergeable)
+
+    def undo(self):
+        entry = self.undo_stack.undo()
+        if entry:
+            for delta in reversed(entry.deltas):
+                self.apply_delta(delta, undo=True)
+
+    def redo(self):
+        entry = self.undo_stack.redo()
+        if entry:
+            for delta in entry.deltas:
+                self.apply_delta(delta, undo=False)
+
+    def apply_delta(self, delta, undo):
+        operation, button_id, old_data, new_data = delta
+        data = old_data if undo else new_data
+
+        if operation == PickerJournal.CHANGE:
+            button = self.find_button(button_id)
+            if button:
+                button.set_data(data)
+                self.journal_edit(PickerJournal.CHANGE, button_id, data)
+                if self.edit_shelf.item is button:
+                    self.edit_shelf.update_shelf(button)
+
+        # Undoing a creation or redoing a deletion removes the button
+        elif (operation == PickerJournal.CREATE) == undo:
+            button = self.find_button(button_id)
+            if button:
+                self.remove_button(button)
+                self.journal_edit(PickerJournal.DELETE, button_id)
+
+        else:
+            button = self.create_button_from_data(data)
+            button.set_moveable(EDIT_MODE)
+            self.journal_edit(PickerJournal.CREATE, button_id, data)
+
+    def find_button(self, button_id):
+        for btn in self.buttons_list:
+            if btn.button_id == button_id:
+                return btn
+        return None
+
+    def remove_button(self, button):
+        if button in self.buttons_in_selection_list:
+            self.buttons_in_selection_list.remove(button)
+        self.buttons_list.remove(button)
+
+        if self.edit_shelf.item is button:
+            self.edit_shelf.update_shelf(item=None)
+
+        button.hide()
+        button.deleteLater()
+
+    def delete_selected_buttons(self):
+        buttons = [btn for btn in self.buttons_list if btn.selected]
+        if not buttons and self.edit_shelf.item in self.buttons_list:
+            buttons = [self.edit_shelf.item]
+
+        deltas = []
+        for btn in buttons:
+            deltas.append((PickerJournal.DELETE, btn.button_id, btn.get_data(), None))
+            self.remove_button(btn)
+
+        if deltas:
+            self.record_edits(deltas)
+
+    def create_button_from_data(self, btn_data):
+        picker_btn = self.create_selection_button(size=tuple(btn_data['size']),
+                                                  color=tuple(btn_data['color']),
+                                                  text=btn_data.get('text'),
+                                                  selection=btn_data.get('selection', []),
+                                                  button_type=btn_data.get('type'))
+        picker_btn.set_data(btn_data)
+
+        return picker_btn
+
+    def get_data(self):
+        return {'version': PickerSceneStorage.VERSION,
+                'image_path': self.image_path,
+                'namespace': self.get_namespace(),
+                'buttons': [btn.get_data() for btn in self.buttons_list]}
+
+    def load_data(self, data):
+        self.set_namespace(data.get('namespace'))
+
+        self.setUpdatesEnabled(False)
+        for btn_data in data.get('buttons', []):
+            self.create_button_from_data(btn_data)
+        self.setUpdatesEnabled(True)
+
+        self.compile_button_actions()
+        self.update_edit_mode()
+        self.undo_stack.clear()
+
+    def compile_button_actions(self):
+        for btn in self.buttons_list:
+            btn.compile_action()
+
+    def get_action_timing_report(self):
+        return ['{}: {}'.format(btn.get_text() or btn.button_id, btn.action.get_timing_report())
+                for btn in self.buttons_list if btn.action.run_count]
+
     def get_mouse_right_click_pos(self):
         return self.mouse_right_click_pos
 
     def get_mouse_right_click_container_pos(self):
         return self.mouse_right_click_container_pos
 
-    def create_selection_button(self, x=5000, y=5000, size=(24, 24)):
-        picker_btn = PickerSelectionButton(x=x, y=y,
-                                           width=size[0], height=size[1],
-                                           color=(150, 150, 255),
-                                           text=None,
-                                           picker_scale = self.scale,
-                                           edit_shelf = self.edit_shelf,
-                                           parent=self.container_wdg)
+    def create_selection_button(self, x=5000, y=5000, size=(24, 24), color=(150, 150, 255), text=None, selection=None,
+                                button_type=None, **kwargs):
+        button_class = PICKER_BUTTON_TYPES.get(button_type, PickerSelectionButton)
+        picker_btn = button_class(x=x, y=y,
+                                  width=size[0], height=size[1],
+                                  color=color,
+                                  text=text,
+                                  picker_scale = self.scale,
+                                  edit_shelf = self.edit_shelf,
+                                  selection = selection,
+                                  parent=self.container_wdg,
+                                  **kwargs)
         picker_btn.show()
         picker_btn.activateWindow()
         picker_btn.raise_()
 
         self.buttons_list.append(picker_btn)
 
+        return picker_btn
+
     def create_selection_button_on_point(self, size=(24, 24)):
         pkr_mouse_pos = self.get_mouse_right_click_container_pos()
         mid_size = ((size[0]*self.scale) / 2, (size[1]*self.scale) / 2)
         final_btn_pos = (pkr_mouse_pos[0] - mid_size[0], pkr_mouse_pos[1] - mid_size[1])
-        self.create_selection_button(x=final_btn_pos[0], y=final_btn_pos[1])
+        picker_btn = self.create_selection_button(x=final_btn_pos[0], y=final_btn_pos[1])
+
+        self.record_edit(PickerJournal.CREATE, picker_btn)
+
+    def get_channel_box_plugs(self):
+        nodes = cmds.ls(sl=True)
+        attributes = cmds.channelBox('mainChannelBox', query=True, selectedMainAttributes=True) or []
+        if not nodes:
+            return []
+        return ['{}.{}'.format(nodes[-1], attr) for attr in attributes]
+
+    def get_attribute_range(self, plug):
+        node, attr = plug.split('.', 1)
+        value_range = [0.0, 1.0]
+        if cmds.attributeQuery(attr, node=node, minExists=True):
+            value_range[0] = cmds.attributeQuery(attr, node=node, minimum=True)[0]
+        if cmds.attributeQuery(attr, node=node, maxExists=True):
+            value_range[1] = cmds.attributeQuery(attr, node=node, maximum=True)[0]
+        return value_range
+
+    def create_attribute_button_on_point(self, button_type, size):
+        plugs = self.get_channel_box_plugs()
+        attribute_count = PICKER_BUTTON_TYPES[button_type].ATTRIBUTE_COUNT
+        if len(plugs) < attribute_count:
+            cmds.warning('Select {} attribute(s) in the Channel Box'.format(attribute_count))
+            return
+
+        plugs = plugs[:attribute_count]
+        pkr_mouse_pos = self.get_mouse_right_click_container_pos()
+        picker_btn = self.create_selection_button(x=pkr_mouse_pos[0] - (size[0]*self.scale) / 2,
+                                                  y=pkr_mouse_pos[1] - (size[1]*self.scale) / 2,
+                                                  size=size,
+                                                  color=(70, 70, 70),
+                                                  selection=[plug.split('.', 1)[0] for plug in plugs],
+                                                  button_type=button_type,
+                                                  attributes=plugs,
+                                                  value_ranges=[self.get_attribute_range(plug) for plug in plugs])
+
+        self.record_edit(PickerJournal.CREATE, picker_btn)
+
+    def create_slider_button_on_point(self):
+        self.create_attribute_button_on_point(PickerSliderButton.BUTTON_TYPE, (120, 20))
+
+    def create_pad_button_on_point(self):
+        self.create_attribute_button_on_point(PickerPadButton.BUTTON_TYPE, (80, 80))
 
     def updateButtonsScale(self, scale):
         for sel_btn in self.buttons_list:
@@ -342,7 +863,9 @@ class PickerImageWidget(QtWidgets.QLabel):
 
 class PickerSelectionButton(QtWidgets.QPushButton):
 
-    def __init__(self, x, y, width, height, color, text, text_size=10, picker_scale=1, edit_shelf=None, parent=None):
+    BUTTON_TYPE = 'selection'
+
+    def __init__(self, x, y, width, height, color, text, text_size=10, picker_scale=1, edit_shelf=None, selection=None, parent=None):
         super(PickerSelectionButton, self).__init__(parent)
 
         global EDIT_MODE
@@ -377,7 +900,14 @@ class PickerSelectionButton(QtWidgets.QPushButton):
         self.set_font_color(self.font_color)
         self.set_font_bold(self.font_bold)
 
-        self.selection_at_creation = cmds.ls(sl=True)
+        if selection is None:
+            selection = cmds.ls(sl=True)
+        self.selection_at_creation = tuple(selection)
+
+        self.button_id = uuid.uuid4().hex
+        self.dragged = False
+
+        self.action = PickerButtonAction()
 
         self.clicked.connect(self.select_elements)
 
@@ -480,10 +1010,8 @@ class PickerSelectionButton(QtWidgets.QPushButton):
         return self.text()
 
     def set_text(self, text):
-        if text:
-            self.setText(text)
-        else:
-            self.setText('')
+        # Always applied, undoing back to an empty label has to clear the text
+        self.setText(text or '')
 
     def get_font_size(self):
         return self.font_size
@@ -523,10 +1051,27 @@ class PickerSelectionButton(QtWidgets.QPushButton):
         self.btn_font.setBold(self.font_bold)
         self.setFont(self.btn_font)
 
+    def get_picker_widget(self):
+        return self.parent().parent()
+
+    def get_action(self):
+        return self.action
+
+    def set_action(self, action):
+        self.action = action
+        self.compile_action()
+
+    def compile_action(self):
+        nodes = self.get_picker_widget().resolve_nodes(self.selection_at_creation)
+        try:
+            self.action.compile(nodes)
+        except (RuntimeError, SyntaxError, ValueError) as e:
+            cmds.warning('Could not compile {} action: {}'.format(self.action.action_type, e))
+
     def select_elements(self):
-        print 'Button Pressed'
         if not self.move_enabled:
-            cmds.select(self.selection_at_creation, r=True)
+            nodes = self.get_picker_widget().resolve_nodes(self.selection_at_creation)
+            self.action.run(nodes)
 
     def select_button(self, status):
         if status:
@@ -538,17 +1083,60 @@ class PickerSelectionButton(QtWidgets.QPushButton):
             self.modify_style()
             self.selected = False
 
+    def get_data(self):
+        return {'id': self.button_id,
+                'type': self.BUTTON_TYPE,
+                'position': list(self.base_position),
+                'size': list(self.size),
+                'color': list(self.color),
+                'roundness': self.border,
+                'text': self.get_text(),
+                'font_size': self.font_size,
+                'font_color': list(self.font_color),
+                'font_bold': self.font_bold,
+                'selection': list(self.selection_at_creation),
+                'action': self.action.get_data()}
+
+    def set_data(self, data):
+        if 'id' in data:
+            self.button_id = data['id']
+        if 'position' in data:
+            self.base_position = tuple(data['position'])
+            self.update_scaled_position()
+        if 'size' in data:
+            self.set_size(tuple(data['size']))
+            self.update_size_relation()
+        if 'color' in data:
+            self.set_color(tuple(data['color']))
+        if 'roundness' in data:
+            self.set_roundness(data['roundness'])
+        if 'text' in data:
+            self.set_text(data['text'])
+        if 'font_size' in data:
+            self.set_font_size(data['font_size'])
+        if 'font_color' in data:
+            self.set_font_color(tuple(data['font_color']))
+        if 'font_bold' in data:
+            self.set_font_bold(data['font_bold'])
+        if 'selection' in data:
+            self.selection_at_creation = tuple(data['selection'])
+            self.action.compiled = {}
+        if 'action' in data:
+            self.action = PickerButtonAction.from_data(data['action'])
+
     def mousePressEvent(self, event):
         if self.move_enabled:
             if event.button() == QtCore.Qt.LeftButton:
                 self.initial_pos = self.pos()
                 self.global_pos = event.globalPos()
+                self.drag_start_position = self.base_position
+                self.dragged = False
 
             # Update Edit Mode Shelf
             self.edit_shelf.update_shelf(self)
-
-        if event.button() == QtCore.Qt.LeftButton:
-            print 'Button position: {}, {}'.format(*self.pos().toTuple())
+        else:
+            # Let the button register the press so clicked runs the action
+            super(PickerSelectionButton, self).mousePressEvent(event)
 
     def mouseMoveEvent(self, event):
         if self.move_enabled:
@@ -556,72 +1144,283 @@ class PickerSelectionButton(QtWidgets.QPushButton):
             final_pos = (self.initial_pos + diff)
             self.move(final_pos)
 
-            picker_wdg = self.parent().parent()
+            picker_wdg = self.get_picker_widget()
             scale = picker_wdg.get_scale()
             self.base_position = self.calculate_scaled_position(self.pos().toTuple(), scale)
+            self.dragged = True
 
-class PickerEditColorButton(QtWidgets.QWidget):
+    def mouseReleaseEvent(self, event):
+        super(PickerSelectionButton, self).mouseReleaseEvent(event)
 
-    color_changed = QtCore.Signal(tuple)
+        # A whole drag is journaled as a single edit
+        if self.move_enabled and self.dragged:
+            self.dragged = False
+            self.get_picker_widget().record_edit(PickerJournal.CHANGE, self, ['position'],
+                                                 old_data={'position': list(self.drag_start_position)})
 
-    def __init__(self, color=(255, 255, 255), parent=None):
-        super(PickerEditColorButton, self).__init__(parent)
+class AttributeWriteThrottle(QtCore.QObject):
+    '''
+    Write attribute values at a limited rate, only the latest value of every plug is kept.
+    A gesture is wrapped in a single undo chunk, closed even if the mouse release is lost.
+    '''
 
-        self.setObjectName('PickerEditColorButton')
+    DEFAULT_RATE = 30
+
+    def __init__(self, rate=DEFAULT_RATE, parent=None):
+        super(AttributeWriteThrottle, self).__init__(parent)
+
+        self.pending_values = collections.OrderedDict()
+        self.written_values = {}
+        self.gesture_open = False
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        self.timer.setInterval(max(1, int(1000.0 / rate)))
+
+    @staticmethod
+    def close_undo_chunk(*args):
+        cmds.undoInfo(closeChunk=True)
+
+    def begin_gesture(self, name='pickerAttributeDrag'):
+        if not self.gesture_open:
+            cmds.undoInfo(openChunk=True, chunkName=name)
+            self.gesture_open = True
+            # Deleting the button mid-drag must not leave the chunk open
+            self.destroyed.connect(AttributeWriteThrottle.close_undo_chunk)
+        self.written_values = {}
+        self.timer.start()
+
+    def set_value(self, plug, value):
+        # Intermediate values are dropped, the timer writes the latest one
+        self.pending_values[plug] = value
+
+    def flush(self):
+        while self.pending_values:
+            plug, value = self.pending_values.popitem(last=False)
+            if self.written_values.get(plug) != value:
+                try:
+                    cmds.setAttr(plug, value)
+                except RuntimeError as e:
+                    cmds.warning('Could not set {}: {}'.format(plug, e))
+                self.written_values[plug] = value
+
+        # The release went to another widget, the drag is over
+        if self.gesture_open and not QtWidgets.QApplication.mouseButtons():
+            self.end_gesture()
+
+    def end_gesture(self):
+        self.timer.stop()
+        if self.gesture_open:
+            # Cleared first, the final flush must not end the gesture again
+            self.gesture_open = False
+            self.flush()
+            self.destroyed.disconnect(AttributeWriteThrottle.close_undo_chunk)
+            cmds.undoInfo(closeChunk=True)
+        else:
+            self.flush()
 
-        self.create_control()
 
-        self.set_size(68, 17)
-        self.set_color(color)
+class PickerSliderButton(PickerSelectionButton):
+    '''
+    Picker widget driving one attribute while dragging
+    '''
 
-    def create_control(self):
-        #  Create the colorSliderGrp
-        window = cmds.window()
-        color_slider_name = cmds.colorSliderGrp()
+    BUTTON_TYPE = 'slider'
+    ATTRIBUTE_COUNT = 1
 
-        # Find the colorSliderGrp widget
-        self._color_slider_obj = omui.MQtUtil.findControl(color_slider_name)
-        if self._color_slider_obj:
-            self._color_slider_widget = wrapInstance(long(self._color_slider_obj), QtWidgets.QWidget)
+    HANDLE_COLOR = QtGui.QColor(230, 230, 230)
 
-            # Reparent the colorSliderGrp widget to this widget
-            main_layout = QtWidgets.QVBoxLayout(self)
-            main_layout.setObjectName('main_layout')
-            main_layout.setContentsMargins(0,0,0,0)
-            main_layout.addWidget(self._color_slider_widget)
+    def __init__(self, x, y, width, height, color, text, attributes=None, value_ranges=None,
+                 write_rate=AttributeWriteThrottle.DEFAULT_RATE, **kwargs):
+        self.attributes = tuple(attributes or [])
+        self.value_ranges = [list(value_range) for value_range in (value_ranges or [])]
+        while len(self.value_ranges) < len(self.attributes):
+            self.value_ranges.append([0.0, 1.0])
+        self.current_values = [value_range[0] for value_range in self.value_ranges]
+        self.dragging = False
 
-            # Identify/Store the colorSliderGrp's child widgets
-            self._slider_widget = self._color_slider_widget.findChild(QtWidgets.QWidget, 'slider')
-            if self._slider_widget:
-                self._slider_widget.hide()
-            self._color_widget = self._color_slider_widget.findChild(QtWidgets.QWidget, 'port')
+        super(PickerSliderButton, self).__init__(x, y, width, height, color, text, **kwargs)
 
-            cmds.colorSliderGrp(self.get_full_name(), e=True, changeCommand=partial(self.on_color_changed))
+        self.throttle = AttributeWriteThrottle(write_rate, self)
 
-        # Delete Mel Window
-        cmds.deleteUI(window, window=True)
+    def get_data(self):
+        data = super(PickerSliderButton, self).get_data()
+        data['attributes'] = list(self.attributes)
+        data['value_ranges'] = self.value_ranges
+        return data
 
-    def get_full_name(self):
-        return omui.MQtUtil.fullName(long(self._color_slider_obj))
+    def set_data(self, data):
+        super(PickerSliderButton, self).set_data(data)
+        if 'attributes' in data:
+            self.attributes = tuple(data['attributes'])
+        if 'value_ranges' in data:
+            self.value_ranges = [list(value_range) for value_range in data['value_ranges']]
+            self.current_values = [value_range[0] for value_range in self.value_ranges]
 
-    def set_size(self, width, height):
-        self._color_slider_widget.setFixedWidth(width)
-        self._color_widget.setFixedHeight(height)
+    def select_elements(self):
+        pass
+
+    def get_resolved_plugs(self):
+        nodes = [plug.split('.', 1)[0] for plug in self.attributes]
+        resolved_nodes = self.get_picker_widget().resolve_nodes(nodes)
+        return ['{}.{}'.format(node, plug.split('.', 1)[1]) for node, plug in zip(resolved_nodes, self.attributes)]
+
+    def read_current_values(self, plugs):
+        for i, plug in enumerate(plugs):
+            try:
+                self.current_values[i] = cmds.getAttr(plug)
+            except ValueError:
+                pass
+
+    def is_horizontal(self):
+        return self.width() >= self.height()
+
+    def get_normalized_positions(self, pos):
+        norm_x = min(max(float(pos.x()) / max(self.width(), 1), 0.0), 1.0)
+        norm_y = min(max(1.0 - float(pos.y()) / max(self.height(), 1), 0.0), 1.0)
+        if self.is_horizontal():
+            return [norm_x]
+        return [norm_y]
+
+    def update_values_from_position(self, pos):
+        plugs = self.resolved_plugs
+        for i, norm_value in enumerate(self.get_normalized_positions(pos)):
+            min_value, max_value = self.value_ranges[i]
+            value = min_value + norm_value * (max_value - min_value)
+            self.current_values[i] = value
+            self.throttle.set_value(plugs[i], value)
+        self.update()
+
+    def get_normalized_values(self):
+        normalized = []
+        for value, value_range in zip(self.current_values, self.value_ranges):
+            span = value_range[1] - value_range[0]
+            normalized.append((value - value_range[0]) / span if span else 0.0)
+        return normalized
+
+    def mousePressEvent(self, event):
+        if self.move_enabled or event.button() != QtCore.Qt.LeftButton or not self.attributes:
+            super(PickerSliderButton, self).mousePressEvent(event)
+            return
+
+        self.dragging = True
+        self.resolved_plugs = self.get_resolved_plugs()
+        self.throttle.begin_gesture('picker_{}'.format(self.BUTTON_TYPE))
+        self.update_values_from_position(event.pos())
+
+    def mouseMoveEvent(self, event):
+        if self.dragging:
+            self.update_values_from_position(event.pos())
+        else:
+            super(PickerSliderButton, self).mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if self.dragging:
+            self.update_values_from_position(event.pos())
+            self.end_drag()
+        else:
+            super(PickerSliderButton, self).mouseReleaseEvent(event)
+
+    def end_drag(self):
+        if self.dragging:
+            self.dragging = False
+            self.throttle.end_gesture()
+
+    def hideEvent(self, event):
+        self.end_drag()
+        super(PickerSliderButton, self).hideEvent(event)
+
+    def focusOutEvent(self, event):
+        self.end_drag()
+        super(PickerSliderButton, self).focusOutEvent(event)
+
+    def enterEvent(self, event):
+        super(PickerSliderButton, self).enterEvent(event)
+
+        if not self.move_enabled and not self.dragging and self.attributes:
+            self.read_current_values(self.get_resolved_plugs())
+            self.update()
+
+    def paintEvent(self, event):
+        super(PickerSliderButton, self).paintEvent(event)
+
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.setBrush(self.HANDLE_COLOR)
+
+        normalized = self.get_normalized_values()
+        handle = max(4, int(6 * self.picker_scale))
+        if self.is_horizontal():
+            x = normalized[0] * (self.width() - handle) if normalized else 0
+            painter.drawRect(QtCore.QRectF(x, 2, handle, self.height() - 4))
+        else:
+            y = (1.0 - normalized[0]) * (self.height() - handle) if normalized else 0
+            painter.drawRect(QtCore.QRectF(2, y, self.width() - 4, handle))
+
+
+class PickerPadButton(PickerSliderButton):
+    '''
+    Picker widget driving two attributes (X, Y) while dragging
+    '''
+
+    BUTTON_TYPE = 'pad'
+    ATTRIBUTE_COUNT = 2
+
+    def get_normalized_positions(self, pos):
+        norm_x = min(max(float(pos.x()) / max(self.width(), 1), 0.0), 1.0)
+        norm_y = min(max(1.0 - float(pos.y()) / max(self.height(), 1), 0.0), 1.0)
+        return [norm_x, norm_y][:len(self.attributes)]
+
+    def paintEvent(self, event):
+        QtWidgets.QPushButton.paintEvent(self, event)
+
+        normalized = self.get_normalized_values() + [0.5, 0.5]
+        x = normalized[0] * self.width()
+        y = (1.0 - normalized[1]) * self.height()
+
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setPen(QtGui.QPen(self.HANDLE_COLOR, 1, QtCore.Qt.DotLine))
+        painter.drawLine(QtCore.QPointF(x, 0), QtCore.QPointF(x, self.height()))
+        painter.drawLine(QtCore.QPointF(0, y), QtCore.QPointF(self.width(), y))
+
+        radius = max(3, 5 * self.picker_scale)
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.setBrush(self.HANDLE_COLOR)
+        painter.drawEllipse(QtCore.QPointF(x, y), radius, radius)
+
+
+PICKER_BUTTON_TYPES = {PickerSelectionButton.BUTTON_TYPE: PickerSelectionButton,
+                       PickerSliderButton.BUTTON_TYPE: PickerSliderButton,
+                       PickerPadButton.BUTTON_TYPE: PickerPadButton}
+
+
+class PickerEditColorButton(ColorSwatchButton):
+    '''
+    Color swatch working with (r, g, b) tuples in the 0-255 range
+    '''
+
+    color_changed = QtCore.Signal(tuple)
+
+    def __init__(self, color=(255, 255, 255), parent=None):
+        super(PickerEditColorButton, self).__init__(QtGui.QColor(*color[:3]), parent)
+
+        self.setObjectName('PickerEditColorButton')
+
+        self.set_size(68, 17)
 
     def set_color(self, color):
-        short_color = (color[0]/255.0, color[1]/255.0, color[2]/255.0)
-        cmds.colorSliderGrp(self.get_full_name(), e=True, rgbValue=(short_color[0], short_color[1], short_color[2]))
-        self.on_color_changed()
+        if not isinstance(color, QtGui.QColor):
+            color = QtGui.QColor(*[min(max(int(channel), 0), 255) for channel in color[:3]])
+        super(PickerEditColorButton, self).set_color(color)
 
     def get_color(self):
-        color = cmds.colorSliderGrp(self.get_full_name(), query=True, rgbValue=True)
-        long_color = (int(color[0]*255), int(color[1]*255), int(color[2]*255))
-        if long_color[0] > 255 or long_color[1] > 255 or long_color[2] > 255:
-            long_color = (int(color[0]), int(color[1]), int(color[2]))
-        return long_color
-
-    def on_color_changed(self, *args):
-        self.color_changed.emit(self.get_color())
+        color = super(PickerEditColorButton, self).get_color()
+        return (color.red(), color.green(), color.blue())
 
 class EditModeShelf(QtWidgets.QGroupBox):
 
@@ -681,6 +1480,13 @@ class EditModeShelf(QtWidgets.QGroupBox):
         self.btn_color_label = QtWidgets.QLabel('Button Color:')
         self.btn_color_btn = PickerEditColorButton()
 
+        self.action_label = QtWidgets.QLabel('ACTION')
+        self.action_label.setAlignment(QtCore.Qt.AlignCenter)
+        self.action_type_cmb = QtWidgets.QComboBox()
+        for action_type in PickerButtonAction.ACTION_TYPES:
+            self.action_type_cmb.addItem(action_type.replace('_', ' ').title(), action_type)
+        self.action_source_btn = QtWidgets.QPushButton('Code...')
+
     def create_layouts(self):
         self.edit_menu_shelf_wdg = QtWidgets.QWidget()
         self.edit_menu_shelf_wdg.setVisible(False)
@@ -709,6 +1515,10 @@ class EditModeShelf(QtWidgets.QGroupBox):
         self.edit_shelf_layout.addWidget(self.btn_color_label)
         self.edit_shelf_layout.addWidget(self.btn_color_btn)
 
+        self.edit_shelf_layout.addWidget(self.action_label)
+        self.edit_shelf_layout.addWidget(self.action_type_cmb)
+        self.edit_shelf_layout.addWidget(self.action_source_btn)
+
         self.edit_shelf_main = QtWidgets.QVBoxLayout()
         self.setLayout(self.edit_shelf_main)
         self.edit_shelf_main.setContentsMargins(2, 2, 2, 2)
@@ -718,7 +1528,26 @@ class EditModeShelf(QtWidgets.QGroupBox):
 
 
     def create_connections(self):
-        pass
+        self.text_line.textEdited.connect(self.modify_btn_text)
+        self.font_size_spinb.valueChanged.connect(self.modify_btn_text_size)
+        self.font_bold_checkb.stateChanged.connect(self.modify_btn_text_bold)
+        self.font_color_btn.color_changed.connect(self.modify_btn_text_color)
+        self.width_spinb.valueChanged.connect(self.modify_button_size)
+        self.height_spinb.valueChanged.connect(self.modify_button_size)
+        self.size_relation_btn.clicked.connect(self.modify_relation_size_status)
+        self.roundness_spinb.valueChanged.connect(self.modify_button_roundness)
+        self.btn_color_btn.color_changed.connect(self.modify_btn_color)
+        self.action_type_cmb.currentIndexChanged.connect(self.modify_btn_action_type)
+        self.action_source_btn.clicked.connect(self.modify_btn_action_source)
+
+    def get_item_data(self, properties):
+        item_data = self.item.get_data()
+        return dict([(prop, item_data[prop]) for prop in properties])
+
+    def record_item_edit(self, properties, old_data):
+        # Consecutive edits of the same properties (spinbox scrubs) merge into one undo step
+        self.item.get_picker_widget().record_edit(PickerJournal.CHANGE, self.item, properties,
+                                                  old_data=old_data, mergeable=True)
 
     def update_shelf(self, item):
         print ('Actualizando Shelf')
@@ -762,20 +1591,17 @@ class EditModeShelf(QtWidgets.QGroupBox):
             self.btn_color_btn.set_color(self.btn_color)
             self.btn_color_btn.blockSignals(False)
 
-            self.text_line.textEdited.connect(self.modify_btn_text)
-            self.font_size_spinb.valueChanged.connect(self.modify_btn_text_size)
-            self.font_bold_checkb.stateChanged.connect(self.modify_btn_text_bold)
-            self.font_color_btn.color_changed.connect(self.modify_btn_text_color)
-            self.width_spinb.valueChanged.connect(self.modify_button_size)
-            self.height_spinb.valueChanged.connect(self.modify_button_size)
-            self.size_relation_btn.clicked.connect(self.modify_relation_size_status)
-            self.roundness_spinb.valueChanged.connect(self.modify_button_roundness)
-            self.btn_color_btn.color_changed.connect(self.modify_btn_color)
+            item_action = self.item.get_action()
+            self.action_type_cmb.blockSignals(True)
+            self.action_type_cmb.setCurrentIndex(self.action_type_cmb.findData(item_action.action_type))
+            self.action_type_cmb.blockSignals(False)
+            self.update_action_source_btn()
 
         else:
             self.edit_menu_shelf_wdg.setVisible(False)
 
     def modify_button_size(self):
+        old_data = self.get_item_data(['size', 'roundness'])
         item_size = self.item.get_size()
         width_value = self.width_spinb.value()
         height_value = self.height_spinb.value()
@@ -789,30 +1615,69 @@ class EditModeShelf(QtWidgets.QGroupBox):
             self.height_spinb.setValue(height_value)
             self.height_spinb.blockSignals(False)
             self.item.set_size(size=(width_value, height_value))
-        self.modify_button_roundness()
+        self.item.set_roundness(self.roundness_spinb.value())
+        self.record_item_edit(['size', 'roundness'], old_data)
 
     def modify_btn_text(self):
+        old_data = self.get_item_data(['text', 'font_size'])
         self.btn_text = self.text_line.text()
         self.item.set_text(self.btn_text)
 
-        self.modify_btn_text_size()
+        self.btn_font_size = self.font_size_spinb.value()
+        self.item.set_font_size(self.btn_font_size)
+        self.record_item_edit(['text', 'font_size'], old_data)
 
     def modify_btn_text_size(self):
+        old_data = self.get_item_data(['font_size'])
         self.btn_font_size = self.font_size_spinb.value()
         self.item.set_font_size(self.btn_font_size)
+        self.record_item_edit(['font_size'], old_data)
 
     def modify_btn_text_color(self, new_color):
+        old_data = self.get_item_data(['font_color'])
         self.item.set_font_color(new_color)
+        self.record_item_edit(['font_color'], old_data)
 
     def modify_btn_color(self, new_color):
+        old_data = self.get_item_data(['color'])
         self.item.set_color(new_color)
+        self.record_item_edit(['color'], old_data)
 
     def modify_button_roundness(self):
+        old_data = self.get_item_data(['roundness'])
         roundness_value = self.roundness_spinb.value()
         self.item.set_roundness(roundness_value)
+        self.record_item_edit(['roundness'], old_data)
 
     def modify_btn_text_bold(self, status):
+        old_data = self.get_item_data(['font_bold'])
         self.item.set_font_bold(status)
+        self.record_item_edit(['font_bold'], old_data)
+
+    def update_action_source_btn(self):
+        action_type = self.item.get_action().action_type
+        self.action_source_btn.setEnabled(action_type in (PickerButtonAction.PYTHON, PickerButtonAction.MEL, PickerButtonAction.MIRROR))
+
+    def modify_btn_action(self, action_type, source):
+        old_data = self.get_item_data(['action'])
+        self.item.set_action(PickerButtonAction(action_type, source))
+        self.record_item_edit(['action'], old_data)
+
+    def modify_btn_action_type(self, index):
+        action = self.item.get_action()
+        self.modify_btn_action(self.action_type_cmb.itemData(index), action.source)
+        self.update_action_source_btn()
+
+    def modify_btn_action_source(self):
+        action = self.item.get_action()
+        if action.action_type == PickerButtonAction.MIRROR:
+            label = 'Mirror negated attributes:'
+        else:
+            label = '{} code ($nodes / nodes hold the button nodes):'.format(action.action_type.upper())
+
+        source, ok = QtWidgets.QInputDialog.getMultiLineText(self, 'Button Action', label, action.source)
+        if ok and source != action.source:
+            self.modify_btn_action(action.action_type, source)
 
     def modify_relation_size_status(self):
         if self.relation_size_status:
@@ -825,6 +1690,634 @@ class EditModeShelf(QtWidgets.QGroupBox):
             self.height_spinb.setEnabled(False)
             self.item.update_size_relation()
 
+class ScenePickerEntry(object):
+    '''
+    Picker stored in the scene. Only the header is read on creation,
+    the data blob is read and decompressed the first time it is needed.
+    '''
+
+    def __init__(self, node, header):
+        self.node = node
+        self.header = header
+        self._data = None
+
+    def get_name(self):
+        return self.header.get('name', self.node)
+
+    def get_button_count(self):
+        return self.header.get('button_count', 0)
+
+    def get_data(self):
+        if self._data is None:
+            blob = cmds.getAttr('{}.{}'.format(self.node, PickerSceneStorage.DATA_ATTR))
+            self._data = PickerSceneStorage.decode_data(blob)
+        return self._data
+
+
+class PickerSceneStorage(object):
+    '''
+    Serialize pickers as compressed string attributes on network nodes
+    '''
+
+    VERSION = 1
+    NODE_SUFFIX = '_pickerData'
+    HEADER_ATTR = 'pickerHeader'
+    DATA_ATTR = 'pickerData'
+
+    @classmethod
+    def encode_data(cls, data):
+        raw_data = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        return base64.b64encode(zlib.compress(raw_data, 9)).decode('ascii')
+
+    @classmethod
+    def decode_data(cls, blob):
+        return json.loads(zlib.decompress(base64.b64decode(blob)).decode('utf-8'))
+
+    @classmethod
+    def build_header(cls, name, data, blob):
+        return {'version': cls.VERSION,
+                'name': name,
+                'namespace': data.get('namespace'),
+                'button_count': len(data.get('buttons', [])),
+                'blob_size': len(blob)}
+
+    @classmethod
+    def get_node_name(cls, name):
+        valid_name = ''.join([c if c.isalnum() else '_' for c in name])
+        return '{}{}'.format(valid_name, cls.NODE_SUFFIX)
+
+    @classmethod
+    def save(cls, name, data):
+        blob = cls.encode_data(data)
+        header = cls.build_header(name, data, blob)
+
+        node = cls.find_node(name)
+        if not node:
+            node = cmds.createNode('network', name=cls.get_node_name(name), skipSelect=True)
+            cmds.addAttr(node, longName=cls.HEADER_ATTR, dataType='string')
+            cmds.addAttr(node, longName=cls.DATA_ATTR, dataType='string')
+
+        cmds.setAttr('{}.{}'.format(node, cls.HEADER_ATTR), json.dumps(header), type='string')
+        cmds.setAttr('{}.{}'.format(node, cls.DATA_ATTR), blob, type='string')
+
+        return node
+
+    @classmethod
+    def find_node(cls, name):
+        for entry in cls.list_entries():
+            if entry.get_name() == name:
+                return entry.node
+        return None
+
+    @classmethod
+    def list_entries(cls):
+        # Only the small header attribute is read, data blobs stay untouched
+        nodes = cmds.ls('*.{}'.format(cls.HEADER_ATTR), objectsOnly=True, recursive=True) or []
+
+        entries = []
+        for node in nodes:
+            try:
+                header = json.loads(cmds.getAttr('{}.{}'.format(node, cls.HEADER_ATTR)) or '{}')
+            except ValueError:
+                continue
+            entries.append(ScenePickerEntry(node, header))
+
+        return entries
+
+
+class PickerFileStorage(object):
+    '''
+    Picker files: a one line JSON header (with thumbnail) followed by the compressed data blob
+    '''
+
+    FILE_EXT = '.pkr'
+    THUMBNAIL_SIZE = 128
+
+    @classmethod
+    def build_thumbnail(cls, widget, rect):
+        pixmap = widget.grab(rect).scaled(cls.THUMBNAIL_SIZE, cls.THUMBNAIL_SIZE,
+                                          QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+        byte_array = QtCore.QByteArray()
+        buffer = QtCore.QBuffer(byte_array)
+        buffer.open(QtCore.QIODevice.WriteOnly)
+        pixmap.save(buffer, 'PNG')
+        buffer.close()
+
+        return base64.b64encode(byte_array.data()).decode('ascii')
+
+    @classmethod
+    def save(cls, path, name, data, thumbnail=None):
+        blob = PickerSceneStorage.encode_data(data)
+        header = PickerSceneStorage.build_header(name, data, blob)
+        header['thumbnail'] = thumbnail
+
+        with open(path, 'w') as f:
+            f.write(json.dumps(header, separators=(',', ':')))
+            f.write('\n')
+            f.write(blob)
+
+    @classmethod
+    def read_header(cls, path):
+        with open(path, 'r') as f:
+            return json.loads(f.readline())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            header = json.loads(f.readline())
+            data = PickerSceneStorage.decode_data(f.read().strip())
+
+        return header, data
+
+
+class PickerLibrary(object):
+    '''
+    SQLite catalog of picker files, updated incrementally by modification time
+    '''
+
+    def __init__(self, db_path):
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.isdir(db_dir):
+            os.makedirs(db_dir)
+
+        self.connection = sqlite3.connect(db_path)
+        self.create_tables()
+
+    def create_tables(self):
+        cursor = self.connection.cursor()
+        cursor.execute('CREATE TABLE IF NOT EXISTS pickers ('
+                       'path TEXT PRIMARY KEY, root TEXT, character TEXT, namespace TEXT, '
+                       'button_count INTEGER, mtime REAL, thumbnail BLOB)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS pickers_character ON pickers (character COLLATE NOCASE)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS pickers_root ON pickers (root)')
+        cursor.execute('CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY)')
+        self.connection.commit()
+
+    @classmethod
+    def get_default_path(cls):
+        return os.path.join(cmds.internalVar(userAppDir=True), 'pickerLibrary.db')
+
+    def get_roots(self):
+        return [row[0] for row in self.connection.execute('SELECT path FROM roots ORDER BY path')]
+
+    def add_root(self, root):
+        self.connection.execute('INSERT OR IGNORE INTO roots (path) VALUES (?)', (os.path.normpath(root),))
+        self.connection.commit()
+
+    def remove_root(self, root):
+        root = os.path.normpath(root)
+        self.connection.execute('DELETE FROM roots WHERE path = ?', (root,))
+        self.connection.execute('DELETE FROM pickers WHERE root = ?', (root,))
+        self.connection.commit()
+
+    def update_index(self):
+        '''
+        Re-read only the files whose mtime changed and drop the deleted ones.
+        Return the number of updated entries.
+        '''
+        updated = 0
+        for root in self.get_roots():
+            indexed = dict(self.connection.execute('SELECT path, mtime FROM pickers WHERE root = ?', (root,)))
+
+            found = set()
+            for dir_path, dir_names, file_names in os.walk(root):
+                for file_name in file_names:
+                    if not file_name.endswith(PickerFileStorage.FILE_EXT):
+                        continue
+
+                    path = os.path.join(dir_path, file_name)
+                    found.add(path)
+                    try:
+                        mtime = os.path.getmtime(path)
+                        if indexed.get(path) == mtime:
+                            continue
+                        header = PickerFileStorage.read_header(path)
+                    except (IOError, OSError, ValueError):
+                        continue
+
+                    thumbnail = header.get('thumbnail')
+                    if thumbnail:
+                        thumbnail = sqlite3.Binary(base64.b64decode(thumbnail))
+                    self.connection.execute('INSERT OR REPLACE INTO pickers VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                            (path, root, header.get('name', ''), header.get('namespace') or '',
+                                             header.get('button_count', 0), mtime, thumbnail))
+                    updated += 1
+
+            removed = [(path,) for path in indexed if path not in found]
+            self.connection.executemany('DELETE FROM pickers WHERE path = ?', removed)
+            updated += len(removed)
+
+        self.connection.commit()
+        return updated
+
+    def query(self, text='', limit=500):
+        '''
+        Return (path, character, namespace, button_count, mtime, thumbnail) rows matching text
+        '''
+        # Wildcards typed by the user are matched literally
+        escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        pattern = '%{}%'.format(escaped)
+        return self.connection.execute('SELECT path, character, namespace, button_count, mtime, thumbnail '
+                                       "FROM pickers WHERE character LIKE ? ESCAPE '\\' OR namespace LIKE ? ESCAPE '\\' "
+                                       'ORDER BY character COLLATE NOCASE, mtime DESC LIMIT ?',
+                                       (pattern, pattern, limit)).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+
+class PickerLibraryDialog(QtWidgets.QDialog):
+
+    picker_open_requested = QtCore.Signal(str)
+
+    PATH_ROLE = QtCore.Qt.UserRole
+
+    def __init__(self, library, parent=None):
+        super(PickerLibraryDialog, self).__init__(parent)
+
+        self.setWindowTitle('Picker Library')
+        self.setMinimumSize(520, 420)
+
+        self.library = library
+
+        self.create_widgets()
+        self.create_layout()
+        self.create_connections()
+
+    def create_widgets(self):
+        self.filter_line = QtWidgets.QLineEdit()
+        self.filter_line.setPlaceholderText('Filter by character or namespace')
+
+        self.pickers_list = QtWidgets.QListWidget()
+        self.pickers_list.setViewMode(QtWidgets.QListView.IconMode)
+        self.pickers_list.setIconSize(QtCore.QSize(PickerFileStorage.THUMBNAIL_SIZE, PickerFileStorage.THUMBNAIL_SIZE))
+        self.pickers_list.setResizeMode(QtWidgets.QListView.Adjust)
+        self.pickers_list.setMovement(QtWidgets.QListView.Static)
+        self.pickers_list.setWordWrap(True)
+
+        self.add_folder_btn = QtWidgets.QPushButton('Add Folder')
+        self.rescan_btn = QtWidgets.QPushButton('Rescan')
+        self.open_btn = QtWidgets.QPushButton('Open')
+
+    def create_layout(self):
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addWidget(self.add_folder_btn)
+        button_layout.addWidget(self.rescan_btn)
+        button_layout.addStretch()
+        button_layout.addWidget(self.open_btn)
+
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.setContentsMargins(2, 2, 2, 2)
+        main_layout.addWidget(self.filter_line)
+        main_layout.addWidget(self.pickers_list)
+        main_layout.addLayout(button_layout)
+
+    def create_connections(self):
+        self.filter_line.textChanged.connect(self.refresh_list)
+        self.pickers_list.itemDoubleClicked.connect(self.open_item)
+        self.add_folder_btn.clicked.connect(self.add_folder)
+        self.rescan_btn.clicked.connect(self.rescan)
+        self.open_btn.clicked.connect(self.open_selected)
+
+    def refresh_list(self):
+        self.pickers_list.clear()
+
+        for path, character, namespace, button_count, mtime, thumbnail in self.library.query(self.filter_line.text()):
+            label = character or os.path.basename(path)
+            if namespace:
+                label = '{}\n{}'.format(label, namespace)
+
+            item = QtWidgets.QListWidgetItem(label)
+            item.setData(self.PATH_ROLE, path)
+            item.setToolTip('{}\n{} buttons\n{}'.format(path, button_count, time.ctime(mtime)))
+            if thumbnail:
+                pixmap = QtGui.QPixmap()
+                pixmap.loadFromData(bytes(thumbnail))
+                item.setIcon(QtGui.QIcon(pixmap))
+            self.pickers_list.addItem(item)
+
+    def rescan(self):
+        updated = self.library.update_index()
+        print('Picker library: {} entries updated'.format(updated))
+        self.refresh_list()
+
+    def add_folder(self):
+        folder = QtWidgets.QFileDialog.getExistingDirectory(self, 'Add Picker Folder')
+        if folder:
+            self.library.add_root(folder)
+            self.rescan()
+
+    def open_item(self, item):
+        self.picker_open_requested.emit(item.data(self.PATH_ROLE))
+
+    def open_selected(self):
+        for item in self.pickers_list.selectedItems():
+            self.open_item(item)
+
+    def showEvent(self, e):
+        super(PickerLibraryDialog, self).showEvent(e)
+
+        self.rescan()
+
+
+class PickerJournal(object):
+    '''
+    Append-only autosave journal of picker edits.
+    Every disk write happens on a worker thread, the UI thread only queues.
+    '''
+
+    CREATE = 'create'
+    CHANGE = 'change'
+    DELETE = 'delete'
+
+    COMPACT_EVERY = 200
+
+    JOURNAL_EXT = '.journal'
+    SNAPSHOT_EXT = '.snapshot'
+
+    def __init__(self, journal_dir, picker_id, name=''):
+        self.journal_dir = journal_dir
+        self.picker_id = picker_id
+        self.name = name
+
+        self.journal_path = os.path.join(journal_dir, picker_id + self.JOURNAL_EXT)
+        self.snapshot_path = os.path.join(journal_dir, picker_id + self.SNAPSHOT_EXT)
+
+        self.operations_since_snapshot = 0
+
+        self.queue = queue.Queue()
+        self.worker = threading.Thread(target=self.process_queue, name='PickerJournal')
+        self.worker.daemon = True
+        self.worker.start()
+
+    def record(self, operation, button_id, data=None):
+        self.operations_since_snapshot += 1
+        self.queue.put(('record', {'op': operation, 'id': button_id, 'data': data}))
+
+    def needs_compaction(self):
+        return self.operations_since_snapshot >= self.COMPACT_EVERY
+
+    def write_snapshot(self, picker_data):
+        self.operations_since_snapshot = 0
+        self.queue.put(('snapshot', {'name': self.name, 'picker': picker_data}))
+
+    def close(self, remove_files=False):
+        # Never join here, pending writes finish on the worker thread
+        self.queue.put(('close', remove_files))
+
+    def remove_journal(self, picker_id):
+        '''
+        Delete the files of another picker once the queued writes are done
+        '''
+        self.queue.put(('remove', picker_id))
+
+    def process_queue(self):
+        journal_file = None
+        while True:
+            task, payload = self.queue.get()
+            try:
+                if task == 'record':
+                    if journal_file is None:
+                        journal_file = self.open_journal('a')
+                    journal_file.write(json.dumps(payload, separators=(',', ':')) + '\n')
+                    journal_file.flush()
+
+                elif task == 'snapshot':
+                    self.write_file(self.snapshot_path, json.dumps(payload, separators=(',', ':')))
+                    # Everything journaled so far is part of the snapshot
+                    if journal_file is not None:
+                        journal_file.close()
+                    journal_file = self.open_journal('w')
+
+                elif task == 'remove':
+                    self.remove_files(self.journal_dir, payload)
+
+                elif task == 'close':
+                    if journal_file is not None:
+                        journal_file.close()
+                    if payload:
+                        self.remove_files(self.journal_dir, self.picker_id)
+                    return
+            except (IOError, OSError) as e:
+                print('Picker journal error: {}'.format(e))
+
+    def open_journal(self, mode):
+        if not os.path.isdir(self.journal_dir):
+            os.makedirs(self.journal_dir)
+        return open(self.journal_path, mode)
+
+    def write_file(self, path, text):
+        if not os.path.isdir(self.journal_dir):
+            os.makedirs(self.journal_dir)
+
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(text)
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(temp_path, path)
+
+    @classmethod
+    def get_default_dir(cls):
+        return os.path.join(cmds.internalVar(userAppDir=True), 'pickerAutosave')
+
+    @classmethod
+    def list_journals(cls, journal_dir):
+        if not os.path.isdir(journal_dir):
+            return []
+
+        picker_ids = set()
+        for file_name in os.listdir(journal_dir):
+            base_name, ext = os.path.splitext(file_name)
+            if ext in (cls.JOURNAL_EXT, cls.SNAPSHOT_EXT):
+                picker_ids.add(base_name)
+
+        return sorted(picker_ids)
+
+    @classmethod
+    def recover(cls, journal_dir, picker_id):
+        '''
+        Return (name, picker data) replaying the journal over the last snapshot
+        '''
+        name = ''
+        picker_data = {'buttons': []}
+
+        snapshot_path = os.path.join(journal_dir, picker_id + cls.SNAPSHOT_EXT)
+        for path in (snapshot_path, snapshot_path + '.tmp'):
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r') as f:
+                        snapshot = json.loads(f.read())
+                    name = snapshot.get('name', '')
+                    picker_data = snapshot.get('picker', picker_data)
+                    break
+                except ValueError:
+                    continue
+
+        buttons = picker_data.setdefault('buttons', [])
+        buttons_by_id = dict([(btn.get('id'), btn) for btn in buttons])
+
+        journal_path = os.path.join(journal_dir, picker_id + cls.JOURNAL_EXT)
+        if os.path.exists(journal_path):
+            with open(journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Last line may be incomplete after a crash
+                        break
+
+                    button_id = entry.get('id')
+                    operation = entry.get('op')
+                    if operation == cls.CREATE and button_id not in buttons_by_id:
+                        buttons.append(entry['data'])
+                        buttons_by_id[button_id] = entry['data']
+                    elif operation == cls.CHANGE and button_id in buttons_by_id:
+                        buttons_by_id[button_id].update(entry['data'])
+                    elif operation == cls.DELETE and button_id in buttons_by_id:
+                        buttons.remove(buttons_by_id.pop(button_id))
+
+        return name, picker_data
+
+    @classmethod
+    def remove_files(cls, journal_dir, picker_id):
+        for ext in (cls.JOURNAL_EXT, cls.SNAPSHOT_EXT):
+            path = os.path.join(journal_dir, picker_id + ext)
+            for file_path in (path, path + '.tmp'):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+
+
+class PickerLayoutGenerator(object):
+    '''
+    Build picker button positions by projecting rig controls through a camera
+    '''
+
+    LEFT_COLOR = (90, 130, 255)
+    RIGHT_COLOR = (255, 90, 90)
+    CENTER_COLOR = (240, 200, 60)
+
+    def __init__(self, controls, camera, area=(600, 600), button_size=(16, 16), spacing=2, margin=20):
+        self.controls = cmds.ls(controls, long=True)
+        self.camera = camera
+        self.area = area
+        self.button_size = button_size
+        self.spacing = spacing
+        self.margin = margin
+
+    def get_world_positions(self):
+        # One bulk query for every control instead of one xform per control
+        flat_positions = cmds.xform(self.controls, query=True, worldSpace=True, translation=True) or []
+        return [flat_positions[i:i + 3] for i in range(0, len(flat_positions), 3)]
+
+    def get_camera_matrix(self):
+        sel_list = om2.MSelectionList()
+        sel_list.add(self.camera)
+        cam_path = sel_list.getDagPath(0)
+        if cam_path.apiType() == om2.MFn.kTransform:
+            cam_path.extendToShape()
+
+        view_matrix = cam_path.inclusiveMatrixInverse()
+        projection_matrix = om2.MMatrix(om2.MFnCamera(cam_path).projectionMatrix())
+
+        return view_matrix * projection_matrix
+
+    def project_positions(self, positions):
+        camera_matrix = self.get_camera_matrix()
+
+        if np is not None:
+            matrix = np.array(list(camera_matrix), dtype=np.float64).reshape(4, 4)
+            points = np.ones((len(positions), 4), dtype=np.float64)
+            points[:, :3] = positions
+
+            # Maya matrices are row-major, points are multiplied as row vectors
+            clip = points.dot(matrix)
+            w = clip[:, 3:4]
+            w[np.abs(w) < 1e-8] = 1e-8
+            ndc = clip[:, :2] / w
+            return ndc.tolist()
+
+        ndc = []
+        for pos in positions:
+            clip = om2.MPoint(pos[0], pos[1], pos[2]) * camera_matrix
+            w = clip.w if abs(clip.w) > 1e-8 else 1e-8
+            ndc.append((clip.x / w, clip.y / w))
+        return ndc
+
+    def fit_to_area(self, ndc_points):
+        if not ndc_points:
+            return []
+
+        xs = [p[0] for p in ndc_points]
+        ys = [p[1] for p in ndc_points]
+        min_x, max_x = min(xs), max(xs)
+        min_y, max_y = min(ys), max(ys)
+        span_x = max(max_x - min_x, 1e-6)
+        span_y = max(max_y - min_y, 1e-6)
+
+        usable = (self.area[0] - self.margin * 2 - self.button_size[0],
+                  self.area[1] - self.margin * 2 - self.button_size[1])
+        scale = min(usable[0] / span_x, usable[1] / span_y)
+
+        # Center the projected bounding box in the area, NDC y goes up while the picker y goes down
+        offset_x = (usable[0] - span_x * scale) / 2.0 + self.margin
+        offset_y = (usable[1] - span_y * scale) / 2.0 + self.margin
+
+        return [(offset_x + (p[0] - min_x) * scale, offset_y + (max_y - p[1]) * scale) for p in ndc_points]
+
+    def resolve_overlaps(self, points):
+        cell_w = self.button_size[0] + self.spacing
+        cell_h = self.button_size[1] + self.spacing
+
+        occupied = set()
+        resolved = []
+        for x, y in points:
+            cell = (int(round(x / cell_w)), int(round(y / cell_h)))
+            free_cell = self.find_free_cell(cell, occupied)
+            occupied.add(free_cell)
+            resolved.append((free_cell[0] * cell_w, free_cell[1] * cell_h))
+
+        return resolved
+
+    def find_free_cell(self, cell, occupied):
+        if cell not in occupied:
+            return cell
+
+        # Search square rings around the wanted cell, closest candidate first
+        ring = 1
+        while True:
+            candidates = []
+            for dx in range(-ring, ring + 1):
+                for dy in range(-ring, ring + 1):
+                    if max(abs(dx), abs(dy)) != ring:
+                        continue
+                    candidate = (cell[0] + dx, cell[1] + dy)
+                    if candidate not in occupied:
+                        candidates.append((dx * dx + dy * dy, candidate))
+            if candidates:
+                return min(candidates)[1]
+            ring += 1
+
+    def get_control_color(self, control):
+        short_name = control.split('|')[-1].split(':')[-1]
+        lower_name = short_name.lower()
+        if lower_name.startswith(('l_', 'lf_', 'left')) or '_l_' in lower_name or lower_name.endswith('_l'):
+            return self.LEFT_COLOR
+        elif lower_name.startswith(('r_', 'rt_', 'right')) or '_r_' in lower_name or lower_name.endswith('_r'):
+            return self.RIGHT_COLOR
+        return self.CENTER_COLOR
+
+    def generate(self):
+        '''
+        Return a list of (control, (x, y), color) relative to the picker area origin
+        '''
+        positions = self.get_world_positions()
+        ndc_points = self.project_positions(positions)
+        picker_points = self.resolve_overlaps(self.fit_to_area(ndc_points))
+
+        return [(control, point, self.get_control_color(control))
+                for control, point in zip(self.controls, picker_points)]
+
 class PickerUI(QtWidgets.QDialog):
     dlg_instance = None
 
@@ -859,6 +2352,12 @@ class PickerUI(QtWidgets.QDialog):
         self.picker_buttons = []
 
         self.picker_background_image_path = r"D:\Trabajo\Desarrollos\INTERFACE\picker_test\CHARS_kid_rig_picker_bck.JPG"
+        self.journal_dir = PickerJournal.get_default_dir()
+
+        self.library = None
+        self.library_dlg = None
+
+        self.undo_limit = PickerUndoStack.DEFAULT_LIMIT
 
         self.create_actions()
         self.create_widgets()
@@ -867,19 +2366,52 @@ class PickerUI(QtWidgets.QDialog):
 
     def create_actions(self):
         self.menu_create_new_picker = QtWidgets.QAction('Create New PickerUI', self)
+        self.menu_generate_picker = QtWidgets.QAction('Generate Picker From Selection', self)
+        self.menu_save_to_scene = QtWidgets.QAction('Save Picker To Scene', self)
+        self.menu_save_file = QtWidgets.QAction('Save Picker File...', self)
+        self.menu_open_file = QtWidgets.QAction('Open Picker File...', self)
+        self.menu_library = QtWidgets.QAction('Picker Library...', self)
+        self.menu_recover_autosave = QtWidgets.QAction('Recover Autosaved Pickers', self)
 
         self.menu_create_btn_action = QtWidgets.QAction('Create Button', self)
+        self.menu_undo_action = QtWidgets.QAction('Undo', self)
+        self.menu_undo_action.setShortcut(QtGui.QKeySequence.Undo)
+        self.menu_redo_action = QtWidgets.QAction('Redo', self)
+        self.menu_redo_action.setShortcut(QtGui.QKeySequence.Redo)
+        # Enabled with edit mode only
+        self.menu_undo_action.setEnabled(False)
+        self.menu_redo_action.setEnabled(False)
+        self.menu_action_timings = QtWidgets.QAction('Print Action Timings', self)
         self.menu_edit_mode_action = QtWidgets.QAction('Edit Mode', self)
         self.menu_edit_mode_action.setCheckable(True)
         self.menu_edit_mode_action.setChecked(False)
 
+        self.namespace_action_grp = QtWidgets.QActionGroup(self)
+        self.namespace_action_grp.setExclusive(True)
+
     def create_widgets(self):
         self.menu_bar = QtWidgets.QMenuBar()
         file_menu = self.menu_bar.addMenu('File')
         file_menu.addAction(self.menu_create_new_picker)
+        file_menu.addAction(self.menu_generate_picker)
+        file_menu.addSeparator()
+        file_menu.addAction(self.menu_open_file)
+        file_menu.addAction(self.menu_save_file)
+        file_menu.addAction(self.menu_library)
+        file_menu.addSeparator()
+        file_menu.addAction(self.menu_save_to_scene)
+        self.load_from_scene_menu = file_menu.addMenu('Load Picker From Scene')
+        file_menu.addSeparator()
+        file_menu.addAction(self.menu_recover_autosave)
         edit_menu = self.menu_bar.addMenu('Edit')
+        edit_menu.addAction(self.menu_undo_action)
+        edit_menu.addAction(self.menu_redo_action)
+        edit_menu.addSeparator()
         edit_menu.addAction(self.menu_create_btn_action)
         edit_menu.addAction(self.menu_edit_mode_action)
+        edit_menu.addSeparator()
+        edit_menu.addAction(self.menu_action_timings)
+        self.namespace_menu = self.menu_bar.addMenu('Namespace')
 
         self.edit_shelf_wdg = EditModeShelf()
 
@@ -903,26 +2435,250 @@ class PickerUI(QtWidgets.QDialog):
         main_layout.addLayout(picker_layout)
 
     def create_connections(self):
-        self.menu_create_new_picker.triggered.connect(self.create_picker_tab)
+        self.menu_create_new_picker.triggered.connect(self.create_new_picker_tab)
+        self.menu_generate_picker.triggered.connect(self.generate_picker_from_selection)
+        self.menu_save_to_scene.triggered.connect(self.save_picker_to_scene)
+        self.menu_save_file.triggered.connect(self.save_picker_file)
+        self.menu_open_file.triggered.connect(self.open_picker_file_dialog)
+        self.menu_library.triggered.connect(self.show_library)
+        self.load_from_scene_menu.aboutToShow.connect(self.update_load_from_scene_menu)
+        self.menu_recover_autosave.triggered.connect(self.recover_autosaved_pickers)
 
         self.menu_edit_mode_action.triggered.connect(self.modify_edit_mode)
+        self.menu_undo_action.triggered.connect(self.undo_picker_edit)
+        self.menu_redo_action.triggered.connect(self.redo_picker_edit)
+        self.menu_action_timings.triggered.connect(self.print_action_timings)
 
         self.pickers_tab_wdg.tabCloseRequested.connect(self.close_picker_tab)
 
-    def create_picker_tab(self):
+        self.namespace_menu.aboutToShow.connect(self.update_namespace_menu)
+        self.namespace_action_grp.triggered.connect(self.on_namespace_action_triggered)
+
+    def create_new_picker_tab(self):
+        # triggered sends its checked state, which would be taken as the tab name
+        self.create_picker_tab()
+
+    def create_picker_tab(self, name='New picker'):
         # Create tab and picker wdg
-        pick_wdg = PickerWidget(self.picker_background_image_path, edit_shelf = self.edit_shelf_wdg,  parent=None)
-        index = self.pickers_tab_wdg.addTab(pick_wdg, 'New picker')
+        pick_wdg = PickerWidget(self.picker_background_image_path, edit_shelf = self.edit_shelf_wdg, undo_limit = self.undo_limit, parent=None)
+        index = self.pickers_tab_wdg.addTab(pick_wdg, name)
 
         # Select new tab
         self.pickers_tab_wdg.setCurrentIndex(index)
 
+        pick_wdg.start_journal(self.journal_dir, name)
+
+        return pick_wdg
+
+    def get_active_camera(self):
+        panel = cmds.getPanel(withFocus=True)
+        if not panel or cmds.getPanel(typeOf=panel) != 'modelPanel':
+            panel = cmds.getPanel(visiblePanels=True)
+            panel = [p for p in panel if cmds.getPanel(typeOf=p) == 'modelPanel']
+            panel = panel[0] if panel else None
+
+        if panel:
+            return cmds.modelPanel(panel, query=True, camera=True)
+        return 'persp'
+
+    def generate_picker_from_selection(self):
+        controls = cmds.ls(sl=True, transforms=True)
+        if not controls:
+            cmds.warning('Select the rig controls to generate the picker from')
+            return
+
+        self.generate_picker_tab(controls, self.get_active_camera())
+
+    def generate_picker_tab(self, controls, camera, button_size=(16, 16)):
+        start_time = time.time()
+
+        tab_size = self.pickers_tab_wdg.size()
+        generator = PickerLayoutGenerator(controls, camera,
+                                          area=(tab_size.width(), tab_size.height()),
+                                          button_size=button_size)
+        layout = generator.generate()
+
+        pick_wdg = self.create_picker_tab(name='{} picker'.format(camera.split('|')[-1]))
+        pick_wdg.setUpdatesEnabled(False)
+        for control, point, color in layout:
+            picker_btn = pick_wdg.create_selection_button(x=5000 + point[0], y=5000 + point[1],
+                                                          size=button_size,
+                                                          color=color,
+                                                          selection=[control])
+            picker_btn.setToolTip(control.split('|')[-1])
+        pick_wdg.setUpdatesEnabled(True)
+        pick_wdg.update_edit_mode()
+        pick_wdg.compact_journal()
+
+        print('Picker generated: {} buttons in {:.3f}s'.format(len(layout), time.time() - start_time))
+
+        return pick_wdg
+
     def close_picker_tab(self, index):
         picker_wdg = self.pickers_tab_wdg.widget(index)
         if picker_wdg is not None:
+            picker_wdg.stop_journal()
             picker_wdg.deleteLater()
         self.pickers_tab_wdg.removeTab(index)
 
+    def save_picker_to_scene(self):
+        index = self.pickers_tab_wdg.currentIndex()
+        if index < 0:
+            cmds.warning('There is no picker to save')
+            return
+
+        picker_wdg = self.pickers_tab_wdg.widget(index)
+        name = self.pickers_tab_wdg.tabText(index)
+        node = PickerSceneStorage.save(name, picker_wdg.get_data())
+        print('Picker "{}" saved to {}'.format(name, node))
+
+    def update_load_from_scene_menu(self):
+        self.load_from_scene_menu.clear()
+
+        entries = PickerSceneStorage.list_entries()
+        if not entries:
+            action = self.load_from_scene_menu.addAction('No pickers in scene')
+            action.setEnabled(False)
+            return
+
+        for entry in entries:
+            action = self.load_from_scene_menu.addAction('{} ({} buttons)'.format(entry.get_name(), entry.get_button_count()))
+            action.triggered.connect(partial(self.load_picker_from_scene, entry))
+
+    def load_picker_from_scene(self, entry, *args):
+        pick_wdg = self.create_picker_tab(name=entry.get_name())
+        pick_wdg.load_data(entry.get_data())
+        pick_wdg.compact_journal()
+
+        return pick_wdg
+
+    def get_picker_thumbnail(self, picker_wdg):
+        # The picker widget is moved -5000, -5000 inside the tab, grab only the visible area
+        tab_size = picker_wdg.parentWidget().size()
+        return PickerFileStorage.build_thumbnail(picker_wdg, QtCore.QRect(5000, 5000, tab_size.width(), tab_size.height()))
+
+    def save_picker_file(self):
+        index = self.pickers_tab_wdg.currentIndex()
+        if index < 0:
+            cmds.warning('There is no picker to save')
+            return
+
+        file_path, selected_filter = QtWidgets.QFileDialog.getSaveFileName(self, 'Save Picker', '', 'Picker (*{})'.format(PickerFileStorage.FILE_EXT))
+        if not file_path:
+            return
+
+        picker_wdg = self.pickers_tab_wdg.widget(index)
+        PickerFileStorage.save(file_path,
+                               self.pickers_tab_wdg.tabText(index),
+                               picker_wdg.get_data(),
+                               self.get_picker_thumbnail(picker_wdg))
+
+    def open_picker_file_dialog(self):
+        file_path, selected_filter = QtWidgets.QFileDialog.getOpenFileName(self, 'Open Picker', '', 'Picker (*{})'.format(PickerFileStorage.FILE_EXT))
+        if file_path:
+            self.open_picker_file(file_path)
+
+    def open_picker_file(self, file_path):
+        header, picker_data = PickerFileStorage.load(file_path)
+
+        pick_wdg = self.create_picker_tab(name=header.get('name') or os.path.basename(file_path))
+        pick_wdg.load_data(picker_data)
+        pick_wdg.compact_journal()
+
+        return pick_wdg
+
+    def show_library(self):
+        if not self.library_dlg:
+            self.library = PickerLibrary(PickerLibrary.get_default_path())
+            self.library_dlg = PickerLibraryDialog(self.library, parent=self)
+            self.library_dlg.picker_open_requested.connect(self.open_picker_file)
+
+        self.library_dlg.show()
+        self.library_dlg.raise_()
+        self.library_dlg.activateWindow()
+
+    def get_open_picker_ids(self):
+        return [self.pickers_tab_wdg.widget(i).picker_id for i in range(self.pickers_tab_wdg.count())]
+
+    def recover_autosaved_pickers(self):
+        open_picker_ids = self.get_open_picker_ids()
+        picker_ids = [picker_id for picker_id in PickerJournal.list_journals(self.journal_dir)
+                      if picker_id not in open_picker_ids]
+        if not picker_ids:
+            QtWidgets.QMessageBox.information(self, 'Recover Pickers', 'There are no autosaved pickers to recover.')
+            return
+
+        for picker_id in picker_ids:
+            name, picker_data = PickerJournal.recover(self.journal_dir, picker_id)
+
+            pick_wdg = self.create_picker_tab(name=name or 'Recovered picker')
+            pick_wdg.load_data(picker_data)
+            pick_wdg.compact_journal()
+
+            # The recovered picker is journaled under its own id, the old files go after its snapshot
+            if pick_wdg.journal:
+                pick_wdg.journal.remove_journal(picker_id)
+
+    def undo_picker_edit(self):
+        picker_wdg = self.pickers_tab_wdg.currentWidget()
+        if picker_wdg:
+            picker_wdg.undo()
+
+    def redo_picker_edit(self):
+        picker_wdg = self.pickers_tab_wdg.currentWidget()
+        if picker_wdg:
+            picker_wdg.redo()
+
+    def print_action_timings(self):
+        picker_wdg = self.pickers_tab_wdg.currentWidget()
+        if picker_wdg:
+            for line in picker_wdg.get_action_timing_report():
+                print(line)
+
+    def set_undo_limit(self, limit):
+        self.undo_limit = limit
+        for i in range(self.pickers_tab_wdg.count()):
+            self.pickers_tab_wdg.widget(i).undo_stack.set_limit(limit)
+
+    def get_scene_namespaces(self):
+        namespaces = cmds.namespaceInfo(':', listOnlyNamespaces=True, recurse=True) or []
+        return sorted([ns for ns in namespaces if ns not in ('UI', 'shared')])
+
+    def update_namespace_menu(self):
+        self.namespace_menu.clear()
+        for action in self.namespace_action_grp.actions():
+            self.namespace_action_grp.removeAction(action)
+
+        picker_wdg = self.pickers_tab_wdg.currentWidget()
+        current_namespace = picker_wdg.get_namespace() if picker_wdg else None
+
+        original_action = self.namespace_menu.addAction('Original Names')
+        original_action.setData(None)
+        self.namespace_menu.addSeparator()
+        namespace_actions = [original_action]
+        for namespace in self.get_scene_namespaces():
+            action = self.namespace_menu.addAction(namespace)
+            action.setData(namespace)
+            namespace_actions.append(action)
+
+        for action in namespace_actions:
+            action.setCheckable(True)
+            action.setChecked(action.data() == current_namespace)
+            action.setEnabled(picker_wdg is not None)
+            self.namespace_action_grp.addAction(action)
+
+    def on_namespace_action_triggered(self, action):
+        picker_wdg = self.pickers_tab_wdg.currentWidget()
+        if picker_wdg is None:
+            return
+
+        namespace = action.data()
+        picker_wdg.set_namespace(namespace)
+        picker_wdg.compile_button_actions()
+
+        index = self.pickers_tab_wdg.currentIndex()
+        self.pickers_tab_wdg.setTabToolTip(index, 'Namespace: {}'.format(namespace or '-'))
+
     def modify_edit_mode(self):
         global EDIT_MODE
         if EDIT_MODE:
@@ -955,6 +2711,10 @@ class PickerUI(QtWidgets.QDialog):
             # Hide edit shelf
             self.edit_shelf_wdg.setVisible(False)
 
+        # The picker undo stack only holds edits, in animation mode Ctrl+Z/Ctrl+Y stay with Maya
+        self.menu_undo_action.setEnabled(EDIT_MODE)
+        self.menu_redo_action.setEnabled(EDIT_MODE)
+
         # Update moveable status at picker buttons
         picker_tabs_num = self.pickers_tab_wdg.count()
         for i in range(picker_tabs_num):
@@ -974,6 +2734,12 @@ class PickerUI(QtWidgets.QDialog):
 
         self.change_edit_mode_status(status=False)
 
+        # Journals are stopped on close, reopening the window resumes them
+        for i in range(self.pickers_tab_wdg.count()):
+            picker_wdg = self.pickers_tab_wdg.widget(i)
+            if not picker_wdg.journal:
+                picker_wdg.start_journal(self.journal_dir, self.pickers_tab_wdg.tabText(i))
+
     def closeEvent(self, e):
         global EDIT_MODE
 
@@ -984,6 +2750,10 @@ class PickerUI(QtWidgets.QDialog):
 
         self.change_edit_mode_status(status=False)
 
+        # Ends the worker threads, the files stay on disk so the pickers can still be recovered
+        for i in range(self.pickers_tab_wdg.count()):
+            self.pickers_tab_wdg.widget(i).stop_journal(remove_files=False)
+
 if __name__ == '__main__':
     '''
     Only run when executes the code directly.
@@ -70,8 +70,9 @@ class CustomColorButton(QtWidgets.QWidget):
     def set_color(self, color):
         color = QtGui.QColor(color)
 
-        cmds.colorSliderGrp(self._name, e=True, rgbValue=(color.redF(), color.greenF(), color.blueF()))
-        self.on_color_changed()
+        if color != self.get_color():
+            cmds.colorSliderGrp(self._name, e=True, rgbValue=(color.redF(), color.greenF(), color.blueF()))
+            self.on_color_changed()
 
     def get_color(self):
         color = cmds.colorSliderGrp(self._color_slider_widget.objectName(), query=True, rgbValue=True)
@@ -83,6 +84,57 @@ class CustomColorButton(QtWidgets.QWidget):
         self.color_changed.emit(self.get_color())
 
 
+class ColorSwatchButton(QtWidgets.QPushButton):
+    '''
+    Pure Qt color swatch, the color is kept on the widget and the
+    color dialog is only created when the swatch is clicked
+    '''
+
+    color_changed = QtCore.Signal(QtGui.QColor)
+
+    def __init__(self, color=QtCore.Qt.white, parent=None):
+        super(ColorSwatchButton, self).__init__(parent)
+
+        self.setObjectName('ColorSwatchButton')
+
+        self._color = QtGui.QColor(color)
+
+        self.set_size(50, 14)
+
+        self.clicked.connect(self.pick_color)
+
+    def set_size(self, width, height):
+        self.setFixedSize(width, height)
+
+    def set_color(self, color):
+        color = QtGui.QColor(color)
+
+        # Only real changes are emitted
+        if color != self._color:
+            self._color = color
+            self.update()
+            self.on_color_changed()
+
+    def get_color(self):
+        return QtGui.QColor(self._color)
+
+    def pick_color(self):
+        color = QtWidgets.QColorDialog.getColor(self._color, self, 'Select Color')
+        if color.isValid():
+            self.set_color(color)
+
+    def paintEvent(self, e):
+        painter = QtGui.QPainter(self)
+
+        rect = self.rect().adjusted(0, 0, -1, -1)
+        painter.fillRect(rect, self._color)
+        painter.setPen(QtCore.Qt.black)
+        painter.drawRect(rect)
+
+    def on_color_changed(self, *args):
+        self.color_changed.emit(self.get_color())
+
+
 class CustomColorWdg(QtWidgets.QWidget):
     dlg_instance = None
 
@@ -113,8 +165,8 @@ class CustomColorWdg(QtWidgets.QWidget):
         self.create_connections()
 
     def create_widgets(self):
-        self.foreground_color_btn = CustomColorButton(QtGui.QColor(QtCore.Qt.white))
-        self.background_color_btn = CustomColorButton(QtGui.QColor(QtCore.Qt.black))
+        self.foreground_color_btn = ColorSwatchButton(QtGui.QColor(QtCore.Qt.white))
+        self.background_color_btn = ColorSwatchButton(QtGui.QColor(QtCore.Qt.black))
 
         self.print_btn = QtWidgets.QPushButton('Print')
         self.close_btn = QtWidgets.QPushButton('Close')
@@ -151,9 +203,9 @@ class CustomColorWdg(QtWidgets.QWidget):
                                                       new_color.blue()))
 
     def on_background_color_changed(self, new_color):
-        print('Background Color: [{}, {}, {}]'.format(bg_color.red(),
-                                                      bg_color.green(),
-                                                      bg_color.blue()))
+        print('Background Color: [{}, {}, {}]'.format(new_color.red(),
+                                                      new_color.green(),
+                                                      new_color.blue()))
 
     def showEvent(self, e):
         super(CustomColorWdg, self).showEvent(e)
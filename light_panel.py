@@ -1,4 +1,8 @@
-from functools import partial
+import collections
+import json
+import os
+import time
+import zlib
 
 from PySide2 import QtCore
 from PySide2 import QtGui
@@ -7,8 +11,12 @@ from shiboken2 import wrapInstance
 
 import maya.OpenMayaUI as om
 import maya.OpenMayaUI as omui
+import maya.api.OpenMaya as om2
 import maya.cmds as cmds
 
+from custom_color_button import ColorSwatchButton, CustomColorButton
+import scene_model
+
 
 def maya_main_window():
     '''
@@ -18,93 +26,517 @@ def maya_main_window():
     main_window_ptr = omui.MQtUtil.mainWindow()
     return wrapInstance(long(main_window_ptr), QtWidgets.QWidget)
 
-class CustomColorButton(QtWidgets.QWidget):
+class LightTypePlan(object):
+    '''
+    Columns, plugs and watched attributes of one light type, built once and shared by every row of that type
+    '''
 
-    color_changed = QtCore.Signal(QtGui.QColor)
+    COLUMNS = ['visibility', 'intensity', 'color', 'emitDiffuse', 'emitSpecular']
 
-    def __init__(self, color=QtCore.Qt.white, parent=None):
-        super(CustomColorButton, self).__init__(parent)
+    def __init__(self, light_type, icon_name=':Light.png', shape_plugs=None, transform_plugs=None):
+        self.light_type = light_type
+        self.icon_name = icon_name
 
-        self.setObjectName('CustomColorButton')
+        # {column: plug name}
+        self.shape_plugs = dict(shape_plugs or {})
+        self.transform_plugs = dict(transform_plugs or {'visibility': 'visibility'})
 
-        self.create_control()
+        plugs = dict(self.shape_plugs, **self.transform_plugs)
+        self.columns = [column for column in self.COLUMNS if column in plugs]
 
-        self.set_size(50, 14)
-        self.set_color(color)
+        # {plug name: column}, used to route attribute changed callbacks
+        self.watched_attributes = dict([(plug, column) for column, plug in plugs.items()])
 
-    def create_control(self):
-        ''' 1) Create the colorSliderGrp '''
-        window = cmds.window()
-        self._name = cmds.colorSliderGrp()
+        self.icon = None
 
-        ''' 2) Find the colorSliderGrp widget '''
-        color_slider_obj = omui.MQtUtil.findControl(self._name)
-        if color_slider_obj:
-            self._color_slider_widget = wrapInstance(long(color_slider_obj), QtWidgets.QWidget)
+    def has_column(self, column):
+        return column in self.columns
 
-            ''' 3) Reparent the colorSliderGrp widget to this widget '''
-            main_layout = QtWidgets.QVBoxLayout(self)
-            main_layout.setObjectName('main_layout')
-            main_layout.setContentsMargins(0,0,0,0)
-            main_layout.addWidget(self._color_slider_widget)
+    def get_plug_name(self, column):
+        if column in self.transform_plugs:
+            return self.transform_plugs[column]
+        return self.shape_plugs.get(column)
 
-            ''' 4) Update the colorSliderGrp control name (used by Maya)'''
-            self._name = omui.MQtUtil.fullName(long(color_slider_obj))
+    def is_transform_column(self, column):
+        return column in self.transform_plugs
 
-            ''' 5) Identify/Store the colorSliderGrp's child widgets (and hife if necessary) '''
-            self._slider_widget = self._color_slider_widget.findChild(QtWidgets.QWidget, 'slider')
-            if self._slider_widget:
-                self._slider_widget.hide()
-            self._color_widget = self._color_slider_widget.findChild(QtWidgets.QWidget, 'port')
+    def get_column(self, plug_name):
+        return self.watched_attributes.get(plug_name)
 
-            cmds.colorSliderGrp(self._name, e=True, changeCommand=partial(self.on_color_changed))
+    def get_icon(self):
+        if self.icon is None:
+            self.icon = QtGui.QIcon(self.icon_name)
+        return self.icon
 
 
-        ''' Delete Mel Window '''
-        cmds.deleteUI(window, window=True)
+BASIC_LIGHT_PLUGS = {'intensity': 'intensity', 'color': 'color'}
+EMIT_LIGHT_PLUGS = dict(BASIC_LIGHT_PLUGS, emitDiffuse='emitDiffuse', emitSpecular='emitSpecular')
+RENDERMAN_LIGHT_PLUGS = {'intensity': 'intensity', 'color': 'lightColor'}
 
-    def set_size(self, width, height):
-        self._color_slider_widget.setFixedWidth(width)
-        self._color_widget.setFixedHeight(height)
+LIGHT_TYPE_PLANS = {}
 
-    def set_color(self, color):
-        color = QtGui.QColor(color)
+def register_light_type_plan(plan):
+    LIGHT_TYPE_PLANS[plan.light_type] = plan
 
-        if color != self.get_color():
-            cmds.colorSliderGrp(self._name, e=True, rgbValue=(color.redF(), color.greenF(), color.blueF()))
-            self.on_color_changed()
+def get_light_type_plan(light_type):
+    '''
+    Return the plan of a light type, unknown types get a generic plan built on first use
+    '''
+    plan = LIGHT_TYPE_PLANS.get(light_type)
+    if plan is None:
+        plan = LightTypePlan(light_type, shape_plugs=BASIC_LIGHT_PLUGS)
+        register_light_type_plan(plan)
+    return plan
 
-    def get_color(self):
-        color = cmds.colorSliderGrp(self._color_slider_widget.objectName(), query=True, rgbValue=True)
+def get_scene_light_types():
+    '''
+    Return 'light' and the registered light types of loaded plugins that do not derive from it
+    '''
+    node_types = set(cmds.allNodeTypes())
+
+    light_types = ['light']
+    for light_type in sorted(LIGHT_TYPE_PLANS.keys()):
+        if light_type in node_types and 'light' not in (cmds.nodeType(light_type, inherited=True, isTypeName=True) or []):
+            light_types.append(light_type)
+    return light_types
+
+for light_plan in [
+        LightTypePlan('ambientLight', ':ambientLight.svg', BASIC_LIGHT_PLUGS),
+        LightTypePlan('directionalLight', ':directionalLight.svg', EMIT_LIGHT_PLUGS),
+        LightTypePlan('pointLight', ':pointLight.svg', EMIT_LIGHT_PLUGS),
+        LightTypePlan('spotLight', ':spotLight.svg', EMIT_LIGHT_PLUGS),
+        LightTypePlan('areaLight', ':areaLight.svg', EMIT_LIGHT_PLUGS),
+        LightTypePlan('volumeLight', ':volumeLight.svg', EMIT_LIGHT_PLUGS),
+        LightTypePlan('aiAreaLight', ':areaLight.svg', BASIC_LIGHT_PLUGS),
+        LightTypePlan('aiMeshLight', ':areaLight.svg', BASIC_LIGHT_PLUGS),
+        LightTypePlan('aiPhotometricLight', ':pointLight.svg', BASIC_LIGHT_PLUGS),
+        LightTypePlan('aiSkyDomeLight', ':ambientLight.svg', BASIC_LIGHT_PLUGS),
+        LightTypePlan('PxrRectLight', ':areaLight.svg', RENDERMAN_LIGHT_PLUGS),
+        LightTypePlan('PxrDiskLight', ':areaLight.svg', RENDERMAN_LIGHT_PLUGS),
+        LightTypePlan('PxrSphereLight', ':pointLight.svg', RENDERMAN_LIGHT_PLUGS),
+        LightTypePlan('PxrDomeLight', ':ambientLight.svg', RENDERMAN_LIGHT_PLUGS),
+        ]:
+    register_light_type_plan(light_plan)
+
+
+def benchmark_light_item_creation(count=100):
+    '''
+    Print the average LightItem creation time with the colorSliderGrp button and the Qt swatch
+    '''
+    lights = cmds.ls(type='light')
+    if not lights:
+        print('No light in the scene')
+        return
+
+    dispatcher = LightAttributeDispatcher()
+    color_button_class = LightItem.COLOR_BUTTON_CLASS
+    try:
+        for button_class in [CustomColorButton, ColorSwatchButton]:
+            LightItem.COLOR_BUTTON_CLASS = button_class
+
+            start_time = time.time()
+            light_items = [LightItem(lights[0], dispatcher) for i in range(count)]
+            elapsed_time = time.time() - start_time
+
+            for light_item in light_items:
+                light_item.unregister_callbacks()
+                light_item.deleteLater()
+
+            print('{}: {:.3f}ms per row'.format(button_class.__name__, elapsed_time * 1000.0 / count))
+    finally:
+        LightItem.COLOR_BUTTON_CLASS = color_button_class
+        dispatcher.stop()
+
+
+def read_plug_value(plug):
+    '''
+    Return the value of a plug, compounds as tuples and distances or angles in UI units
+    '''
+    if plug.isCompound:
+        return tuple([read_plug_value(plug.child(i)) for i in range(plug.numChildren())])
+
+    attribute = plug.attribute()
+    if attribute.hasFn(om2.MFn.kNumericAttribute):
+        if om2.MFnNumericAttribute(attribute).numericType() == om2.MFnNumericData.kBoolean:
+            return plug.asBool()
+    elif attribute.hasFn(om2.MFn.kUnitAttribute):
+        unit_type = om2.MFnUnitAttribute(attribute).unitType()
+        if unit_type == om2.MFnUnitAttribute.kAngle:
+            return plug.asMAngle().asUnits(om2.MAngle.uiUnit())
+        elif unit_type == om2.MFnUnitAttribute.kDistance:
+            return plug.asMDistance().asUnits(om2.MDistance.uiUnit())
+    return plug.asDouble()
+
+
+class LightAttributeSnapshot(object):
+    '''
+    Cached attribute values of one light, read through API plugs in a single pass.
+    Changed attributes are refreshed one plug at a time. Values are keyed by
+    the columns of the light type plan.
+    '''
+
+    def __init__(self, shape_name):
+        sel_list = om2.MSelectionList()
+        sel_list.add(shape_name)
+
+        self.shape_obj = sel_list.getDependNode(0)
+        self.shape_fn = om2.MFnDagNode(self.shape_obj)
+        self.transform_fn = om2.MFnDagNode(self.shape_fn.parent(0))
+
+        self.uuid = self.shape_fn.uuid().asString()
+        self.light_type = self.shape_fn.typeName
+        self.plan = get_light_type_plan(self.light_type)
+
+        self.plugs = {}
+        for column in self.plan.columns:
+            node_fn = self.transform_fn if self.plan.is_transform_column(column) else self.shape_fn
+            plug_name = self.plan.get_plug_name(column)
+            if node_fn.hasAttribute(plug_name):
+                self.plugs[column] = node_fn.findPlug(plug_name, False)
+
+        self.values = {}
+        self.shape_name = ''
+        self.transform_name = ''
 
-        color = QtGui.QColor(color[0]*255, color[1]*255, color[2]*255)
-        return color
+        self.read_all()
+
+    def read_all(self):
+        self.refresh_names()
+        for attribute, plug in self.plugs.items():
+            self.values[attribute] = self.read_plug_value(plug)
+
+    def refresh_names(self):
+        self.shape_name = self.shape_fn.partialPathName()
+        self.transform_name = self.transform_fn.partialPathName()
+
+    def refresh(self, attribute):
+        '''
+        Re-read a single attribute, return True when its value changed
+        '''
+        plug = self.plugs.get(attribute)
+        if plug is None:
+            return False
+
+        value = self.read_plug_value(plug)
+        if self.values.get(attribute) == value:
+            return False
+
+        self.values[attribute] = value
+        return True
+
+    def has_attribute(self, attribute):
+        return attribute in self.plugs
+
+    def get_attribute_path(self, attribute):
+        node = self.transform_name if self.plan.is_transform_column(attribute) else self.shape_name
+        return '{}.{}'.format(node, self.plan.get_plug_name(attribute))
+
+    def get_value(self, attribute):
+        return self.values.get(attribute)
+
+    def read_plug_value(self, plug):
+        return read_plug_value(plug)
+
+
+class LightRigSnapshot(object):
+    '''
+    Settings of every light in the scene, read in one pass over the light nodes.
+    The attributes of each light come from the plan of its type, restoring only
+    writes the values that differ from the scene.
+    '''
+
+    # Stored for every light on top of the plugs of its plan
+    TRANSFORM_ATTRIBUTES = ['translate', 'rotate', 'scale']
+
+    FILE_EXT = '.lrig'
+    VERSION = 1
+
+    TOLERANCE = 1e-6
+
+    def __init__(self, lights=None):
+        # {uuid: {'shape': name, 'transform': name, 'type': light type, 'values': {attribute: value}}}
+        self.lights = lights or {}
+
+    @classmethod
+    def get_plan_attributes(cls, plan):
+        '''
+        Return the shape and transform attribute names stored for a light type plan
+        '''
+        shape_attributes = sorted(set(plan.shape_plugs.values()))
+        transform_attributes = sorted(set(plan.transform_plugs.values()).union(cls.TRANSFORM_ATTRIBUTES))
+        return shape_attributes, transform_attributes
+
+    @classmethod
+    def capture(cls):
+        lights = {}
+
+        # Plugin light types that do not derive from 'light' are included
+        sel_list = om2.MSelectionList()
+        for light_name in cmds.ls(type=get_scene_light_types(), long=True) or []:
+            sel_list.add(light_name)
+
+        for i in range(sel_list.length()):
+            shape_fn = om2.MFnDagNode(sel_list.getDependNode(i))
+            transform_fn = om2.MFnDagNode(shape_fn.parent(0))
+            shape_attributes, transform_attributes = cls.get_plan_attributes(get_light_type_plan(shape_fn.typeName))
+
+            values = {}
+            for node_fn, attributes in [(shape_fn, shape_attributes), (transform_fn, transform_attributes)]:
+                for attribute in attributes:
+                    if node_fn.hasAttribute(attribute):
+                        values[attribute] = read_plug_value(node_fn.findPlug(attribute, False))
+
+            lights[shape_fn.uuid().asString()] = {
+                'shape': shape_fn.fullPathName(),
+                'transform': transform_fn.fullPathName(),
+                'type': shape_fn.typeName,
+                'values': values,
+            }
+
+        return cls(lights)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, 'rb') as f:
+            data = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+
+        return cls(data.get('lights', {}))
+
+    def save(self, file_path):
+        data = {'version': self.VERSION, 'lights': self.lights}
+        with open(file_path, 'wb') as f:
+            f.write(zlib.compress(json.dumps(data).encode('utf-8')))
+
+    def get_light_count(self):
+        return len(self.lights)
+
+    def get_changes(self):
+        '''
+        Return (node, attribute, value) for every stored value that differs from the scene
+        '''
+        current = LightRigSnapshot.capture()
+
+        changes = []
+        for uuid, light in self.lights.items():
+            current_light = current.lights.get(uuid)
+            if current_light is None:
+                continue
+
+            shape_attributes, transform_attributes = self.get_plan_attributes(get_light_type_plan(current_light['type']))
+            for attribute, value in light['values'].items():
+                current_value = current_light['values'].get(attribute)
+                if current_value is None or self.is_equal(value, current_value):
+                    continue
+
+                node = current_light['transform'] if attribute in transform_attributes else current_light['shape']
+                changes.append((node, attribute, value))
+
+        return changes
+
+    def restore(self, dispatcher=None):
+        '''
+        Write the changed values in one undo chunk, return (number of values written, skipped plugs).
+        Locked or connected plugs are skipped so the rest of the rig is still restored.
+        '''
+        changes = self.get_changes()
+        if not changes:
+            return 0, []
+
+        written = 0
+        skipped_plugs = []
+
+        cmds.undoInfo(openChunk=True, chunkName='lightRigRestore')
+        if dispatcher:
+            dispatcher.hold()
+        try:
+            for node, attribute, value in changes:
+                plug = '{}.{}'.format(node, attribute)
+                if not cmds.getAttr(plug, settable=True):
+                    skipped_plugs.append(plug)
+                    continue
+
+                try:
+                    if isinstance(value, (list, tuple)):
+                        cmds.setAttr(plug, *value)
+                    else:
+                        cmds.setAttr(plug, value)
+                    written += 1
+                except RuntimeError:
+                    skipped_plugs.append(plug)
+        finally:
+            if dispatcher:
+                dispatcher.release()
+            cmds.undoInfo(closeChunk=True)
+
+        return written, skipped_plugs
+
+    def is_equal(self, value, other_value):
+        if isinstance(value, (list, tuple)):
+            return len(value) == len(other_value) and all([self.is_equal(a, b) for a, b in zip(value, other_value)])
+        return abs(value - other_value) <= self.TOLERANCE
+
+
+class LightAttributeDispatcher(QtCore.QObject):
+    '''
+    Route scene changes to light rows through a node to row table.
+    Additions, deletions and renames come from the shared scene model, attribute
+    changes use one callback per node instead of one scriptJob per attribute.
+    '''
+
+    callback_count_changed = QtCore.Signal(int)
+    light_added = QtCore.Signal()
+    light_removed = QtCore.Signal()
+
+    def __init__(self, parent=None):
+        super(LightAttributeDispatcher, self).__init__(parent)
+
+        self.node_rows = {}
+        self.node_callbacks = {}
+
+        self.scene_view = scene_model.SceneModelView(['light'], self)
+        self.scene_view.nodes_added.connect(self.on_nodes_added)
+        self.scene_view.nodes_removed.connect(self.on_nodes_removed)
+        self.scene_view.nodes_changed.connect(self.on_nodes_changed)
+
+        # Attribute changes received while held, dispatched once on release
+        self.hold_count = 0
+        self.held_changes = set()
+
+    def start(self):
+        # Light types of plugins loaded since the last start are picked up here
+        self.scene_view.set_node_types(get_scene_light_types())
+        self.scene_view.start()
+        self.callback_count_changed.emit(self.get_callback_count())
+
+    def stop(self):
+        for uuid in list(self.node_callbacks.keys()):
+            self.unregister(uuid)
+
+        self.scene_view.stop()
+        self.callback_count_changed.emit(self.get_callback_count())
+
+    def hold(self):
+        self.hold_count += 1
+
+    def release(self):
+        self.hold_count = max(self.hold_count - 1, 0)
+        if self.hold_count:
+            return
+
+        held_changes = self.held_changes
+        self.held_changes = set()
+        for uuid, attribute in held_changes:
+            row = self.node_rows.get(uuid)
+            if row:
+                row.on_attribute_changed(attribute)
+
+    def get_callback_count(self):
+        node_callbacks = sum([len(callbacks) for callbacks in self.node_callbacks.values()])
+        return node_callbacks + self.scene_view.get_callback_count()
+
+    def get_node_object(self, name):
+        sel_list = om2.MSelectionList()
+        sel_list.add(name)
+        return sel_list.getDependNode(0)
+
+    def register(self, row):
+        self.unregister(row.uuid)
+
+        shape_obj = self.get_node_object(row.shape_name)
+        transform_obj = om2.MFnDagNode(shape_obj).parent(0)
+
+        # Maya has no scene wide attribute changed message, a node has to be watched by its own
+        # callback. Visibility lives on the transform, so a light needs one callback per node.
+        self.node_rows[row.uuid] = row
+        self.node_callbacks[row.uuid] = [
+            om2.MNodeMessage.addAttributeChangedCallback(shape_obj, self.on_attribute_changed, row.uuid),
+            om2.MNodeMessage.addAttributeChangedCallback(transform_obj, self.on_attribute_changed, row.uuid),
+        ]
+        self.callback_count_changed.emit(self.get_callback_count())
+
+    def unregister(self, uuid):
+        self.node_rows.pop(uuid, None)
+        callbacks = self.node_callbacks.pop(uuid, [])
+        for callback_id in callbacks:
+            om2.MMessage.removeCallback(callback_id)
+
+        if callbacks:
+            self.callback_count_changed.emit(self.get_callback_count())
+
+    def get_attribute_name(self, plug):
+        if plug.isChild:
+            plug = plug.parent()
+        return plug.partialName(useLongNames=True)
+
+    def on_attribute_changed(self, msg, plug, other_plug, uuid):
+        if not msg & om2.MNodeMessage.kAttributeSet:
+            return
+
+        row = self.node_rows.get(uuid)
+        if row:
+            # The plan of the row maps plug names to its columns
+            attribute = row.snapshot.plan.get_column(self.get_attribute_name(plug))
+            if attribute:
+                if self.hold_count:
+                    self.held_changes.add((uuid, attribute))
+                else:
+                    row.on_attribute_changed(attribute)
+
+    def on_nodes_added(self, uuids):
+        self.light_added.emit()
+
+    def on_nodes_removed(self, uuids):
+        # The scene model reports deletions once Maya is idle
+        unregistered = False
+        for uuid in uuids:
+            row = self.node_rows.get(uuid)
+            if row:
+                self.remove_row(uuid, row)
+            else:
+                unregistered = True
+
+        # Table rows released by the model have no row to notify
+        if unregistered:
+            self.light_removed.emit()
+
+    def remove_row(self, uuid, row):
+        self.unregister(uuid)
+        row.on_node_deleted()
+
+    def on_nodes_changed(self, uuids):
+        # Renaming or reparenting the transform also reports its light shapes
+        for uuid in uuids:
+            row = self.node_rows.get(uuid)
+            if row:
+                row.on_name_changed()
 
-    def on_color_changed(self, *args):
-        self.color_changed.emit(self.get_color())
 
 class LightItem(QtWidgets.QWidget):
 
-    SUPPORTED_TYPES = ['ambienLight', 'directionalLight', 'pointLight', 'spotLight']
-    EMIT_TYPES = ['directionalLight', 'pointLight', 'spotLight']
+    COLOR_BUTTON_CLASS = ColorSwatchButton
 
     node_deleted = QtCore.Signal(str)
 
-    def __init__(self, shape_name, parent=None):
+    def __init__(self, shape_name, dispatcher, parent=None):
         super(LightItem, self).__init__(parent)
 
         self.setFixedHeight(26)
 
-        self.shape_name = shape_name
-        self.uuid = cmds.ls(shape_name, uuid=True)[0]
+        self.snapshot = LightAttributeSnapshot(shape_name)
+        self.shape_name = self.snapshot.shape_name
+        self.uuid = self.snapshot.uuid
+        self.plan = self.snapshot.plan
+
+        self.dispatcher = dispatcher
 
-        self.script_jobs = []
+        # Values currently shown by the widgets
+        self.displayed_values = {}
 
         self.create_widget()
         self.create_layout()
         self.create_connections()
 
-        self.create_script_jobs()
+        self.register_callbacks()
 
     def create_widget(self):
         self.light_type_btn = QtWidgets.QPushButton()
@@ -117,19 +549,28 @@ class LightItem(QtWidgets.QWidget):
         self.transform_name_label.setFixedWidth(120)
         self.transform_name_label.setAlignment(QtCore.Qt.AlignCenter)
 
-        light_type = self.get_light_type()
-        if light_type in self.SUPPORTED_TYPES:
+        # {column: widget}, only the columns the light actually has
+        self.column_widgets = {'visibility': self.visibility_cb}
+
+        if self.snapshot.has_attribute('intensity'):
             self.intensity_dsb = QtWidgets.QDoubleSpinBox()
             self.intensity_dsb.setRange(0.0, 100.0)
             self.intensity_dsb.setDecimals(3)
             self.intensity_dsb.setSingleStep(0.1)
             self.intensity_dsb.setButtonSymbols(QtWidgets.QAbstractSpinBox.NoButtons)
+            self.column_widgets['intensity'] = self.intensity_dsb
 
-            self.color_btn = CustomColorButton()
+        if self.snapshot.has_attribute('color'):
+            self.color_btn = self.COLOR_BUTTON_CLASS()
+            self.column_widgets['color'] = self.color_btn
 
-            if light_type in self.EMIT_TYPES:
-                self.emit_diffuse_cb = QtWidgets.QCheckBox()
-                self.emit_specular_cb = QtWidgets.QCheckBox()
+        if self.snapshot.has_attribute('emitDiffuse'):
+            self.emit_diffuse_cb = QtWidgets.QCheckBox()
+            self.column_widgets['emitDiffuse'] = self.emit_diffuse_cb
+
+        if self.snapshot.has_attribute('emitSpecular'):
+            self.emit_specular_cb = QtWidgets.QCheckBox()
+            self.column_widgets['emitSpecular'] = self.emit_specular_cb
 
         self.update_values()
 
@@ -140,17 +581,17 @@ class LightItem(QtWidgets.QWidget):
         main_layout.addWidget(self.visibility_cb)
         main_layout.addWidget(self.transform_name_label)
 
-        light_type = self.get_light_type()
-        if light_type in self.SUPPORTED_TYPES:
+        if 'intensity' in self.column_widgets:
             main_layout.addWidget(self.intensity_dsb)
+        if 'color' in self.column_widgets:
             main_layout.addSpacing(10)
             main_layout.addWidget(self.color_btn)
-
-            if light_type in self.EMIT_TYPES:
-                main_layout.addSpacing(34)
-                main_layout.addWidget(self.emit_diffuse_cb)
-                main_layout.addSpacing(50)
-                main_layout.addWidget(self.emit_specular_cb)
+        if 'emitDiffuse' in self.column_widgets:
+            main_layout.addSpacing(34)
+            main_layout.addWidget(self.emit_diffuse_cb)
+        if 'emitSpecular' in self.column_widgets:
+            main_layout.addSpacing(50)
+            main_layout.addWidget(self.emit_specular_cb)
 
         main_layout.addStretch()
 
@@ -158,31 +599,45 @@ class LightItem(QtWidgets.QWidget):
         self.light_type_btn.clicked.connect(self.select_light)
         self.visibility_cb.toggled.connect(self.set_visibility)
 
-        light_type = self.get_light_type()
-        if light_type in self.SUPPORTED_TYPES:
+        if 'intensity' in self.column_widgets:
             self.intensity_dsb.valueChanged.connect(self.on_intensity_changed)
+        if 'color' in self.column_widgets:
             self.color_btn.color_changed.connect(self.set_color)
-
-            if light_type in self.EMIT_TYPES:
-                self.emit_diffuse_cb.toggled.connect(self.set_emit_diffuse)
-                self.emit_specular_cb.toggled.connect(self.set_emit_specular)
+        if 'emitDiffuse' in self.column_widgets:
+            self.emit_diffuse_cb.toggled.connect(self.set_emit_diffuse)
+        if 'emitSpecular' in self.column_widgets:
+            self.emit_specular_cb.toggled.connect(self.set_emit_specular)
 
     def update_values(self):
         self.light_type_btn.setIcon(self.get_light_type_icon())
-        self.visibility_cb.setChecked(self.is_visible())
         self.transform_name_label.setText(self.get_transform_name())
 
-        light_type = self.get_light_type()
-        if light_type in self.SUPPORTED_TYPES:
-            self.intensity_dsb.setValue(self.get_intensity())
-            self.color_btn.set_color(self.get_color())
+        for attribute in self.snapshot.plugs:
+            self.update_widget(attribute)
+
+    def update_widget(self, attribute):
+        value = self.snapshot.get_value(attribute)
+        if attribute in self.displayed_values and self.displayed_values[attribute] == value:
+            return
+
+        widget = self.column_widgets.get(attribute)
+        if widget is None:
+            return
 
-            if light_type in self.EMIT_TYPES:
-                self.emit_diffuse_cb.setChecked(self.emits_diffuse())
-                self.emit_specular_cb.setChecked(self.emits_specular())
+        # Updates coming from the scene must not be written back
+        widget.blockSignals(True)
+        if attribute == 'intensity':
+            widget.setValue(value)
+        elif attribute == 'color':
+            widget.set_color(self.to_qcolor(value))
+        else:
+            widget.setChecked(value)
+        widget.blockSignals(False)
+
+        self.displayed_values[attribute] = value
 
     def get_transform_name(self):
-        return cmds.listRelatives(self.shape_name, parent=True)[0]
+        return self.snapshot.transform_name
 
     def get_attr_value(self, name, attribute):
         return cmds.getAttr('{}.{}'.format(name, attribute))
@@ -191,91 +646,662 @@ class LightItem(QtWidgets.QWidget):
         cmds.setAttr('{}.{}'.format(name, attribute), *args)
 
     def get_light_type(self):
-        return cmds.objectType(self.shape_name)
+        return self.snapshot.light_type
 
     def get_light_type_icon(self):
-        light_type = self.get_light_type()
-
-        icon = QtGui.QIcon()
-        if light_type == 'ambientLight':
-            icon = QtGui.QIcon(':ambientLight.svg')
-        elif light_type == 'directionalLight':
-            icon = QtGui.QIcon(':directionalLight.svg')
-        elif light_type == 'pointLight':
-            icon = QtGui.QIcon(':pointLight.svg')
-        elif light_type == 'spotLight':
-            icon = QtGui.QIcon(':spotLight.svg')
-        else:
-            icon = QtGui.QIcon(':Light.png')
-
-        return icon
+        return self.plan.get_icon()
 
     def is_visible(self):
-        transform_name = self.get_transform_name()
-        return self.get_attr_value(transform_name, 'visibility')
+        return self.snapshot.get_value('visibility')
 
     def get_intensity(self):
-        return self.get_attr_value(self.shape_name, 'intensity')
+        return self.snapshot.get_value('intensity')
 
     def get_color(self):
-        temp_color = self.get_attr_value(self.shape_name, 'color')[0]
-        return QtGui.QColor(temp_color[0]*255, temp_color[1]*255, temp_color[2]*255)
+        return self.to_qcolor(self.snapshot.get_value('color'))
+
+    def to_qcolor(self, value):
+        return QtGui.QColor.fromRgbF(*[min(max(channel, 0.0), 1.0) for channel in value])
 
     def emits_diffuse(self):
-        return self.get_attr_value(self.shape_name, 'emitDiffuse')
+        return self.snapshot.get_value('emitDiffuse')
 
     def emits_specular(self):
-        return self.get_attr_value(self.shape_name, 'emitSpecular')
+        return self.snapshot.get_value('emitSpecular')
 
     def select_light(self):
         cmds.select(self.get_transform_name())
 
+    def set_column_value(self, attribute, *args):
+        cmds.setAttr(self.snapshot.get_attribute_path(attribute), *args)
+
     def set_visibility(self, checked):
-        self.set_attr_value(self.get_transform_name(), 'visibility', checked)
+        self.set_column_value('visibility', checked)
 
     def on_intensity_changed(self):
-        self.set_attr_value(self.shape_name, 'intensity', self.intensity_dsb.value())
+        self.set_column_value('intensity', self.intensity_dsb.value())
 
     def set_color(self, color):
-        self.set_attr_value(self.shape_name, 'color', color.redF(), color.greenF(), color.blueF())
+        self.set_column_value('color', color.redF(), color.greenF(), color.blueF())
 
     def set_emit_diffuse(self, checked):
-        self.set_attr_value(self.shape_name, 'emitDiffuse', checked)
+        self.set_column_value('emitDiffuse', checked)
 
     def set_emit_specular(self, checked):
-        self.set_attr_value(self.shape_name, 'emitSpecular', checked)
+        self.set_column_value('emitSpecular', checked)
+
+    def on_attribute_changed(self, attribute):
+        if self.snapshot.refresh(attribute):
+            self.update_widget(attribute)
 
     def on_node_deleted(self):
-        self.node_deleted.emit(self.shape_name)
+        self.node_deleted.emit(self.uuid)
 
     def on_name_changed(self):
-        self.shape_name = cmds.ls(self.uuid)[0]
-        self.update_values()
+        self.snapshot.refresh_names()
+        self.shape_name = self.snapshot.shape_name
+        self.transform_name_label.setText(self.get_transform_name())
 
-    def create_script_jobs(self):
-        self.delete_script_jobs()
+    def register_callbacks(self):
+        self.dispatcher.register(self)
 
-        self.add_attribute_change_script_job(self.get_transform_name(), 'visibility')
-        light_type = self.get_light_type()
-        if light_type in self.SUPPORTED_TYPES:
-            self.add_attribute_change_script_job(self.shape_name, 'color')
-            self.add_attribute_change_script_job(self.shape_name, 'intensity')
+    def unregister_callbacks(self):
+        self.dispatcher.unregister(self.uuid)
 
-            if light_type in self.EMIT_TYPES:
-                self.add_attribute_change_script_job(self.shape_name, 'emitDiffuse')
-                self.add_attribute_change_script_job(self.shape_name, 'emitSpecular')
 
-        self.script_jobs.append(cmds.scriptJob(nodeDeleted=(self.shape_name, partial(self.on_node_deleted))))
-        self.script_jobs.append(cmds.scriptJob(nodeNameChanged=(self.shape_name, partial(self.on_name_changed))))
+class LightModelRow(object):
+    '''
+    Adapter that lets the dispatcher route callbacks to one row of a LightTableModel
+    '''
 
-    def add_attribute_change_script_job(self, name, attribute):
-        self.script_jobs.append(cmds.scriptJob(attributeChange=('{}.{}'.format(name, attribute), partial(self.update_values))))
+    def __init__(self, model, snapshot):
+        self.model = model
+        self.snapshot = snapshot
+        self.uuid = snapshot.uuid
+
+    @property
+    def shape_name(self):
+        return self.snapshot.shape_name
+
+    def on_attribute_changed(self, attribute):
+        if self.snapshot.refresh(attribute):
+            self.model.on_row_attribute_changed(self.uuid, attribute)
+
+    def on_node_deleted(self):
+        self.model.remove_light(self.uuid)
+
+    def on_name_changed(self):
+        self.snapshot.refresh_names()
+        self.model.on_row_name_changed(self.uuid)
 
-    def delete_script_jobs(self):
-        for job_number in self.script_jobs:
-            cmds.evalDeferred('if cmds.scriptJob(exists={0}):\tcmds.scriptJob(kill={0}, force=True)'.format(job_number))
 
-        self.script_jobs = []
+class LightTableModel(QtCore.QAbstractTableModel):
+    '''
+    Table of the scene lights. Rows only hold a name and a UUID until the view
+    asks for their data, the snapshot and callbacks are created on first access.
+    Only the most recently used rows stay registered, the others are released.
+    '''
+
+    MAX_REGISTERED_ROWS = 200
+
+    COLUMN_NAME = 0
+    COLUMN_VISIBILITY = 1
+    COLUMN_INTENSITY = 2
+    COLUMN_COLOR = 3
+    COLUMN_EMIT_DIFFUSE = 4
+    COLUMN_EMIT_SPECULAR = 5
+
+    HEADERS = ['Light', 'Visible', 'Intensity', 'Color', 'Emit Diffuse', 'Emit Spec']
+
+    COLUMN_ATTRIBUTES = {
+        COLUMN_VISIBILITY: 'visibility',
+        COLUMN_INTENSITY: 'intensity',
+        COLUMN_COLOR: 'color',
+        COLUMN_EMIT_DIFFUSE: 'emitDiffuse',
+        COLUMN_EMIT_SPECULAR: 'emitSpecular',
+    }
+
+    CHECK_COLUMNS = [COLUMN_VISIBILITY, COLUMN_EMIT_DIFFUSE, COLUMN_EMIT_SPECULAR]
+
+    def __init__(self, dispatcher, parent=None):
+        super(LightTableModel, self).__init__(parent)
+
+        self.dispatcher = dispatcher
+
+        self.light_names = []
+        self.uuids = []
+        self.row_indices = {}
+        # {uuid: LightModelRow}, least recently used first
+        self.rows = collections.OrderedDict()
+
+        self.selection_model = None
+        self.relative_edit = False
+
+    def set_selection_model(self, selection_model):
+        self.selection_model = selection_model
+
+    def set_relative_edit(self, relative_edit):
+        self.relative_edit = relative_edit
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.uuids)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+        column = index.column()
+        if column == self.COLUMN_NAME:
+            return flags
+
+        if not self.is_column_supported(index.row(), column):
+            return QtCore.Qt.ItemIsSelectable
+
+        if column in self.CHECK_COLUMNS:
+            flags |= QtCore.Qt.ItemIsUserCheckable
+        else:
+            flags |= QtCore.Qt.ItemIsEditable
+
+        return flags
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        snapshot = self.get_snapshot(index.row())
+        if snapshot is None:
+            return None
+
+        column = index.column()
+        if column == self.COLUMN_NAME:
+            if role == QtCore.Qt.DisplayRole:
+                return snapshot.transform_name
+            elif role == QtCore.Qt.DecorationRole:
+                return snapshot.plan.get_icon()
+            elif role == QtCore.Qt.ToolTipRole:
+                return '{} ({})'.format(snapshot.shape_name, snapshot.light_type)
+            return None
+
+        if not self.is_column_supported(index.row(), column):
+            return None
+
+        value = snapshot.get_value(self.COLUMN_ATTRIBUTES[column])
+        if column in self.CHECK_COLUMNS:
+            if role == QtCore.Qt.CheckStateRole:
+                return QtCore.Qt.Checked if value else QtCore.Qt.Unchecked
+        elif column == self.COLUMN_INTENSITY:
+            if role == QtCore.Qt.DisplayRole:
+                return '{:.3f}'.format(value)
+            elif role == QtCore.Qt.EditRole:
+                return value
+        elif column == self.COLUMN_COLOR:
+            if role in [QtCore.Qt.EditRole, QtCore.Qt.DecorationRole]:
+                return self.to_qcolor(value)
+
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or not index.flags() & (QtCore.Qt.ItemIsEditable | QtCore.Qt.ItemIsUserCheckable):
+            return False
+
+        column = index.column()
+        if column in self.CHECK_COLUMNS:
+            if role != QtCore.Qt.CheckStateRole:
+                return False
+            value = value == QtCore.Qt.Checked
+        elif role != QtCore.Qt.EditRole:
+            return False
+        elif column == self.COLUMN_COLOR:
+            color = QtGui.QColor(value)
+            value = (color.redF(), color.greenF(), color.blueF())
+        else:
+            value = float(value)
+
+        # Editing a selected row applies the value to every selected light
+        rows = self.get_edit_rows(index.row(), column)
+        if self.relative_edit:
+            previous_value = self.get_snapshot(index.row()).get_value(self.COLUMN_ATTRIBUTES[column])
+            values = [self.get_relative_value(row, column, value, previous_value) for row in rows]
+        else:
+            values = [value] * len(rows)
+
+        self.set_column_values(rows, column, values)
+        return True
+
+    def get_edit_rows(self, row, column):
+        if self.selection_model is None or not self.selection_model.isRowSelected(row, QtCore.QModelIndex()):
+            return [row]
+
+        rows = sorted(set([index.row() for index in self.selection_model.selectedRows()]))
+        return [selected_row for selected_row in rows if self.is_column_supported(selected_row, column)]
+
+    def get_relative_value(self, row, column, value, previous_value):
+        '''
+        Offset the current value of a row by the change made on the edited row, flags are toggled
+        '''
+        current_value = self.get_snapshot(row).get_value(self.COLUMN_ATTRIBUTES[column])
+        if column in self.CHECK_COLUMNS:
+            return not current_value
+        elif column == self.COLUMN_COLOR:
+            return tuple([max(current + new - previous, 0.0) for current, new, previous in zip(current_value, value, previous_value)])
+        return max(current_value + value - previous_value, 0.0)
+
+    def set_column_values(self, rows, column, values):
+        '''
+        Write one value per row in a single undo chunk, callbacks are dispatched once the batch is done
+        '''
+        attribute = self.COLUMN_ATTRIBUTES[column]
+
+        cmds.undoInfo(openChunk=True, chunkName='lightPanelEdit')
+        self.dispatcher.hold()
+        try:
+            for row, value in zip(rows, values):
+                snapshot = self.get_snapshot(row)
+                if snapshot.get_value(attribute) == value:
+                    continue
+
+                if isinstance(value, tuple):
+                    self.set_attr_value(snapshot.get_attribute_path(attribute), *value)
+                else:
+                    self.set_attr_value(snapshot.get_attribute_path(attribute), value)
+        finally:
+            # The attribute callbacks refresh the snapshots and emit dataChanged
+            self.dispatcher.release()
+            cmds.undoInfo(closeChunk=True)
+
+        # Rows released during the batch are read again from the scene
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), column), self.index(max(rows), column))
+
+    def set_attr_value(self, attribute_path, *args):
+        cmds.setAttr(attribute_path, *args)
+
+    def is_column_supported(self, row, column):
+        snapshot = self.get_snapshot(row)
+        return snapshot is not None and snapshot.has_attribute(self.COLUMN_ATTRIBUTES[column])
+
+    def get_uuid(self, row):
+        return self.uuids[row]
+
+    def get_snapshot(self, row):
+        '''
+        Return the snapshot of a row, creating it and its callbacks the first time it is needed
+        '''
+        uuid = self.uuids[row]
+        model_row = self.rows.pop(uuid, None)
+        if model_row is not None:
+            # Moved to the most recently used end
+            self.rows[uuid] = model_row
+        else:
+            try:
+                snapshot = LightAttributeSnapshot(self.light_names[row])
+            except RuntimeError:
+                # The node was renamed since the last refresh
+                names = cmds.ls(uuid)
+                if not names:
+                    return None
+                self.light_names[row] = names[0]
+                snapshot = LightAttributeSnapshot(names[0])
+
+            model_row = LightModelRow(self, snapshot)
+            self.rows[uuid] = model_row
+            self.dispatcher.register(model_row)
+            self.release_rows()
+
+        return model_row.snapshot
+
+    def release_rows(self):
+        # Rows scrolled out of view are the least recently used, their callbacks are removed
+        while len(self.rows) > self.MAX_REGISTERED_ROWS:
+            uuid, model_row = self.rows.popitem(last=False)
+            self.dispatcher.unregister(uuid)
+
+    def to_qcolor(self, value):
+        return QtGui.QColor.fromRgbF(*[min(max(channel, 0.0), 1.0) for channel in value])
+
+    def refresh_lights(self, light_names, uuids):
+        '''
+        Diff the scene lights against the rows by UUID, appended lights are inserted
+        and anything else that moved resets the model
+        '''
+        if uuids == self.uuids:
+            self.light_names = list(light_names)
+            return
+
+        # Removed rows are taken out in contiguous ranges, from the end
+        uuid_set = set(uuids)
+        last = None
+        for row in reversed(range(len(self.uuids))):
+            if self.uuids[row] not in uuid_set:
+                if last is None:
+                    last = row
+            elif last is not None:
+                self.remove_rows(row + 1, last)
+                last = None
+        if last is not None:
+            self.remove_rows(0, last)
+
+        count = len(self.uuids)
+        if uuids[:count] == self.uuids:
+            self.light_names[:count] = light_names[:count]
+            if len(uuids) > count:
+                self.beginInsertRows(QtCore.QModelIndex(), count, len(uuids) - 1)
+                self.light_names = list(light_names)
+                self.uuids = list(uuids)
+                self.update_row_indices(count)
+                self.endInsertRows()
+        else:
+            self.beginResetModel()
+            self.light_names = list(light_names)
+            self.uuids = list(uuids)
+            self.update_row_indices()
+            self.endResetModel()
+
+    def remove_light(self, uuid):
+        row = self.row_indices.get(uuid)
+        if row is not None:
+            self.remove_row(row)
+
+    def remove_row(self, row):
+        self.remove_rows(row, row)
+
+    def remove_rows(self, first, last):
+        for uuid in self.uuids[first:last + 1]:
+            self.row_indices.pop(uuid, None)
+            if uuid in self.rows:
+                self.dispatcher.unregister(uuid)
+                del self.rows[uuid]
+
+        self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+        del self.light_names[first:last + 1]
+        del self.uuids[first:last + 1]
+        self.update_row_indices(first)
+        self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        for uuid in self.rows:
+            self.dispatcher.unregister(uuid)
+
+        self.light_names = []
+        self.uuids = []
+        self.row_indices = {}
+        self.rows = collections.OrderedDict()
+        self.endResetModel()
+
+    def update_row_indices(self, first=0):
+        # Rows before first keep their index
+        if not first:
+            self.row_indices = {}
+        for row in range(first, len(self.uuids)):
+            self.row_indices[self.uuids[row]] = row
+
+    def on_row_attribute_changed(self, uuid, attribute):
+        row = self.row_indices.get(uuid)
+        if row is None:
+            return
+
+        for column, column_attribute in self.COLUMN_ATTRIBUTES.items():
+            if column_attribute == attribute:
+                index = self.index(row, column)
+                self.dataChanged.emit(index, index)
+
+    def on_row_name_changed(self, uuid):
+        row = self.row_indices.get(uuid)
+        if row is None:
+            return
+
+        model_row = self.rows.get(uuid)
+        if model_row:
+            self.light_names[row] = model_row.shape_name
+
+        index = self.index(row, self.COLUMN_NAME)
+        self.dataChanged.emit(index, index)
+
+
+class LightIntensityDelegate(QtWidgets.QStyledItemDelegate):
+
+    def createEditor(self, parent, option, index):
+        editor = QtWidgets.QDoubleSpinBox(parent)
+        editor.setRange(0.0, 100.0)
+        editor.setDecimals(3)
+        editor.setSingleStep(0.1)
+        editor.setButtonSymbols(QtWidgets.QAbstractSpinBox.NoButtons)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setValue(index.data(QtCore.Qt.EditRole))
+
+    def setModelData(self, editor, model, index):
+        if editor.value() != index.data(QtCore.Qt.EditRole):
+            model.setData(index, editor.value(), QtCore.Qt.EditRole)
+
+
+class LightColorDelegate(QtWidgets.QStyledItemDelegate):
+    '''
+    Paint the color as a swatch, the color dialog only opens on double click
+    '''
+
+    def paint(self, painter, option, index):
+        if option.state & QtWidgets.QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+
+        color = index.data(QtCore.Qt.EditRole)
+        if color is None:
+            return
+
+        rect = option.rect.adjusted(4, 4, -5, -5)
+        painter.save()
+        painter.fillRect(rect, color)
+        painter.setPen(QtCore.Qt.black)
+        painter.drawRect(rect)
+        painter.restore()
+
+    def createEditor(self, parent, option, index):
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QtCore.QEvent.MouseButtonDblClick and index.flags() & QtCore.Qt.ItemIsEditable:
+            current_color = index.data(QtCore.Qt.EditRole)
+            color = QtWidgets.QColorDialog.getColor(current_color, self.parent(), 'Light Color')
+            if color.isValid() and color != current_color:
+                model.setData(index, color, QtCore.Qt.EditRole)
+            return True
+
+        return super(LightColorDelegate, self).editorEvent(event, model, option, index)
+
+
+class LightTableView(QtWidgets.QTableView):
+
+    def selectionCommand(self, index, event=None):
+        # Clicking an editable cell of a selected row keeps the selection, so the edit applies to all selected lights
+        if event is not None and event.type() in [QtCore.QEvent.MouseButtonPress, QtCore.QEvent.MouseButtonRelease]:
+            if index.isValid() and index.flags() & (QtCore.Qt.ItemIsEditable | QtCore.Qt.ItemIsUserCheckable):
+                if not event.modifiers() & (QtCore.Qt.ShiftModifier | QtCore.Qt.ControlModifier):
+                    if self.selectionModel().isRowSelected(index.row(), QtCore.QModelIndex()):
+                        return QtCore.QItemSelectionModel.NoUpdate
+
+        return super(LightTableView, self).selectionCommand(index, event)
+
+
+class LightLinkMatrixModel(QtCore.QAbstractTableModel):
+    '''
+    Objects by lights linking matrix. Links are stored sparsely per object row
+    and queried the first time a row is painted, one lightlink query per row.
+    '''
+
+    OBJECT_TYPES = ['mesh', 'nurbsSurface', 'subdiv']
+
+    def __init__(self, parent=None):
+        super(LightLinkMatrixModel, self).__init__(parent)
+
+        self.objects = []
+        self.lights = []
+        self.light_columns = {}
+
+        # {row: set of linked light columns}, only rows that were displayed
+        self.row_links = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.objects)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.lights)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole:
+            if orientation == QtCore.Qt.Horizontal:
+                return self.get_short_name(self.lights[section])
+            return self.get_short_name(self.objects[section])
+        elif role == QtCore.Qt.ToolTipRole:
+            if orientation == QtCore.Qt.Horizontal:
+                return self.lights[section]
+            return self.objects[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsUserCheckable
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.CheckStateRole:
+            return None
+
+        links = self.get_row_links(index.row())
+        return QtCore.Qt.Checked if index.column() in links else QtCore.Qt.Unchecked
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or role != QtCore.Qt.CheckStateRole:
+            return False
+
+        row = index.row()
+        column = index.column()
+
+        links = self.get_row_links(row)
+        linked = value == QtCore.Qt.Checked
+        if linked == (column in links):
+            return False
+
+        # Only the toggled light/object pair is edited
+        if linked:
+            cmds.lightlink(make=True, light=self.lights[column], object=self.objects[row])
+            links.add(column)
+        else:
+            cmds.lightlink(b=True, light=self.lights[column], object=self.objects[row])
+            links.discard(column)
+
+        self.dataChanged.emit(index, index)
+        return True
+
+    def get_short_name(self, name):
+        return name.split('|')[-1]
+
+    def get_row_links(self, row):
+        links = self.row_links.get(row)
+        if links is None:
+            links = self.query_row_links(row)
+            self.row_links[row] = links
+        return links
+
+    def query_row_links(self, row):
+        lights = cmds.lightlink(query=True, object=self.objects[row]) or []
+        lights = cmds.ls(lights, long=True) if lights else []
+
+        links = set()
+        for light in lights:
+            column = self.light_columns.get(light)
+            if column is not None:
+                links.add(column)
+        return links
+
+    def refresh(self):
+        '''
+        Reload the objects and lights, link data is dropped and queried again on demand
+        '''
+        self.beginResetModel()
+
+        self.objects = cmds.listRelatives(cmds.ls(type=self.OBJECT_TYPES, noIntermediate=True, long=True) or [], parent=True, fullPath=True) or []
+        self.objects = sorted(set(self.objects))
+
+        self.lights = []
+        self.light_columns = {}
+        for light_shape in cmds.ls(type=get_scene_light_types(), long=True) or []:
+            light_transform = cmds.listRelatives(light_shape, parent=True, fullPath=True)[0]
+
+            # The query can return either the transform or the shape of a light
+            self.light_columns[light_transform] = len(self.lights)
+            self.light_columns[light_shape] = len(self.lights)
+            self.lights.append(light_transform)
+
+        self.row_links = {}
+
+        self.endResetModel()
+
+
+class LightLinkDialog(QtWidgets.QDialog):
+
+    WINDOW_TITLE = 'Light Linking'
+
+    def __init__(self, parent=None):
+        super(LightLinkDialog, self).__init__(parent)
+
+        self.setWindowTitle(self.WINDOW_TITLE)
+        self.setMinimumSize(600, 400)
+
+        self.create_widgets()
+        self.create_layout()
+        self.create_connections()
+
+    def create_widgets(self):
+        self.link_model = LightLinkMatrixModel(self)
+
+        self.link_table_view = QtWidgets.QTableView()
+        self.link_table_view.setModel(self.link_model)
+        self.link_table_view.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        # Fixed section sizes keep the view from measuring cells it does not show
+        self.link_table_view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.link_table_view.verticalHeader().setDefaultSectionSize(22)
+        self.link_table_view.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.link_table_view.horizontalHeader().setDefaultSectionSize(80)
+
+        self.refresh_btn = QtWidgets.QPushButton('Refresh')
+
+    def create_layout(self):
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(self.refresh_btn)
+
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.setContentsMargins(2, 2, 2, 2)
+        main_layout.addWidget(self.link_table_view)
+        main_layout.addLayout(button_layout)
+
+    def create_connections(self):
+        self.refresh_btn.clicked.connect(self.link_model.refresh)
+
+    def showEvent(self, e):
+        super(LightLinkDialog, self).showEvent(e)
+
+        self.link_model.refresh()
 
 
 class LightPanel(QtWidgets.QDialog):
@@ -307,7 +1333,15 @@ class LightPanel(QtWidgets.QDialog):
         self.geometry = None
 
         self.light_items = []
-        self.script_jobs = []
+        self.light_items_by_uuid = {}
+
+        self.refresh_pending = False
+
+        self.rig_snapshots = {}
+
+        self.light_link_dialog = None
+
+        self.dispatcher = LightAttributeDispatcher(self)
 
         self.create_widgets()
         self.create_layout()
@@ -315,9 +1349,47 @@ class LightPanel(QtWidgets.QDialog):
 
     def create_widgets(self):
         self.refresh_btn = QtWidgets.QPushButton('Refresh Lights')
+        self.light_link_btn = QtWidgets.QPushButton('Light Linking...')
+
+        self.callback_count_label = QtWidgets.QLabel()
+
+        self.table_view_cb = QtWidgets.QCheckBox('Table View')
+        self.table_view_cb.setChecked(True)
+
+        self.light_model = LightTableModel(self.dispatcher, self)
+
+        self.light_table_view = LightTableView()
+        self.light_table_view.setModel(self.light_model)
+        self.light_table_view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.light_table_view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.light_table_view.setEditTriggers(QtWidgets.QAbstractItemView.DoubleClicked | QtWidgets.QAbstractItemView.EditKeyPressed)
+        self.light_table_view.verticalHeader().hide()
+        # Fixed row heights let the view skip measuring rows it does not show
+        self.light_table_view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.light_table_view.verticalHeader().setDefaultSectionSize(22)
+        self.light_table_view.horizontalHeader().setStretchLastSection(True)
+        self.light_table_view.setColumnWidth(LightTableModel.COLUMN_NAME, 140)
+        self.light_table_view.setItemDelegateForColumn(LightTableModel.COLUMN_INTENSITY, LightIntensityDelegate(self.light_table_view))
+        self.light_table_view.setItemDelegateForColumn(LightTableModel.COLUMN_COLOR, LightColorDelegate(self.light_table_view))
+
+        self.light_model.set_selection_model(self.light_table_view.selectionModel())
+
+        self.edit_mode_cmb = QtWidgets.QComboBox()
+        self.edit_mode_cmb.addItems(['Absolute', 'Relative'])
+        self.edit_mode_cmb.setToolTip('How an edit is applied to the other selected lights')
+
+        self.snapshot_cmb = QtWidgets.QComboBox()
+        self.snapshot_cmb.setMinimumWidth(120)
+        self.store_snapshot_btn = QtWidgets.QPushButton('Store')
+        self.restore_snapshot_btn = QtWidgets.QPushButton('Restore')
+        self.save_snapshot_btn = QtWidgets.QPushButton('Save...')
+        self.load_snapshot_btn = QtWidgets.QPushButton('Load...')
 
     def create_layout(self):
-        header_layout = QtWidgets.QHBoxLayout()
+        self.header_wdg = QtWidgets.QWidget()
+
+        header_layout = QtWidgets.QHBoxLayout(self.header_wdg)
+        header_layout.setContentsMargins(0, 0, 0, 0)
         header_layout.addSpacing(100)
         header_layout.addWidget(QtWidgets.QLabel('Light'))
         header_layout.addSpacing(50)
@@ -337,42 +1409,206 @@ class LightPanel(QtWidgets.QDialog):
         self.light_layout.setSpacing(3)
         self.light_layout.setAlignment(QtCore.Qt.AlignTop)
 
-        light_list_scroll_area = QtWidgets.QScrollArea()
-        light_list_scroll_area.setWidgetResizable(True)
-        light_list_scroll_area.setWidget(light_list_wdg)
+        self.light_list_scroll_area = QtWidgets.QScrollArea()
+        self.light_list_scroll_area.setWidgetResizable(True)
+        self.light_list_scroll_area.setWidget(light_list_wdg)
+
+        snapshot_layout = QtWidgets.QHBoxLayout()
+        snapshot_layout.addWidget(QtWidgets.QLabel('Snapshot:'))
+        snapshot_layout.addWidget(self.snapshot_cmb)
+        snapshot_layout.addWidget(self.store_snapshot_btn)
+        snapshot_layout.addWidget(self.restore_snapshot_btn)
+        snapshot_layout.addStretch()
+        snapshot_layout.addWidget(self.save_snapshot_btn)
+        snapshot_layout.addWidget(self.load_snapshot_btn)
 
         button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addWidget(self.callback_count_label)
+        button_layout.addWidget(self.table_view_cb)
+        button_layout.addWidget(self.edit_mode_cmb)
         button_layout.addStretch()
+        button_layout.addWidget(self.light_link_btn)
         button_layout.addWidget(self.refresh_btn)
 
         main_layout = QtWidgets.QVBoxLayout(self)
         main_layout.setContentsMargins(2, 2, 2, 2)
-        main_layout.addLayout(header_layout)
-        main_layout.addWidget(light_list_scroll_area)
+        main_layout.addWidget(self.header_wdg)
+        main_layout.addWidget(self.light_list_scroll_area)
+        main_layout.addWidget(self.light_table_view)
+        main_layout.addLayout(snapshot_layout)
         main_layout.addLayout(button_layout)
 
+        self.update_view_mode()
+
     def create_connections(self):
         self.refresh_btn.clicked.connect(self.refresh_lights)
+        self.light_link_btn.clicked.connect(self.show_light_link_dialog)
+        self.dispatcher.callback_count_changed.connect(self.update_callback_count_label)
+        self.dispatcher.light_added.connect(self.on_dag_object_created)
+        self.dispatcher.light_removed.connect(self.on_dag_object_created)
+        self.dispatcher.scene_view.scene_reset.connect(self.on_dag_object_created)
+
+        self.table_view_cb.toggled.connect(self.on_view_mode_changed)
+        self.light_table_view.doubleClicked.connect(self.on_table_double_clicked)
+        self.edit_mode_cmb.currentIndexChanged.connect(self.on_edit_mode_changed)
+
+        self.store_snapshot_btn.clicked.connect(self.store_rig_snapshot)
+        self.restore_snapshot_btn.clicked.connect(self.restore_rig_snapshot)
+        self.save_snapshot_btn.clicked.connect(self.save_rig_snapshot)
+        self.load_snapshot_btn.clicked.connect(self.load_rig_snapshot)
+
+    def update_callback_count_label(self, *args):
+        callback_count = self.dispatcher.get_callback_count()
+        self.callback_count_label.setText('Callbacks: {}'.format(callback_count))
 
     def get_lights_in_scene(self):
-        return cmds.ls(type='light')
+        '''
+        Return (uuid, path, node type) of the scene lights, read from the shared scene model
+        '''
+        return self.dispatcher.scene_view.get_nodes()
 
-    def refresh_lights(self):
+    def is_table_view(self):
+        return self.table_view_cb.isChecked()
+
+    def update_view_mode(self):
+        table_view = self.is_table_view()
+
+        self.header_wdg.setVisible(not table_view)
+        self.light_list_scroll_area.setVisible(not table_view)
+        self.light_table_view.setVisible(table_view)
+        self.edit_mode_cmb.setVisible(table_view)
+
+    def on_view_mode_changed(self):
         self.clear_lights()
+        self.update_view_mode()
+        self.refresh_lights()
+
+    def show_light_link_dialog(self):
+        if not self.light_link_dialog:
+            self.light_link_dialog = LightLinkDialog(self)
+
+        if self.light_link_dialog.isHidden():
+            self.light_link_dialog.show()
+        else:
+            self.light_link_dialog.raise_()
+            self.light_link_dialog.activateWindow()
+
+    def add_rig_snapshot(self, name, rig_snapshot):
+        if name not in self.rig_snapshots:
+            self.snapshot_cmb.addItem(name)
+        self.rig_snapshots[name] = rig_snapshot
+        self.snapshot_cmb.setCurrentText(name)
+
+    def get_current_rig_snapshot(self):
+        return self.rig_snapshots.get(self.snapshot_cmb.currentText())
+
+    def store_rig_snapshot(self):
+        default_name = 'Snapshot {}'.format(len(self.rig_snapshots) + 1)
+        name, ok = QtWidgets.QInputDialog.getText(self, 'Store Snapshot', 'Name:', text=default_name)
+        if not ok or not name:
+            return
+
+        start_time = time.time()
+        rig_snapshot = LightRigSnapshot.capture()
+        self.add_rig_snapshot(name, rig_snapshot)
+
+        print('Stored {} lights in {:.3f}s'.format(rig_snapshot.get_light_count(), time.time() - start_time))
+
+    def restore_rig_snapshot(self):
+        rig_snapshot = self.get_current_rig_snapshot()
+        if not rig_snapshot:
+            return
 
-        scene_lights = self.get_lights_in_scene()
-        for light in scene_lights:
-            light_item = LightItem(light)
-            light_item.node_deleted.connect(self.on_node_deleted)
+        start_time = time.time()
+        value_count, skipped_plugs = rig_snapshot.restore(self.dispatcher)
 
-            self.light_layout.addWidget(light_item)
-            self.light_items.append(light_item)
+        print('Restored {} values in {:.3f}s'.format(value_count, time.time() - start_time))
+        if skipped_plugs:
+            cmds.warning('Skipped {} locked or connected plugs: {}'.format(len(skipped_plugs), ', '.join(skipped_plugs)))
+
+    def save_rig_snapshot(self):
+        rig_snapshot = self.get_current_rig_snapshot()
+        if not rig_snapshot:
+            return
+
+        file_filter = 'Light Rig (*{})'.format(LightRigSnapshot.FILE_EXT)
+        file_path, selected_filter = QtWidgets.QFileDialog.getSaveFileName(self, 'Save Snapshot', '', file_filter)
+        if file_path:
+            rig_snapshot.save(file_path)
+
+    def load_rig_snapshot(self):
+        file_filter = 'Light Rig (*{})'.format(LightRigSnapshot.FILE_EXT)
+        file_path, selected_filter = QtWidgets.QFileDialog.getOpenFileName(self, 'Load Snapshot', '', file_filter)
+        if not file_path:
+            return
+
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        self.add_rig_snapshot(name, LightRigSnapshot.load(file_path))
+
+    def on_edit_mode_changed(self, index):
+        self.light_model.set_relative_edit(self.edit_mode_cmb.currentText() == 'Relative')
+
+    def on_table_double_clicked(self, index):
+        if index.column() == LightTableModel.COLUMN_NAME:
+            cmds.select(self.light_model.get_snapshot(index.row()).transform_name)
+
+    def refresh_lights(self):
+        '''
+        Diff the scene lights against the rows by UUID, only new, deleted or moved rows are touched
+        '''
+        scene_nodes = self.get_lights_in_scene()
+        scene_uuids = [uuid for uuid, path, node_type in scene_nodes]
+        scene_lights = [path for uuid, path, node_type in scene_nodes]
+
+        if self.is_table_view():
+            self.light_model.refresh_lights(scene_lights, scene_uuids)
+            return
+
+        scene_uuid_set = set(scene_uuids)
+        for light_item in list(self.light_items):
+            if light_item.uuid not in scene_uuid_set:
+                self.remove_light_item(light_item)
+
+        light_items = []
+        for index, (light, uuid) in enumerate(zip(scene_lights, scene_uuids)):
+            light_item = self.light_items_by_uuid.get(uuid)
+            if light_item is None:
+                light_item = self.create_light_item(light)
+                self.light_layout.insertWidget(index, light_item)
+            elif self.light_layout.indexOf(light_item) != index:
+                self.light_layout.removeWidget(light_item)
+                self.light_layout.insertWidget(index, light_item)
+
+            light_items.append(light_item)
+
+        self.light_items = light_items
+
+    def create_light_item(self, light):
+        light_item = LightItem(light, self.dispatcher)
+        light_item.node_deleted.connect(self.on_node_deleted)
+
+        self.light_items_by_uuid[light_item.uuid] = light_item
+
+        return light_item
+
+    def remove_light_item(self, light_item):
+        light_item.unregister_callbacks()
+
+        self.light_items_by_uuid.pop(light_item.uuid, None)
+        if light_item in self.light_items:
+            self.light_items.remove(light_item)
+
+        self.light_layout.removeWidget(light_item)
+        light_item.deleteLater()
 
     def clear_lights(self):
+        self.light_model.clear()
+
         for light in self.light_items:
-            light.delete_script_jobs()
+            light.unregister_callbacks()
 
         self.light_items = []
+        self.light_items_by_uuid = {}
 
         while self.light_layout.count() > 0:
             light_item = self.light_layout.takeAt(0)
@@ -380,27 +1616,35 @@ class LightPanel(QtWidgets.QDialog):
                 light_item.widget().deleteLater()
 
     def create_script_jobs(self):
-        self.script_jobs.append(cmds.scriptJob(event=['DagObjectCreated', partial(self.on_dag_object_created)]))
-        self.script_jobs.append(cmds.scriptJob(event=['Undo', partial(self.on_undo)]))
+        # Undo restoring or removing lights reaches the panel through the scene model callbacks
+        self.dispatcher.start()
+        self.update_callback_count_label()
 
     def delete_script_jobs(self):
-        for job_number in self.script_jobs:
-            cmds.scriptJob(kill=job_number)
+        self.dispatcher.stop()
+        self.update_callback_count_label()
 
-        self.script_jobs = []
+    def schedule_refresh(self):
+        # Coalesce every scene change into a single refresh once Maya is idle
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            QtCore.QTimer.singleShot(0, self.process_scene_changes)
 
-    def on_dag_object_created(self):
-        if len(cmds.ls(type='light')) != len(self.light_items):
-            print('New light created...')
-            self.refresh_lights()
+    def process_scene_changes(self):
+        if not self.refresh_pending:
+            return
 
-    def on_undo(self):
-        if len(cmds.ls(type='light')) != len(self.light_items):
-            print('Undo light created...')
+        self.refresh_pending = False
+        if self.isVisible():
             self.refresh_lights()
 
-    def on_node_deleted(self):
-        self.refresh_lights()
+    def on_dag_object_created(self):
+        self.schedule_refresh()
+
+    def on_node_deleted(self, uuid):
+        light_item = self.light_items_by_uuid.get(uuid)
+        if light_item:
+            self.remove_light_item(light_item)
 
     def showEvent(self, e):
         super(LightPanel, self).showEvent(e)
@@ -417,6 +1661,7 @@ class LightPanel(QtWidgets.QDialog):
 
             self.geometry = self.saveGeometry()
 
+        self.refresh_pending = False
         self.delete_script_jobs()
         self.clear_lights()
 
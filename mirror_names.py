@@ -0,0 +1,28 @@
+import re
+
+
+MIRROR_TOKENS = [('L', 'R'), ('l', 'r'), ('Left', 'Right'), ('left', 'right')]
+# Side tokens are whole '_' separated components, 'Left'/'Right' may also start or end a camelCase name
+MIRROR_PATTERN = re.compile(r'(?<![^_])(L|R|l|r|left|right)(?![^_])|(?<![A-Za-z])(left|right)(?=[A-Z0-9])'
+                            r'|(?<![A-Z])(Left|Right)(?![a-z])')
+
+
+def swap_mirror_token(match):
+    token = match.group(0)
+    for left_token, right_token in MIRROR_TOKENS:
+        if token == left_token:
+            return right_token
+        if token == right_token:
+            return left_token
+    return token
+
+def get_mirror_name(node):
+    '''
+    Return the node name with its side tokens swapped, namespaces are left untouched
+    '''
+    components = []
+    for component in node.split('|'):
+        prefix, sep, short_name = component.rpartition(':')
+        short_name = MIRROR_PATTERN.sub(swap_mirror_token, short_name)
+        components.append(prefix + sep + short_name)
+    return '|'.join(components)
@@ -0,0 +1,482 @@
+from PySide2 import QtCore
+
+import maya.api.OpenMaya as om2
+import maya.cmds as cmds
+
+
+class SceneModel(QtCore.QObject):
+    '''
+    DAG nodes of the types the open tools ask for, keyed by UUID and shared by every
+    tool of the session. Only those types are listed and watched by the node added
+    and removed callbacks, changes are applied once per idle cycle.
+    '''
+
+    nodes_added = QtCore.Signal(list)
+    nodes_removed = QtCore.Signal(list)
+    nodes_changed = QtCore.Signal(list)
+    # [(uuid, paths, node type)] and [uuid] of every watched DAG node, for views that keep no index
+    dag_nodes_updated = QtCore.Signal(list)
+    dag_nodes_removed = QtCore.Signal(list)
+    scene_reset = QtCore.Signal()
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super(SceneModel, self).__init__(parent)
+
+        # {uuid: (first path, node type)}
+        self.nodes = {}
+        # {uuid: set(paths)}, instances share their UUID so a node can have several paths
+        self.paths = {}
+        # {uuid: MObjectHandle}, the paths are read again after an ancestor is renamed or reparented
+        self.handles = {}
+
+        # Views currently using the model, the callbacks only live while it is in use
+        self.views = []
+        # Types kept in the index and types watched by the node added/removed callbacks
+        self.indexed_types = set()
+        self.watched_types = set()
+        # {node type: indexed}
+        self.indexed_type_cache = {}
+        # A view without index wants every watched node that changed
+        self.dag_listeners = False
+
+        self.callback_ids = []
+        self.type_callback_ids = []
+        self.pending_nodes = {}
+        self.paths_dirty = False
+        self.update_pending = False
+        self.scene_loading = False
+
+    def acquire(self, view):
+        if view in self.views:
+            return
+
+        self.views.append(view)
+        self.update_types()
+        self.add_callbacks()
+
+    def release(self, view):
+        if view not in self.views:
+            return
+
+        self.views.remove(view)
+        if self.views:
+            self.update_types()
+            return
+
+        self.remove_callbacks()
+        self.clear()
+        self.indexed_types = set()
+        self.watched_types = set()
+        self.indexed_type_cache = {}
+        self.dag_listeners = False
+
+    def update_types(self):
+        '''
+        Index and watch the union of the types of the views, only newly indexed types are listed
+        '''
+        indexed_types = set()
+        watched_types = set()
+        for view in self.views:
+            node_types = view.node_types or set(['dagNode'])
+            watched_types.update(node_types)
+            if view.indexed:
+                indexed_types.update(node_types)
+        if 'dagNode' in watched_types:
+            watched_types = set(['dagNode'])
+
+        self.dag_listeners = not all([view.indexed for view in self.views])
+
+        new_types = indexed_types - self.indexed_types
+        dropped_types = self.indexed_types - indexed_types
+        self.indexed_types = indexed_types
+        self.indexed_type_cache = {}
+
+        if dropped_types:
+            for uuid, (path, node_type) in list(self.nodes.items()):
+                if not self.is_indexed_type(node_type):
+                    self.remove_node(uuid)
+        if new_types:
+            self.load(new_types)
+
+        if watched_types != self.watched_types:
+            self.watched_types = watched_types
+            if self.callback_ids:
+                self.add_type_callbacks()
+
+    def is_indexed_type(self, node_type):
+        indexed = self.indexed_type_cache.get(node_type)
+        if indexed is None:
+            inherited = cmds.nodeType(node_type, inherited=True, isTypeName=True) or [node_type]
+            indexed = bool(self.indexed_types.intersection(inherited))
+            self.indexed_type_cache[node_type] = indexed
+        return indexed
+
+    def clear(self):
+        self.nodes = {}
+        self.paths = {}
+        self.handles = {}
+        self.pending_nodes = {}
+        self.paths_dirty = False
+
+    def load(self, node_types):
+        '''
+        Add the nodes of the given types to the index with one ls query, not a scan of the whole DAG
+        '''
+        node_types = sorted(node_types)
+
+        # Every instance path is listed, same traversal so the UUIDs line up with the paths
+        node_objects = cmds.ls(type=node_types, dag=True, allPaths=True, long=True, showType=True, noIntermediate=True) or []
+        node_uuids = cmds.ls(type=node_types, dag=True, allPaths=True, uuid=True, noIntermediate=True) or []
+
+        # {uuid: ([paths], node type)} of the nodes not indexed yet
+        new_nodes = {}
+        for index, uuid in enumerate(node_uuids):
+            path = node_objects[index * 2]
+            if uuid in self.nodes:
+                self.add_path(uuid, path)
+            else:
+                new_nodes.setdefault(uuid, ([], node_objects[index * 2 + 1]))[0].append(path)
+
+        sel_list = om2.MSelectionList()
+        new_uuids = list(new_nodes.keys())
+        for uuid in new_uuids:
+            sel_list.add(new_nodes[uuid][0][0])
+
+        for index, uuid in enumerate(new_uuids):
+            paths, node_type = new_nodes[uuid]
+            self.add_node(uuid, om2.MObjectHandle(sel_list.getDependNode(index)), paths, node_type)
+
+    def reload(self):
+        self.clear()
+        if self.indexed_types:
+            self.load(self.indexed_types)
+        self.scene_reset.emit()
+
+    def get_node(self, uuid):
+        return self.nodes.get(uuid)
+
+    def get_callback_count(self):
+        return len(self.callback_ids) + len(self.type_callback_ids)
+
+    def get_paths(self, uuid):
+        return sorted(self.paths.get(uuid, ()))
+
+    def add_node(self, uuid, handle, paths, node_type):
+        self.nodes[uuid] = (min(paths), node_type)
+        self.paths[uuid] = set(paths)
+        self.handles[uuid] = handle
+
+    def add_path(self, uuid, path):
+        self.paths[uuid].add(path)
+        self.nodes[uuid] = (min(self.paths[uuid]), self.nodes[uuid][1])
+
+    def remove_node(self, uuid):
+        del self.nodes[uuid]
+        del self.paths[uuid]
+        del self.handles[uuid]
+
+    def update_paths(self, uuid, paths):
+        '''
+        Re-key a renamed, reparented or (un)instanced node, returns True when its paths changed
+        '''
+        paths = set(paths)
+        if paths == self.paths[uuid]:
+            return False
+
+        self.paths[uuid] = paths
+        self.nodes[uuid] = (min(paths), self.nodes[uuid][1])
+        return True
+
+    def read_paths(self, node):
+        return [dag_path.fullPathName() for dag_path in om2.MDagPath.getAllPathsTo(node)]
+
+    def add_callbacks(self):
+        if self.callback_ids:
+            return
+
+        self.callback_ids.append(om2.MNodeMessage.addNameChangedCallback(om2.MObject.kNullObj, self.on_name_changed))
+        self.callback_ids.append(om2.MDagMessage.addAllDagChangesCallback(self.on_dag_changed))
+        for message in [om2.MSceneMessage.kBeforeOpen, om2.MSceneMessage.kBeforeNew]:
+            self.callback_ids.append(om2.MSceneMessage.addCallback(message, self.on_scene_loading))
+        for message in [om2.MSceneMessage.kAfterOpen, om2.MSceneMessage.kAfterNew]:
+            self.callback_ids.append(om2.MSceneMessage.addCallback(message, self.on_scene_loaded))
+
+        self.add_type_callbacks()
+
+    def add_type_callbacks(self):
+        '''
+        One added and one removed callback per watched type, nodes of other types never run Python
+        '''
+        self.remove_type_callbacks()
+
+        for node_type in sorted(self.watched_types):
+            self.type_callback_ids.append(om2.MDGMessage.addNodeAddedCallback(self.on_node_added, node_type))
+            self.type_callback_ids.append(om2.MDGMessage.addNodeRemovedCallback(self.on_node_removed, node_type))
+
+    def remove_type_callbacks(self):
+        if self.type_callback_ids:
+            om2.MMessage.removeCallbacks(self.type_callback_ids)
+        self.type_callback_ids = []
+
+    def remove_callbacks(self):
+        self.remove_type_callbacks()
+        if self.callback_ids:
+            om2.MMessage.removeCallbacks(self.callback_ids)
+        self.callback_ids = []
+        self.update_pending = False
+        self.scene_loading = False
+
+    def schedule_update(self):
+        # Changes are applied once Maya is idle, a batch of edits costs one update
+        if not self.update_pending:
+            self.update_pending = True
+            QtCore.QTimer.singleShot(0, self.process_scene_changes)
+
+    def queue_node(self, node, removed=False):
+        if self.scene_loading:
+            return
+
+        uuid = om2.MFnDependencyNode(node).uuid().asString()
+        self.pending_nodes[uuid] = (om2.MObjectHandle(node), removed)
+        self.schedule_update()
+
+    def queue_path_change(self, node):
+        if self.scene_loading:
+            return
+
+        # The node can be an ancestor of indexed nodes, their paths are read again once per batch
+        if self.nodes:
+            self.paths_dirty = True
+            self.schedule_update()
+
+        if self.dag_listeners:
+            self.queue_node(node)
+
+    def on_node_added(self, node, client_data):
+        self.queue_node(node)
+
+    def on_node_removed(self, node, client_data):
+        self.queue_node(node, True)
+
+    def on_name_changed(self, node, previous_name, client_data):
+        if node.hasFn(om2.MFn.kDagNode):
+            self.queue_path_change(node)
+
+    def on_dag_changed(self, msg, child, parent, client_data):
+        # Reparenting, instancing and removing an instance change the paths of the child
+        if msg in [om2.MDagMessage.kParentAdded, om2.MDagMessage.kParentRemoved]:
+            # child is an MDagPath
+            self.queue_path_change(child.node())
+
+    def on_scene_loading(self, client_data):
+        self.scene_loading = True
+        self.pending_nodes = {}
+        self.paths_dirty = False
+
+    def on_scene_loaded(self, client_data):
+        self.scene_loading = False
+        self.reload()
+
+    def process_scene_changes(self):
+        if not self.update_pending:
+            return
+        self.update_pending = False
+
+        pending_nodes = self.pending_nodes
+        self.pending_nodes = {}
+
+        added = []
+        removed = []
+        changed = []
+        updated_dag_nodes = []
+        removed_dag_nodes = []
+        for uuid, (handle, node_removed) in pending_nodes.items():
+            if not node_removed and handle.isValid():
+                dag_fn = om2.MFnDagNode(handle.object())
+                paths = self.read_paths(handle.object())
+                if paths and not dag_fn.isIntermediateObject:
+                    updated_dag_nodes.append((uuid, paths, dag_fn.typeName))
+                    if uuid in self.nodes:
+                        if self.update_paths(uuid, paths):
+                            changed.append(uuid)
+                    elif self.is_indexed_type(dag_fn.typeName):
+                        self.add_node(uuid, handle, paths, dag_fn.typeName)
+                        added.append(uuid)
+                    continue
+
+            removed_dag_nodes.append(uuid)
+            if uuid in self.nodes:
+                self.remove_node(uuid)
+                removed.append(uuid)
+
+        if self.paths_dirty:
+            self.paths_dirty = False
+            for uuid, handle in self.handles.items():
+                # Deleted nodes are reported by their removed callback
+                if handle.isValid() and self.update_paths(uuid, self.read_paths(handle.object())):
+                    changed.append(uuid)
+
+        if removed:
+            self.nodes_removed.emit(removed)
+        if added:
+            self.nodes_added.emit(added)
+        changed = list(set(changed).difference(added))
+        if changed:
+            self.nodes_changed.emit(changed)
+
+        if self.dag_listeners:
+            if removed_dag_nodes:
+                self.dag_nodes_removed.emit(removed_dag_nodes)
+            if updated_dag_nodes:
+                self.dag_nodes_updated.emit(updated_dag_nodes)
+
+
+class SceneModelView(QtCore.QObject):
+    '''
+    Filtered view of the shared SceneModel for one tool, only nodes of the given
+    types, including derived types, are reported.
+
+    An indexed view has its nodes listed by the model and reports them by UUID. A view
+    created with indexed=False costs no memory in the model, it relays the
+    (uuid, paths, node type) of the changed nodes to a tool that keeps its own hierarchy.
+    '''
+
+    nodes_added = QtCore.Signal(list)
+    nodes_removed = QtCore.Signal(list)
+    nodes_changed = QtCore.Signal(list)
+    dag_nodes_updated = QtCore.Signal(list)
+    dag_nodes_removed = QtCore.Signal(list)
+    scene_reset = QtCore.Signal()
+
+    def __init__(self, node_types=None, parent=None, indexed=True):
+        super(SceneModelView, self).__init__(parent)
+
+        self.scene_model = SceneModel.instance()
+        self.node_types = set(node_types) if node_types else None
+        self.indexed = indexed
+
+        # {node type: accepted}
+        self.accepted_types = {}
+        self.uuids = set()
+        self.active = False
+
+    def start(self):
+        if self.active:
+            return
+        self.active = True
+
+        self.scene_model.acquire(self)
+        self.reset()
+
+        if self.indexed:
+            self.scene_model.nodes_added.connect(self.on_nodes_added)
+            self.scene_model.nodes_removed.connect(self.on_nodes_removed)
+            self.scene_model.nodes_changed.connect(self.on_nodes_changed)
+        else:
+            self.scene_model.dag_nodes_updated.connect(self.on_dag_nodes_updated)
+            self.scene_model.dag_nodes_removed.connect(self.on_dag_nodes_removed)
+        self.scene_model.scene_reset.connect(self.on_scene_reset)
+
+    def stop(self):
+        if not self.active:
+            return
+        self.active = False
+
+        if self.indexed:
+            self.scene_model.nodes_added.disconnect(self.on_nodes_added)
+            self.scene_model.nodes_removed.disconnect(self.on_nodes_removed)
+            self.scene_model.nodes_changed.disconnect(self.on_nodes_changed)
+        else:
+            self.scene_model.dag_nodes_updated.disconnect(self.on_dag_nodes_updated)
+            self.scene_model.dag_nodes_removed.disconnect(self.on_dag_nodes_removed)
+        self.scene_model.scene_reset.disconnect(self.on_scene_reset)
+
+        self.scene_model.release(self)
+        self.uuids = set()
+
+    def set_node_types(self, node_types):
+        self.node_types = set(node_types) if node_types else None
+        self.accepted_types = {}
+        if self.active:
+            self.scene_model.update_types()
+            self.reset()
+
+    def is_accepted_type(self, node_type):
+        accepted = self.accepted_types.get(node_type)
+        if accepted is None:
+            if self.node_types is None:
+                accepted = True
+            else:
+                inherited = cmds.nodeType(node_type, inherited=True, isTypeName=True) or [node_type]
+                accepted = bool(self.node_types.intersection(inherited))
+            self.accepted_types[node_type] = accepted
+
+        return accepted
+
+    def filter_uuids(self, uuids):
+        accepted = []
+        for uuid in uuids:
+            node = self.scene_model.get_node(uuid)
+            if node and self.is_accepted_type(node[1]):
+                accepted.append(uuid)
+        return accepted
+
+    def reset(self):
+        if self.indexed:
+            self.uuids = set(self.filter_uuids(self.scene_model.nodes.keys()))
+
+    def get_node(self, uuid):
+        return self.scene_model.get_node(uuid)
+
+    def get_nodes(self):
+        '''
+        Return (uuid, path, node type) of the visible nodes sorted by path, empty when not indexed
+        '''
+        nodes = []
+        for uuid in self.uuids:
+            path, node_type = self.scene_model.nodes[uuid]
+            nodes.append((path, uuid, node_type))
+        nodes.sort()
+
+        return [(uuid, path, node_type) for path, uuid, node_type in nodes]
+
+    def get_callback_count(self):
+        return self.scene_model.get_callback_count() if self.active else 0
+
+    def on_nodes_added(self, uuids):
+        added = self.filter_uuids(uuids)
+        if added:
+            self.uuids.update(added)
+            self.nodes_added.emit(added)
+
+    def on_nodes_removed(self, uuids):
+        removed = [uuid for uuid in uuids if uuid in self.uuids]
+        if removed:
+            self.uuids.difference_update(removed)
+            self.nodes_removed.emit(removed)
+
+    def on_nodes_changed(self, uuids):
+        changed = [uuid for uuid in uuids if uuid in self.uuids]
+        if changed:
+            self.nodes_changed.emit(changed)
+
+    def on_dag_nodes_updated(self, dag_nodes):
+        updated = [dag_node for dag_node in dag_nodes if self.is_accepted_type(dag_node[2])]
+        if updated:
+            self.dag_nodes_updated.emit(updated)
+
+    def on_dag_nodes_removed(self, uuids):
+        # The type of a deleted node can no longer be read, every removal is relayed
+        self.dag_nodes_removed.emit(uuids)
+
+    def on_scene_reset(self):
+        self.reset()
+        self.scene_reset.emit()
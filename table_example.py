@@ -6,6 +6,8 @@ import maya.OpenMayaUI as om
 import maya.OpenMayaUI as omui
 import maya.cmds as cmds
 
+import scene_model
+
 def maya_main_window():
     '''
     Return the Maya main window widget as a Python object
@@ -26,6 +28,10 @@ class TableExampleDialog(QtWidgets.QDialog):
         self.setMinimumWidth(500) 
         self.setWindowFlags(self.windowFlags() ^ QtCore.Qt.WindowContextHelpButtonHint)
         
+        # Meshes of the scene model shared with the other tools
+        self.scene_view = scene_model.SceneModelView(['mesh'], self)
+        self.refresh_pending = False
+        
         self.create_widgets()
         self.create_layout()
         self.create_connections()
@@ -63,6 +69,11 @@ class TableExampleDialog(QtWidgets.QDialog):
         
         self.refresh_btn.clicked.connect(self.refresh_table)
         self.close_btn.clicked.connect(self.close)
+        
+        self.scene_view.nodes_added.connect(self.schedule_refresh)
+        self.scene_view.nodes_removed.connect(self.schedule_refresh)
+        self.scene_view.nodes_changed.connect(self.schedule_refresh)
+        self.scene_view.scene_reset.connect(self.schedule_refresh)
     
     def set_cell_changed_connection_enabled(self, enabled):
         if enabled:
@@ -73,8 +84,25 @@ class TableExampleDialog(QtWidgets.QDialog):
     # Lanzar funciones al mostrar la ventana
     def showEvent(self, e):
         super(TableExampleDialog, self).showEvent(e)
+        self.scene_view.start()
         self.refresh_table()
     
+    def closeEvent(self, e):
+        super(TableExampleDialog, self).closeEvent(e)
+        self.refresh_pending = False
+        self.scene_view.stop()
+    
+    def schedule_refresh(self, *args):
+        # Every change of a batch refreshes the table once
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            QtCore.QTimer.singleShot(0, self.process_scene_changes)
+    
+    def process_scene_changes(self):
+        if self.refresh_pending:
+            self.refresh_pending = False
+            self.refresh_table()
+    
     # Presionar un boton en esta ventana no afecta al resto de Maya  
     def keyPressEvent(self, e):
         super(TableExampleDialog, self).keyPressEvent(e)
@@ -85,15 +113,15 @@ class TableExampleDialog(QtWidgets.QDialog):
         
         self.table_wdg.setRowCount(0)
         
-        meshes = [x for x in cmds.ls(type='mesh') if not 'ShapeOrig' in x]
+        meshes = [path for uuid, path, node_type in self.scene_view.get_nodes() if not 'ShapeOrig' in path]
         for i in range(len(meshes)):
-            transform_name = cmds.listRelatives(meshes[i], parent=True)[0]
+            transform_name = meshes[i].rsplit('|', 1)[0]
             translation = cmds.getAttr('{}.t'.format(transform_name))[0]
             visible = cmds.getAttr('{}.v'.format(transform_name))
             
             self.table_wdg.insertRow(i)
             self.insert_item(i, 0, '', 'visibility', visible, True)
-            self.insert_item(i, 1, transform_name, None, transform_name, False)
+            self.insert_item(i, 1, transform_name.rsplit('|', 1)[-1], None, transform_name, False)
             self.insert_item(i, 2, self.float_to_string(translation[0]), 'tx', translation[0], False)
             self.insert_item(i, 3, self.float_to_string(translation[1]), 'ty', translation[1], False)
             self.insert_item(i, 4, self.float_to_string(translation[2]), 'tz', translation[2], False)
@@ -125,12 +153,12 @@ class TableExampleDialog(QtWidgets.QDialog):
     def rename(self, item):
         old_name = self.get_item_value(item)
         new_name = self.get_item_text(item)
-        if old_name != new_name:
+        if old_name.rsplit('|', 1)[-1] != new_name:
             actual_new_name = cmds.rename(old_name, new_name)
             if actual_new_name != new_name:
                 self.set_item_text(item, actual_new_name)
             
-            self.set_item_value(item, actual_new_name)
+            self.set_item_value(item, cmds.ls(actual_new_name, long=True)[0])
     
     def update_attr(self, attr_name, item, is_boolean):
         if is_boolean:
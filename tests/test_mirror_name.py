@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mirror_names import get_mirror_name
+
+
+@pytest.mark.parametrize('node, mirror_node', [
+    ('L_arm_ctrl', 'R_arm_ctrl'),
+    ('arm_R', 'arm_L'),
+    ('spine_l_ctrl', 'spine_r_ctrl'),
+    ('leftArm_ctrl', 'rightArm_ctrl'),
+    ('ArmRight', 'ArmLeft'),
+    ('arm_left', 'arm_right'),
+    ('rig:L_arm_ctrl', 'rig:R_arm_ctrl'),
+    ('|root|L_arm_grp|L_arm_ctrl', '|root|R_arm_grp|R_arm_ctrl'),
+])
+def test_mirror_name_swaps_side_tokens(node, mirror_node):
+    assert get_mirror_name(node) == mirror_node
+
+
+@pytest.mark.parametrize('node', [
+    'CTRL_arm',
+    'col_ctrl',
+    'cleft_ctrl',
+    'Lefty_ctrl',
+    'NECK_ctrl',
+    'rigL:spine_ctrl',
+])
+def test_mirror_name_ignores_tokens_inside_words(node):
+    assert get_mirror_name(node) == node
+
+
+def test_mirror_name_round_trips():
+    for node in ['L_arm_ctrl', 'leftArm_ctrl', 'rig:ArmRight', '|root|l_leg_grp|l_foot_ctrl']:
+        assert get_mirror_name(get_mirror_name(node)) == node
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Runs with mayapy, the scene model reads a live Maya scene
+standalone = pytest.importorskip('maya.standalone')
+
+
+@pytest.fixture(scope='module')
+def maya_session():
+    standalone.initialize(name='python')
+    yield
+    standalone.uninitialize()
+
+
+@pytest.fixture
+def cmds(maya_session):
+    import maya.cmds as cmds
+    cmds.file(new=True, force=True)
+    return cmds
+
+
+def test_instanced_shape_is_indexed_under_every_parent(cmds):
+    import scene_model
+
+    transform = cmds.polyCube(name='box')[0]
+    shape = cmds.listRelatives(transform, shapes=True, fullPath=True)[0]
+    instance = cmds.instance(transform, name='boxInstance')[0]
+    group = cmds.group(instance, name='boxGroup')
+
+    view = scene_model.SceneModelView(['mesh'])
+    view.start()
+    try:
+        uuid = cmds.ls(shape, uuid=True)[0]
+        assert view.scene_model.get_paths(uuid) == sorted([
+            '|box|boxShape',
+            '|{}|boxInstance|boxShape'.format(group),
+        ])
+        assert [node[0] for node in view.get_nodes()] == [uuid]
+    finally:
+        view.stop()
@@ -4,11 +4,18 @@ from PySide2 import QtWidgets
 from shiboken2 import wrapInstance
 
 from functools import partial
+import array
+import bisect
+import fnmatch
+import sys
+import time
 
 import maya.OpenMayaUI as om
 import maya.OpenMayaUI as omui
 import maya.cmds as cmds
 
+import scene_model
+
 
 def maya_main_window():
     '''
@@ -19,11 +26,662 @@ def maya_main_window():
     return wrapInstance(long(main_window_ptr), QtWidgets.QWidget)
 
 
+class DagSnapshot(object):
+    '''
+    Parent/child structure and node types of the whole DAG, built from a single ls query
+    '''
+
+    def __init__(self):
+        # {path: node type}
+        self.types = {}
+        # {path: uuid}
+        self.uuids = {}
+        # {parent path: [child paths]}, assemblies are under ''
+        self.children = {}
+
+    @classmethod
+    def capture(cls):
+        snapshot = cls()
+
+        # Every instance path is listed, same traversal so the UUIDs line up with the paths
+        dag_objects = cmds.ls(dag=True, allPaths=True, long=True, showType=True, noIntermediate=True) or []
+        dag_uuids = cmds.ls(dag=True, allPaths=True, uuid=True, noIntermediate=True) or []
+        for path, node_type, uuid in zip(dag_objects[::2], dag_objects[1::2], dag_uuids):
+            parent_path, name = path.rsplit('|', 1)
+            if 'Orig' in name:
+                continue
+
+            snapshot.types[path] = node_type
+            snapshot.uuids[path] = uuid
+            snapshot.children.setdefault(parent_path, []).append(path)
+
+        return snapshot
+
+    def get_node_count(self):
+        return len(self.types)
+
+    def get_memory_size(self):
+        size = sum([sys.getsizeof(container) for container in [self.types, self.uuids, self.children]])
+        size += sum([sys.getsizeof(path) for path in self.types])
+        size += sum([sys.getsizeof(uuid) for uuid in self.uuids.values()])
+        return size + sum([sys.getsizeof(child_paths) for child_paths in self.children.values()])
+
+    def get_type(self, path):
+        return self.types.get(path)
+
+    def get_children(self, path):
+        '''
+        Return [(child path, child type, child uuid)], the same layout as TreeViewDialog.get_children
+        '''
+        return [(child_path, self.types[child_path], self.uuids[child_path]) for child_path in self.children.get(path, [])]
+
+
+def build_tree_recursive(name):
+    '''
+    Original outliner build, one listRelatives and one objectType call per node
+    '''
+    item = QtWidgets.QTreeWidgetItem([name])
+    item.setData(0, QtCore.Qt.UserRole, cmds.objectType(name))
+
+    children = cmds.listRelatives(name, children=True, noIntermediate=True, fullPath=True)
+    if children:
+        for child in [x for x in children if not 'Orig' in x.rsplit('|', 1)[-1]]:
+            item.addChild(build_tree_recursive(child))
+    return item
+
+def build_tree_from_snapshot(snapshot, path):
+    item = QtWidgets.QTreeWidgetItem([path.rsplit('|', 1)[-1]])
+    item.setData(0, QtCore.Qt.UserRole, snapshot.get_type(path))
+
+    stack = [(item, path)]
+    while stack:
+        parent_item, parent_path = stack.pop()
+        for child_path, child_type, child_uuid in snapshot.get_children(parent_path):
+            child_item = QtWidgets.QTreeWidgetItem([child_path.rsplit('|', 1)[-1]])
+            child_item.setData(0, QtCore.Qt.UserRole, child_type)
+            parent_item.addChild(child_item)
+            stack.append((child_item, child_path))
+    return item
+
+def benchmark_tree_build():
+    '''
+    Print the time taken to build the full tree recursively and from a DagSnapshot
+    '''
+    start_time = time.time()
+    items = [build_tree_recursive(path) for path in cmds.ls(assemblies=True, long=True)]
+    recursive_time = time.time() - start_time
+
+    start_time = time.time()
+    snapshot = DagSnapshot.capture()
+    items = [build_tree_from_snapshot(snapshot, path) for path in snapshot.children.get('', [])]
+    snapshot_time = time.time() - start_time
+
+    print('{} nodes, recursive: {:.3f}s, snapshot: {:.3f}s'.format(snapshot.get_node_count(), recursive_time, snapshot_time))
+
+    # Everything the model keeps, names and lookup tables included, against the snapshot it is built from
+    compact_model = CompactDagModel()
+    compact_model.load(snapshot)
+    print('compact model: {:.2f}MB, snapshot: {:.2f}MB'.format(compact_model.get_memory_size() / 1048576.0,
+                                                              snapshot.get_memory_size() / 1048576.0))
+
+
+class CompactDagModel(QtCore.QAbstractItemModel):
+    '''
+    DAG model stored in flat arrays instead of one item object per node.
+    Nodes are numbered breadth first so the children of a node are contiguous:
+    a node is its parent index, child offset and count, a name id and a type code.
+
+    Small scene changes are patched in place: new nodes are appended to the arrays
+    and the parents whose children changed keep an explicit child list.
+    '''
+
+    PATH_ROLE = QtCore.Qt.UserRole + 1
+    TYPE_ROLE = QtCore.Qt.UserRole + 2
+
+    def __init__(self, parent=None):
+        super(CompactDagModel, self).__init__(parent)
+
+        self.icon_files = {
+            'transform': ':transform.svg',
+            'camera': ':Camera.png',
+            'mesh': ':mesh.svg',
+        }
+
+        self.clear()
+
+    def clear(self):
+        self.parents = array.array('i')
+        self.child_offsets = array.array('i')
+        self.child_counts = array.array('i')
+        self.name_ids = array.array('i')
+        # Two bytes per node, enough for every node type Maya registers
+        self.type_codes = array.array('H')
+        # UUID key per node, see get_uuid_key
+        self.uuid_keys = array.array('d')
+
+        # Interned names and types, shared by every node using them
+        self.names = []
+        self.name_ids_by_name = {}
+        self.types = []
+        self.type_codes_by_type = {}
+        self.icons = {}
+
+        self.root_count = 0
+
+        # {parent node: [child nodes]}, -1 for the roots, for the parents patched since the load
+        self.child_overrides = {}
+        self.removed_nodes = set()
+        # Nodes sorted by UUID key, built on the first patch, and the nodes appended since
+        self.sorted_uuid_keys = None
+        self.sorted_uuid_nodes = None
+        self.appended_uuid_nodes = {}
+
+        # Visible children per parent node (-1 for the roots) while a filter is set
+        self.filter_children = None
+        self.filter_rows = None
+
+    def load(self, snapshot, skip_types=None):
+        '''
+        Fill the arrays from a DagSnapshot, nodes of skip_types and their children are left out
+        '''
+        skip_types = skip_types or set()
+
+        self.beginResetModel()
+        self.clear()
+
+        paths = [path for path in snapshot.children.get('', []) if snapshot.get_type(path) not in skip_types]
+        self.root_count = len(paths)
+        self.parents.extend([-1] * self.root_count)
+
+        node = 0
+        while node < len(paths):
+            path = paths[node]
+            children = [child for child in snapshot.children.get(path, []) if snapshot.get_type(child) not in skip_types]
+
+            self.child_offsets.append(len(paths))
+            self.child_counts.append(len(children))
+            self.name_ids.append(self.get_name_id(path.rsplit('|', 1)[-1]))
+            self.type_codes.append(self.get_type_code(snapshot.get_type(path)))
+            self.uuid_keys.append(self.get_uuid_key(snapshot.uuids[path]))
+
+            paths.extend(children)
+            self.parents.extend([node] * len(children))
+            node += 1
+
+        self.endResetModel()
+
+    def set_filter(self, nodes):
+        '''
+        Only show the given nodes and their ancestors, None shows every node
+        '''
+        self.beginResetModel()
+
+        if nodes is None:
+            self.filter_children = None
+            self.filter_rows = None
+        else:
+            visible_nodes = set()
+            for node in nodes:
+                while node >= 0 and node not in visible_nodes:
+                    visible_nodes.add(node)
+                    node = self.parents[node]
+
+            self.filter_children = {}
+            self.filter_rows = {}
+            for node in sorted(visible_nodes):
+                children = self.filter_children.setdefault(self.parents[node], [])
+                self.filter_rows[node] = len(children)
+                children.append(node)
+
+        self.endResetModel()
+
+    def is_filtered(self):
+        return self.filter_children is not None
+
+    def get_name_id(self, name):
+        name_id = self.name_ids_by_name.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(name)
+            self.name_ids_by_name[name] = name_id
+        return name_id
+
+    def get_type_code(self, node_type):
+        type_code = self.type_codes_by_type.get(node_type)
+        if type_code is None:
+            type_code = len(self.types)
+            self.types.append(node_type)
+            self.type_codes_by_type[node_type] = type_code
+        return type_code
+
+    def get_uuid_key(self, uuid):
+        # The first 52 bits of the UUID, stored exactly in a double on Python 2 and 3
+        return float(int(uuid.replace('-', '')[:13], 16))
+
+    def get_node_count(self):
+        return len(self.parents)
+
+    def get_memory_size(self):
+        '''
+        Bytes held by the model: the arrays, the interned names and types and their lookup tables
+        '''
+        containers = [self.parents, self.child_offsets, self.child_counts, self.name_ids, self.type_codes,
+                      self.uuid_keys, self.sorted_uuid_keys, self.sorted_uuid_nodes,
+                      self.names, self.name_ids_by_name, self.types, self.type_codes_by_type]
+        size = sum([sys.getsizeof(container) for container in containers if container is not None])
+        size += sum([sys.getsizeof(name) for name in self.names + self.types])
+        size += sum([sys.getsizeof(name_id) for name_id in self.name_ids_by_name.values()])
+        return size + sum([sys.getsizeof(children) for children in self.child_overrides.values()])
+
+    def get_name(self, node):
+        return self.names[self.name_ids[node]]
+
+    def get_type(self, node):
+        return self.types[self.type_codes[node]]
+
+    def get_path(self, node):
+        names = []
+        while node >= 0:
+            names.append(self.get_name(node))
+            node = self.parents[node]
+        return '|' + '|'.join(reversed(names))
+
+    def get_children(self, node):
+        '''
+        Return the child nodes of a node, -1 for the roots, ignoring the filter
+        '''
+        children = self.child_overrides.get(node)
+        if children is not None:
+            return children
+        if node < 0:
+            return range(self.root_count)
+        return range(self.child_offsets[node], self.child_offsets[node] + self.child_counts[node])
+
+    def get_child_count(self, node):
+        children = self.child_overrides.get(node)
+        if children is not None:
+            return len(children)
+        if node < 0:
+            return self.root_count
+        return self.child_counts[node]
+
+    def get_child(self, node, row):
+        children = self.child_overrides.get(node)
+        if children is not None:
+            return children[row]
+        if node < 0:
+            return row
+        return self.child_offsets[node] + row
+
+    def get_child_row(self, node):
+        parent_node = self.parents[node]
+        children = self.child_overrides.get(parent_node)
+        if children is not None:
+            return children.index(node)
+        if parent_node < 0:
+            return node
+        return node - self.child_offsets[parent_node]
+
+    def is_removed(self, node):
+        return node in self.removed_nodes
+
+    def find_node(self, path):
+        '''
+        Return the node of a full path by walking down the child ranges, -1 when not found
+        '''
+        node = -1
+        for name in path.split('|')[1:]:
+            name_id = self.name_ids_by_name.get(name)
+            if name_id is None:
+                return -1
+
+            for child in self.get_children(node):
+                if self.name_ids[child] == name_id:
+                    node = child
+                    break
+            else:
+                return -1
+        return node
+
+    def find_uuid_nodes(self, uuid):
+        '''
+        Return the nodes of a UUID, one per instance path
+        '''
+        if self.sorted_uuid_keys is None:
+            nodes = sorted(range(len(self.uuid_keys)), key=self.uuid_keys.__getitem__)
+            self.sorted_uuid_nodes = array.array('i', nodes)
+            self.sorted_uuid_keys = array.array('d', [self.uuid_keys[node] for node in nodes])
+            self.appended_uuid_nodes = {}
+
+        uuid_key = self.get_uuid_key(uuid)
+        nodes = list(self.appended_uuid_nodes.get(uuid_key, []))
+        index = bisect.bisect_left(self.sorted_uuid_keys, uuid_key)
+        while index < len(self.sorted_uuid_keys) and self.sorted_uuid_keys[index] == uuid_key:
+            nodes.append(self.sorted_uuid_nodes[index])
+            index += 1
+        return [node for node in nodes if node not in self.removed_nodes]
+
+    def get_row(self, node):
+        if self.is_filtered():
+            return self.filter_rows[node]
+        return self.get_child_row(node)
+
+    def get_node_index(self, node):
+        if self.is_filtered() and node not in self.filter_rows:
+            return QtCore.QModelIndex()
+        return self.createIndex(self.get_row(node), 0, node)
+
+    def get_parent_index(self, parent_node):
+        if parent_node < 0:
+            return QtCore.QModelIndex()
+        return self.get_node_index(parent_node)
+
+    def append_node(self, parent_node, name_id, type_code, uuid_key):
+        node = len(self.parents)
+        self.parents.append(parent_node)
+        self.child_offsets.append(0)
+        self.child_counts.append(0)
+        self.name_ids.append(name_id)
+        self.type_codes.append(type_code)
+        self.uuid_keys.append(uuid_key)
+        self.appended_uuid_nodes.setdefault(uuid_key, []).append(node)
+        return node
+
+    def insert_node(self, parent_node, name, node_type, uuid, template_node=-1):
+        '''
+        Append a node as the last child of parent_node, the children of template_node,
+        another instance path of the same node, are copied under it
+        '''
+        children = list(self.get_children(parent_node))
+
+        # While filtered the caller sets the filter again, which resets the model
+        if not self.is_filtered():
+            self.beginInsertRows(self.get_parent_index(parent_node), len(children), len(children))
+
+        node = self.append_node(parent_node, self.get_name_id(name), self.get_type_code(node_type), self.get_uuid_key(uuid))
+        self.child_overrides[parent_node] = children + [node]
+
+        stack = [(template_node, node)] if template_node >= 0 else []
+        while stack:
+            source_node, copy_node = stack.pop()
+            child_copies = []
+            for child in self.get_children(source_node):
+                child_copy = self.append_node(copy_node, self.name_ids[child], self.type_codes[child], self.uuid_keys[child])
+                child_copies.append(child_copy)
+                stack.append((child, child_copy))
+            if child_copies:
+                self.child_overrides[copy_node] = child_copies
+
+        if not self.is_filtered():
+            self.endInsertRows()
+        return node
+
+    def remove_node(self, node):
+        parent_node = self.parents[node]
+        children = list(self.get_children(parent_node))
+
+        if not self.is_filtered():
+            row = children.index(node)
+            self.beginRemoveRows(self.get_parent_index(parent_node), row, row)
+
+        children.remove(node)
+        self.child_overrides[parent_node] = children
+
+        subtree = [node]
+        for subtree_node in subtree:
+            subtree.extend(self.get_children(subtree_node))
+        self.removed_nodes.update(subtree)
+
+        if not self.is_filtered():
+            self.endRemoveRows()
+
+    def move_node(self, node, parent_node, name):
+        '''
+        Reparent a node with its subtree, the persistent indexes and so the expansion are kept
+        '''
+        old_parent_node = self.parents[node]
+        old_children = list(self.get_children(old_parent_node))
+        children = list(self.get_children(parent_node))
+
+        if not self.is_filtered():
+            row = old_children.index(node)
+            self.beginMoveRows(self.get_parent_index(old_parent_node), row, row,
+                               self.get_parent_index(parent_node), len(children))
+
+        old_children.remove(node)
+        self.child_overrides[old_parent_node] = old_children
+        self.child_overrides[parent_node] = children + [node]
+        self.parents[node] = parent_node
+        self.name_ids[node] = self.get_name_id(name)
+
+        if not self.is_filtered():
+            self.endMoveRows()
+
+    def rename_node(self, node, name):
+        self.name_ids[node] = self.get_name_id(name)
+
+        if not self.is_filtered():
+            index = self.get_node_index(node)
+            self.dataChanged.emit(index, index)
+
+    def get_icon(self, type_code):
+        # One icon per type, shared by every node of that type
+        icon = self.icons.get(type_code)
+        if icon is None:
+            icon = QtGui.QIcon(self.icon_files.get(self.types[type_code], ''))
+            self.icons[type_code] = icon
+        return icon
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+
+        parent_node = parent.internalId() if parent.isValid() else -1
+        if self.is_filtered():
+            node = self.filter_children[parent_node][row]
+        else:
+            node = self.get_child(parent_node, row)
+        return self.createIndex(row, column, node)
+
+    def parent(self, index=None):
+        if index is None:
+            return super(CompactDagModel, self).parent()
+
+        if not index.isValid():
+            return QtCore.QModelIndex()
+
+        parent_node = self.parents[index.internalId()]
+        if parent_node < 0:
+            return QtCore.QModelIndex()
+        return self.get_node_index(parent_node)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+
+        parent_node = parent.internalId() if parent.isValid() else -1
+        if self.is_filtered():
+            return len(self.filter_children.get(parent_node, []))
+        return self.get_child_count(parent_node)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        node = index.internalId()
+        if role == QtCore.Qt.DisplayRole:
+            return self.get_name(node)
+        elif role == QtCore.Qt.DecorationRole:
+            # A transform with a single child shows the icon of its shape
+            if self.get_child_count(node) == 1:
+                return self.get_icon(self.type_codes[self.get_child(node, 0)])
+            return self.get_icon(self.type_codes[node])
+        elif role == self.PATH_ROLE:
+            return self.get_path(node)
+        elif role == self.TYPE_ROLE:
+            return self.get_type(node)
+        return None
+
+
+class CompactDagFilter(object):
+    '''
+    Name and type queries over a CompactDagModel. Names are kept sorted for prefix
+    searches with bisect and nodes are grouped per type code. A query that refines
+    the previous one only filters the previous matches.
+
+    Query tokens: 'pCube' (name prefix), 'p*Shape?' (wildcard), 'type:mesh' (node type),
+    a node has to match every token of the query
+    '''
+
+    WILDCARD_CHARACTERS = '*?['
+
+    def __init__(self, model):
+        self.model = model
+        self.reset()
+
+    def reset(self):
+        self.sorted_names = None
+        self.sorted_nodes = None
+        self.nodes_by_type = None
+
+        self.last_query = None
+        self.last_matches = None
+
+    def build_index(self):
+        model = self.model
+
+        # Nodes removed by a patch stay in the arrays until the next load
+        nodes = [node for node in range(model.get_node_count()) if not model.is_removed(node)]
+
+        names = sorted([(model.get_name(node).lower(), node) for node in nodes])
+        self.sorted_names = [name for name, node in names]
+        self.sorted_nodes = array.array('i', [node for name, node in names])
+
+        self.nodes_by_type = {}
+        for node in nodes:
+            self.nodes_by_type.setdefault(model.type_codes[node], array.array('i')).append(node)
+
+    def parse_query(self, text):
+        '''
+        Return the name patterns and type patterns of a query
+        '''
+        name_patterns = set()
+        type_patterns = set()
+        for token in text.split():
+            if token.lower().startswith('type:'):
+                if token[5:]:
+                    type_patterns.add(token[5:])
+            else:
+                name_patterns.add(token.lower())
+        return frozenset(name_patterns), frozenset(type_patterns)
+
+    def get_literal_prefix(self, pattern):
+        for i, character in enumerate(pattern):
+            if character in self.WILDCARD_CHARACTERS:
+                return pattern[:i]
+        return pattern
+
+    def is_wildcard(self, pattern):
+        return self.get_literal_prefix(pattern) != pattern
+
+    def find_prefix(self, prefix):
+        start = bisect.bisect_left(self.sorted_names, prefix)
+        end = bisect.bisect_left(self.sorted_names, prefix + u'\uffff')
+        return set(self.sorted_nodes[start:end])
+
+    def find_type(self, type_pattern):
+        nodes = set()
+        for type_code, node_type in enumerate(self.model.types):
+            if fnmatch.fnmatchcase(node_type, type_pattern):
+                nodes.update(self.nodes_by_type.get(type_code, []))
+        return nodes
+
+    def is_refinement(self, query):
+        '''
+        A query refines the last one when each of the last tokens is kept or narrowed
+        '''
+        if self.last_query is None:
+            return False
+
+        last_names, last_types = self.last_query
+        name_patterns, type_patterns = query
+        if not last_types.issubset(type_patterns):
+            return False
+
+        for last_name in last_names:
+            if last_name in name_patterns:
+                continue
+            if self.is_wildcard(last_name):
+                return False
+            if not [name for name in name_patterns if self.get_literal_prefix(name).startswith(last_name)]:
+                return False
+        return True
+
+    def is_name_match(self, name, name_pattern):
+        if self.is_wildcard(name_pattern):
+            return fnmatch.fnmatchcase(name, name_pattern)
+        return name.startswith(name_pattern)
+
+    def find(self, text):
+        '''
+        Return the nodes matching every token of a query, None when the query is empty
+        '''
+        query = self.parse_query(text)
+        name_patterns, type_patterns = query
+        if not name_patterns and not type_patterns:
+            self.last_query = None
+            self.last_matches = None
+            return None
+
+        if self.sorted_names is None:
+            self.build_index()
+
+        if self.is_refinement(query):
+            candidates = self.last_matches
+        else:
+            candidates = None
+            for type_pattern in type_patterns:
+                type_candidates = self.find_type(type_pattern)
+                candidates = type_candidates if candidates is None else candidates & type_candidates
+            for name_pattern in name_patterns:
+                name_candidates = self.find_prefix(self.get_literal_prefix(name_pattern))
+                candidates = name_candidates if candidates is None else candidates & name_candidates
+
+        model = self.model
+        matches = set()
+        for node in candidates:
+            name = model.get_name(node).lower()
+            if not all([self.is_name_match(name, name_pattern) for name_pattern in name_patterns]):
+                continue
+            node_type = model.get_type(node)
+            if not all([fnmatch.fnmatchcase(node_type, type_pattern) for type_pattern in type_patterns]):
+                continue
+            matches.add(node)
+
+        self.last_query = query
+        self.last_matches = matches
+        return matches
+
+
 class TreeViewDialog(QtWidgets.QDialog):
     dlg_instance = None
 
     WINDOW_TITLE = 'Custom Outliner'
 
+    PATH_ROLE = QtCore.Qt.UserRole + 1
+    TYPE_ROLE = QtCore.Qt.UserRole + 2
+    ICON_TYPE_ROLE = QtCore.Qt.UserRole + 3
+    FETCHED_ROLE = QtCore.Qt.UserRole + 4
+    UUID_ROLE = QtCore.Qt.UserRole + 5
+
+    # Filter results up to this size are shown expanded
+    FILTER_EXPAND_LIMIT = 2000
+    # Batches of scene changes up to this size are patched into the compact model, larger ones reload it
+    COMPACT_PATCH_LIMIT = 200
+
     @classmethod
     def show_dialog(cls):
         if not cls.dlg_instance:
@@ -51,8 +709,22 @@ class TreeViewDialog(QtWidgets.QDialog):
 
         self.geometry = None
 
+        # {node type: is a shape type}, resolved once per type
+        self.shape_types = {}
+
+        # {full path: item} of the items created so far, every instance path has its own item
+        self.items_by_path = {}
+        # {uuid: set(paths)} of the items created for each node
+        self.paths_by_uuid = {}
+        # Maya selection last mirrored by the tree
+        self.selected_paths = set()
+
         self.script_job_number = -1
 
+        # Scene changes come from the scene model shared with the other tools, the tree is its own
+        # index so the model lists nothing for it
+        self.scene_view = scene_model.SceneModelView(parent=self, indexed=False)
+
         self.create_actions()
         self.create_widgets()
         self.create_layout()
@@ -69,10 +741,22 @@ class TreeViewDialog(QtWidgets.QDialog):
         self.display_shape_action.setChecked(True)
         self.display_shape_action.setShortcut(QtGui.QKeySequence('Ctrl+Shift+H'))
 
+        self.expand_all_action = QtWidgets.QAction('Expand All', self)
+        self.collapse_all_action = QtWidgets.QAction('Collapse All', self)
+
+        self.compact_mode_action = QtWidgets.QAction('Compact Model', self)
+        self.compact_mode_action.setCheckable(True)
+        self.compact_mode_action.setToolTip('Show the whole DAG from an array backed model, for very large scenes')
+
     def create_widgets(self):
         self.menu_bar = QtWidgets.QMenuBar()
         display_menu = self.menu_bar.addMenu('Display')
         display_menu.addAction(self.display_shape_action)
+        display_menu.addSeparator()
+        display_menu.addAction(self.expand_all_action)
+        display_menu.addAction(self.collapse_all_action)
+        display_menu.addSeparator()
+        display_menu.addAction(self.compact_mode_action)
         help_menu = self.menu_bar.addMenu('Help')
         help_menu.addAction(self.about_action)
 
@@ -80,6 +764,21 @@ class TreeViewDialog(QtWidgets.QDialog):
         self.tree_widget.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.tree_widget.setHeaderHidden(True)
 
+        self.compact_model = CompactDagModel(self)
+        self.compact_filter = CompactDagFilter(self.compact_model)
+
+        self.filter_le = QtWidgets.QLineEdit()
+        self.filter_le.setPlaceholderText('Filter: name, wild*card, type:mesh')
+        self.filter_le.setClearButtonEnabled(True)
+        self.filter_le.hide()
+
+        self.compact_view = QtWidgets.QTreeView()
+        self.compact_view.setModel(self.compact_model)
+        self.compact_view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.compact_view.setHeaderHidden(True)
+        self.compact_view.setUniformRowHeights(True)
+        self.compact_view.hide()
+
         self.refresh_btn = QtWidgets.QPushButton('Refresh')
 
     def create_layout(self):
@@ -91,61 +790,327 @@ class TreeViewDialog(QtWidgets.QDialog):
         main_layout.setContentsMargins(2, 2, 2, 2)
         main_layout.setSpacing(2)
         main_layout.setMenuBar(self.menu_bar)
+        main_layout.addWidget(self.filter_le)
         main_layout.addWidget(self.tree_widget)
+        main_layout.addWidget(self.compact_view)
         main_layout.addLayout(button_layout)
 
     def create_connections(self):
         self.about_action.triggered.connect(self.about)
         self.display_shape_action.toggled.connect(self.set_shape_nodes_visible)
+        self.expand_all_action.triggered.connect(self.expand_all)
+        self.collapse_all_action.triggered.connect(self.collapse_all)
+        self.compact_mode_action.toggled.connect(self.set_compact_mode)
 
         self.tree_widget.itemCollapsed.connect(self.update_icon)
-        self.tree_widget.itemExpanded.connect(self.update_icon)
+        self.tree_widget.itemExpanded.connect(self.on_item_expanded)
         self.tree_widget.itemSelectionChanged.connect(self.select_items)
 
+        self.compact_view.selectionModel().selectionChanged.connect(self.select_compact_items)
+        self.filter_le.textChanged.connect(self.apply_filter)
+
         self.refresh_btn.clicked.connect(self.refresh_tree_widget)
 
-    def refresh_tree_widget(self):
-        self.shape_nodes = cmds.ls(shapes=True)
+        self.scene_view.dag_nodes_updated.connect(self.on_nodes_changed)
+        self.scene_view.dag_nodes_removed.connect(self.on_nodes_removed)
+        self.scene_view.scene_reset.connect(self.on_scene_reset)
+
+    def is_compact_mode(self):
+        return self.compact_mode_action.isChecked()
+
+    def set_compact_mode(self, compact):
+        self.tree_widget.setVisible(not compact)
+        self.compact_view.setVisible(compact)
+        self.filter_le.setVisible(compact)
+
+        # Only the active view keeps its nodes in memory
+        if compact:
+            self.clear_tree_widget()
+        else:
+            self.compact_model.beginResetModel()
+            self.compact_model.clear()
+            self.compact_model.endResetModel()
+
+        self.refresh_tree_widget()
+
+    def refresh_compact_model(self):
+        skip_types = set()
+        snapshot = DagSnapshot.capture()
+        if not self.display_shape_action.isChecked():
+            skip_types = set([node_type for node_type in set(snapshot.types.values()) if self.is_shape_type(node_type)])
+
+        # The arrays are rebuilt, the expansion and scroll position are restored by path
+        view_state = self.get_compact_view_state()
+
+        self.compact_model.load(snapshot, skip_types)
+        self.compact_filter.reset()
+        self.apply_filter()
+
+        self.set_compact_view_state(*view_state)
+
+        self.selected_paths = set()
+        self.update_selection()
+
+    def get_compact_view_state(self):
+        '''
+        Return the expanded paths and the path of the top visible node
+        '''
+        model = self.compact_model
 
+        expanded_paths = []
+        stack = [model.index(row, 0) for row in range(model.rowCount())]
+        while stack:
+            index = stack.pop()
+            if self.compact_view.isExpanded(index):
+                expanded_paths.append(model.get_path(index.internalId()))
+                stack.extend([model.index(row, 0, index) for row in range(model.rowCount(index))])
+
+        top_index = self.compact_view.indexAt(QtCore.QPoint(0, 0))
+        top_path = model.get_path(top_index.internalId()) if top_index.isValid() else None
+
+        return expanded_paths, top_path
+
+    def get_compact_index(self, path):
+        node = self.compact_model.find_node(path)
+        if node < 0:
+            return QtCore.QModelIndex()
+        return self.compact_model.get_node_index(node)
+
+    def set_compact_view_state(self, expanded_paths, top_path):
+        for path in expanded_paths:
+            index = self.get_compact_index(path)
+            if index.isValid():
+                self.compact_view.setExpanded(index, True)
+
+        if top_path:
+            index = self.get_compact_index(top_path)
+            if index.isValid():
+                self.compact_view.scrollTo(index, QtWidgets.QAbstractItemView.PositionAtTop)
+
+    def apply_filter(self, *args):
+        if not self.is_compact_mode():
+            return
+
+        matches = self.compact_filter.find(self.filter_le.text())
+        self.compact_model.set_filter(matches)
+
+        if matches is not None and len(matches) <= self.FILTER_EXPAND_LIMIT:
+            self.compact_view.expandAll()
+
+        self.selected_paths = set()
+        self.update_selection()
+
+    def select_compact_items(self, *args):
+        paths = [self.compact_model.get_path(index.internalId()) for index in self.compact_view.selectionModel().selectedRows()]
+
+        self.selected_paths = set(paths)
+        if paths:
+            cmds.select(paths, replace=True)
+        else:
+            cmds.select(clear=True)
+
+    def update_compact_selection(self):
+        selection = set(cmds.ls(sl=True, long=True))
+        if selection == self.selected_paths:
+            return
+        self.selected_paths = selection
+
+        item_selection = QtCore.QItemSelection()
+        for path in selection:
+            index = self.get_compact_index(path)
+            if index.isValid():
+                item_selection.select(index, index)
+
+        selection_model = self.compact_view.selectionModel()
+        selection_model.blockSignals(True)
+        selection_model.select(item_selection, QtCore.QItemSelectionModel.ClearAndSelect | QtCore.QItemSelectionModel.Rows)
+        selection_model.blockSignals(False)
+        self.compact_view.viewport().update()
+
+    def clear_tree_widget(self):
+        self.tree_widget.blockSignals(True)
         self.tree_widget.clear()
+        self.tree_widget.blockSignals(False)
+
+        self.items_by_path = {}
+        self.paths_by_uuid = {}
+        self.selected_paths = set()
 
-        top_level_object_names = cmds.ls(assemblies=True)
-        for name in top_level_object_names:
-            item = self.create_item(name)
+    def refresh_tree_widget(self):
+        '''
+        Only the assemblies are created, children are fetched when their parent is expanded
+        '''
+        if self.is_compact_mode():
+            self.refresh_compact_model()
+            return
+
+        self.clear_tree_widget()
+
+        top_level_objects = cmds.ls(assemblies=True, long=True, showType=True) or []
+        top_level_paths = top_level_objects[::2]
+        top_level_uuids = cmds.ls(top_level_paths, uuid=True) if top_level_paths else []
+        top_level_nodes = list(zip(top_level_paths, top_level_objects[1::2], top_level_uuids))
+
+        children = self.get_children([node[0] for node in top_level_nodes])
+        for path, node_type, uuid in top_level_nodes:
+            item = self.create_item(path, node_type, children.get(path, []), uuid)
             self.tree_widget.addTopLevelItem(item)
 
         self.update_selection()
 
-    def create_item(self, name):
-        item = QtWidgets.QTreeWidgetItem([name])
-        self.add_children(item)
+    def get_children(self, paths):
+        '''
+        Return {parent path: [(child path, child type, child uuid)]} for all the paths with bulk queries
+        '''
+        children = {}
+        if not paths:
+            return children
+
+        child_paths = cmds.listRelatives(paths, children=True, fullPath=True, noIntermediate=True) or []
+        if not child_paths:
+            return children
+
+        child_objects = cmds.ls(child_paths, long=True, showType=True)
+        child_uuids = cmds.ls(child_paths, uuid=True)
+        for path, node_type, uuid in zip(child_objects[::2], child_objects[1::2], child_uuids):
+            parent_path, name = path.rsplit('|', 1)
+            if not 'Orig' in name:
+                children.setdefault(parent_path, []).append((path, node_type, uuid))
+        return children
+
+    def create_item(self, path, node_type, children, uuid):
+        item = QtWidgets.QTreeWidgetItem([path.rsplit('|', 1)[-1]])
+        item.setData(0, self.PATH_ROLE, path)
+        item.setData(0, self.UUID_ROLE, uuid)
+        self.items_by_path[path] = item
+        self.paths_by_uuid.setdefault(uuid, set()).add(path)
+        item.setData(0, self.TYPE_ROLE, node_type)
+        item.setData(0, self.FETCHED_ROLE, False)
+
+        # Icon shown while collapsed, known from the children before they are fetched
+        if len(children) == 1:
+            item.setData(0, self.ICON_TYPE_ROLE, children[0][1])
+        elif children:
+            item.setData(0, self.ICON_TYPE_ROLE, 'transform')
+        else:
+            item.setData(0, self.ICON_TYPE_ROLE, node_type)
+
+        if children:
+            item.setChildIndicatorPolicy(QtWidgets.QTreeWidgetItem.ShowIndicator)
+        else:
+            item.setChildIndicatorPolicy(QtWidgets.QTreeWidgetItem.DontShowIndicatorWhenChildless)
+            item.setData(0, self.FETCHED_ROLE, True)
+
         self.update_icon(item)
 
-        is_shape = name in self.shape_nodes
+        is_shape = self.is_shape_type(node_type)
         item.setData(0, QtCore.Qt.UserRole, is_shape)
 
         return item
 
-    def add_children(self, item):
-        children = cmds.listRelatives(item.text(0), children=True, noIntermediate=True)
-        if children:
-            children = [x for x in children if not 'Orig' in x]
-            for child in children:
-                child_item = self.create_item(child)
-                item.addChild(child_item)
+    def is_shape_type(self, node_type):
+        is_shape = self.shape_types.get(node_type)
+        if is_shape is None:
+            is_shape = 'shape' in (cmds.nodeType(node_type, inherited=True, isTypeName=True) or [])
+            self.shape_types[node_type] = is_shape
+        return is_shape
+
+    def can_fetch_more(self, item):
+        return not item.data(0, self.FETCHED_ROLE)
+
+    def fetch_more(self, item):
+        '''
+        Create the children of an item, with their own children listed in one query for the icons
+        '''
+        item.setData(0, self.FETCHED_ROLE, True)
+
+        path = item.data(0, self.PATH_ROLE)
+        children = self.get_children([path]).get(path, [])
+        grand_children = self.get_children([child[0] for child in children])
+
+        for child_path, child_type, child_uuid in children:
+            child_item = self.create_item(child_path, child_type, grand_children.get(child_path, []), child_uuid)
+            self.add_child_item(item, child_item)
+
+        if not children:
+            item.setChildIndicatorPolicy(QtWidgets.QTreeWidgetItem.DontShowIndicatorWhenChildless)
+
+    def add_child_item(self, item, child_item):
+        item.addChild(child_item)
+
+        if not self.display_shape_action.isChecked() and child_item.data(0, QtCore.Qt.UserRole):
+            child_item.setHidden(True)
+
+        if child_item.data(0, self.PATH_ROLE) in self.selected_paths:
+            self.tree_widget.blockSignals(True)
+            child_item.setSelected(True)
+            self.tree_widget.blockSignals(False)
+
+    def fetch_all(self):
+        '''
+        Create every item that has not been fetched yet from one DagSnapshot instead of one query per item
+        '''
+        snapshot = DagSnapshot.capture()
+
+        stack = [self.tree_widget.topLevelItem(i) for i in range(self.tree_widget.topLevelItemCount())]
+        while stack:
+            item = stack.pop()
+            if self.can_fetch_more(item):
+                item.setData(0, self.FETCHED_ROLE, True)
+
+                for child_path, child_type, child_uuid in snapshot.get_children(item.data(0, self.PATH_ROLE)):
+                    child_item = self.create_item(child_path, child_type, snapshot.get_children(child_path), child_uuid)
+                    self.add_child_item(item, child_item)
+
+            stack.extend([item.child(i) for i in range(item.childCount())])
+
+    def expand_all(self):
+        if self.is_compact_mode():
+            self.compact_view.expandAll()
+            return
+
+        self.fetch_all()
+
+        self.tree_widget.blockSignals(True)
+        self.tree_widget.expandAll()
+        self.tree_widget.blockSignals(False)
+
+        self.update_all_icons()
+
+    def collapse_all(self):
+        if self.is_compact_mode():
+            self.compact_view.collapseAll()
+            return
+
+        self.tree_widget.collapseAll()
+        self.update_all_icons()
+
+    def update_all_icons(self):
+        iterator = QtWidgets.QTreeWidgetItemIterator(self.tree_widget)
+        while iterator.value():
+            self.update_icon(iterator.value())
+            iterator += 1
+
+    def on_item_expanded(self, item):
+        if self.can_fetch_more(item):
+            self.fetch_more(item)
+
+        self.update_icon(item)
 
     def update_icon(self, item):
         object_type = ''
 
         if item.isExpanded():
             object_type = 'transform'
+        elif self.can_fetch_more(item):
+            object_type = item.data(0, self.ICON_TYPE_ROLE)
         else:
             child_count = item.childCount()
             if child_count == 0:
-                object_type = cmds.objectType(item.text(0))
+                object_type = item.data(0, self.TYPE_ROLE)
             elif child_count == 1:
                 child_item = item.child(0)
-                object_type = cmds.objectType(child_item.text(0))
+                object_type = child_item.data(0, self.TYPE_ROLE)
             else:
                 object_type = 'transform'
 
@@ -160,13 +1125,23 @@ class TreeViewDialog(QtWidgets.QDialog):
         items = self.tree_widget.selectedItems()
         names = []
         for item in items:
-            names.append(item.text(0))
-        cmds.select(names, replace=True)
+            names.append(item.data(0, self.PATH_ROLE))
+
+        # The SelectionChanged event caused by this selection finds nothing to apply
+        self.selected_paths = set(names)
+        if names:
+            cmds.select(names, replace=True)
+        else:
+            cmds.select(clear=True)
 
     def about(self):
         QtWidgets.QMessageBox.about(self, 'About Simple Outliner', "Add About Text Here")
 
     def set_shape_nodes_visible(self, visible):
+        if self.is_compact_mode():
+            self.refresh_compact_model()
+            return
+
         iterator = QtWidgets.QTreeWidgetItemIterator(self.tree_widget)
         while iterator.value():
             item = iterator.value()
@@ -185,15 +1160,35 @@ class TreeViewDialog(QtWidgets.QDialog):
         context_menu.exec_(self.mapToGlobal(point))
 
     def update_selection(self):
-        selection = cmds.ls(sl=True)
+        '''
+        Apply the difference between the Maya selection and the last mirrored one through the path index
+        '''
+        if self.is_compact_mode():
+            self.update_compact_selection()
+            return
 
-        iterator = QtWidgets.QTreeWidgetItemIterator(self.tree_widget)
-        while iterator.value():
-            item = iterator.value()
-            is_selected = item.text(0) in selection
-            item.setSelected(is_selected)
+        selection = set(cmds.ls(sl=True, long=True))
+        if selection == self.selected_paths:
+            return
 
-            iterator += 1
+        deselected_paths = self.selected_paths - selection
+        selected_paths = selection - self.selected_paths
+        self.selected_paths = selection
+
+        # Pushing the tree selection back to Maya would drop selected nodes that are not loaded yet
+        self.tree_widget.blockSignals(True)
+
+        for path in deselected_paths:
+            item = self.items_by_path.get(path)
+            if item:
+                item.setSelected(False)
+
+        for path in selected_paths:
+            item = self.items_by_path.get(path)
+            if item:
+                item.setSelected(True)
+
+        self.tree_widget.blockSignals(False)
 
     def set_script_job_enabled(self, enabled):
         if enabled and self.script_job_number < 0:
@@ -202,14 +1197,291 @@ class TreeViewDialog(QtWidgets.QDialog):
             cmds.scriptJob(kill=self.script_job_number, force=True)
             self.script_job_number = -1
 
+        if enabled:
+            self.scene_view.start()
+        else:
+            self.scene_view.stop()
+
+    def on_nodes_changed(self, dag_nodes):
+        '''
+        dag_nodes is [(uuid, paths, node type)] of the added, renamed or reparented nodes
+        '''
+        if not self.isVisible():
+            return
+
+        if self.is_compact_mode() and len(dag_nodes) > self.COMPACT_PATCH_LIMIT:
+            self.refresh_compact_model()
+            return
+
+        # Ancestors first, so a renamed parent already has its new path when its children are placed
+        dag_nodes = sorted(dag_nodes, key=lambda dag_node: min([path.count('|') for path in dag_node[1]]))
+
+        if self.is_compact_mode():
+            for uuid, paths, node_type in dag_nodes:
+                self.update_compact_node(uuid, paths, node_type)
+            self.finish_compact_patch()
+            return
+
+        self.tree_widget.blockSignals(True)
+        for uuid, paths, node_type in dag_nodes:
+            self.update_node(uuid, paths, node_type)
+        self.tree_widget.blockSignals(False)
+
+    def on_nodes_removed(self, uuids):
+        if not self.isVisible():
+            return
+
+        if self.is_compact_mode():
+            if len(uuids) > self.COMPACT_PATCH_LIMIT:
+                self.refresh_compact_model()
+                return
+
+            for uuid in uuids:
+                for node in self.compact_model.find_uuid_nodes(uuid):
+                    if not self.compact_model.is_removed(node):
+                        self.compact_model.remove_node(node)
+            self.finish_compact_patch()
+            return
+
+        self.tree_widget.blockSignals(True)
+        for uuid in uuids:
+            self.remove_node(uuid)
+        self.tree_widget.blockSignals(False)
+
+    def on_scene_reset(self):
+        self.refresh_tree_widget()
+
+    def update_node(self, uuid, paths, node_type):
+        '''
+        Insert, move, rename or remove the items of a node so they match its paths,
+        only the instance paths that changed are touched
+        '''
+        paths = set([path for path in paths if not 'Orig' in path.rsplit('|', 1)[1]])
+        old_paths = self.paths_by_uuid.get(uuid, set())
+        stale_paths = sorted(old_paths - paths)
+        new_paths = sorted(paths - old_paths)
+
+        # A renamed instance keeps its parent, the item is renamed in place
+        for old_path in list(stale_paths):
+            parent_path = old_path.rpartition('|')[0]
+            for path in new_paths:
+                if path.rpartition('|')[0] == parent_path:
+                    self.move_path_item(old_path, path)
+                    stale_paths.remove(old_path)
+                    new_paths.remove(path)
+                    break
+
+        # A single reparented path is moved with its subtree
+        if len(stale_paths) == 1 and len(new_paths) == 1:
+            self.move_path_item(stale_paths.pop(), new_paths.pop())
+
+        for old_path in stale_paths:
+            item = self.items_by_path.get(old_path)
+            if item:
+                self.remove_item(item)
+
+        for path in new_paths:
+            self.insert_path_item(uuid, path, node_type)
+
+    def get_parent_item(self, path):
+        '''
+        Return (parent item, True) when the item of path belongs in the tree now, the top level parent is None
+        '''
+        parent_path = path.rpartition('|')[0]
+        if not parent_path:
+            return None, True
+
+        parent_item = self.items_by_path.get(parent_path)
+        if parent_item is None or self.can_fetch_more(parent_item):
+            # The item is created when its parent is fetched
+            if parent_item:
+                parent_item.setChildIndicatorPolicy(QtWidgets.QTreeWidgetItem.ShowIndicator)
+            return parent_item, False
+        return parent_item, True
+
+    def find_compact_parent(self, path):
+        '''
+        Return the compact model node of the parent of path, -1 for the roots, None when not shown
+        '''
+        parent_path = path.rpartition('|')[0]
+        if not parent_path:
+            return -1
+
+        parent_node = self.compact_model.find_node(parent_path)
+        return parent_node if parent_node >= 0 else None
+
+    def update_compact_node(self, uuid, paths, node_type):
+        '''
+        Patch the compact model nodes of a scene node, matched to its paths like update_node
+        '''
+        model = self.compact_model
+        if not self.display_shape_action.isChecked() and self.is_shape_type(node_type):
+            return
+
+        paths = set([path for path in paths if not 'Orig' in path.rsplit('|', 1)[1]])
+        nodes_by_path = dict([(model.get_path(node), node) for node in model.find_uuid_nodes(uuid)])
+        stale_paths = sorted(set(nodes_by_path) - paths)
+        new_paths = sorted(paths - set(nodes_by_path))
+
+        for old_path in list(stale_paths):
+            parent_path = old_path.rpartition('|')[0]
+            for path in new_paths:
+                if path.rpartition('|')[0] == parent_path:
+                    model.rename_node(nodes_by_path[old_path], path.rsplit('|', 1)[-1])
+                    stale_paths.remove(old_path)
+                    new_paths.remove(path)
+                    break
+
+        if len(stale_paths) == 1 and len(new_paths) == 1:
+            node = nodes_by_path[stale_paths.pop()]
+            path = new_paths.pop()
+            parent_node = self.find_compact_parent(path)
+            if parent_node is None:
+                model.remove_node(node)
+            else:
+                model.move_node(node, parent_node, path.rsplit('|', 1)[-1])
+
+        for old_path in stale_paths:
+            if not model.is_removed(nodes_by_path[old_path]):
+                model.remove_node(nodes_by_path[old_path])
+
+        # A new instance path gets a copy of the children of another path of the node
+        uuid_nodes = model.find_uuid_nodes(uuid)
+        template_node = uuid_nodes[0] if uuid_nodes else -1
+        for path in new_paths:
+            parent_node = self.find_compact_parent(path)
+            if parent_node is not None:
+                model.insert_node(parent_node, path.rsplit('|', 1)[-1], node_type, uuid, template_node)
+
+    def finish_compact_patch(self):
+        # The filter index is rebuilt on the next query, a filtered view is filtered again
+        self.compact_filter.reset()
+        if self.compact_model.is_filtered():
+            self.apply_filter()
+        else:
+            self.selected_paths = set()
+            self.update_selection()
+
+    def insert_path_item(self, uuid, path, node_type):
+        if path in self.items_by_path:
+            return
+
+        parent_item, loaded = self.get_parent_item(path)
+        if loaded:
+            children = self.get_children([path]).get(path, [])
+            item = self.create_item(path, node_type, children, uuid)
+            self.insert_item(parent_item, item)
+
+    def move_path_item(self, old_path, path):
+        item = self.items_by_path.get(old_path)
+        if item is None:
+            return
+
+        parent_item, loaded = self.get_parent_item(path)
+        if not loaded:
+            self.remove_item(item)
+        elif item.parent() is not parent_item:
+            self.move_item(item, parent_item, path)
+        else:
+            self.update_item_paths(item, path)
+
+    def insert_item(self, parent_item, item):
+        if parent_item:
+            self.add_child_item(parent_item, item)
+            parent_item.setChildIndicatorPolicy(QtWidgets.QTreeWidgetItem.ShowIndicator)
+            self.update_icon(parent_item)
+        else:
+            self.tree_widget.addTopLevelItem(item)
+            if item.data(0, self.PATH_ROLE) in self.selected_paths:
+                item.setSelected(True)
+
+    def take_item(self, item):
+        parent_item = item.parent()
+        if parent_item:
+            parent_item.removeChild(item)
+            self.update_icon(parent_item)
+        else:
+            self.tree_widget.takeTopLevelItem(self.tree_widget.indexOfTopLevelItem(item))
+
+    def move_item(self, item, parent_item, path):
+        '''
+        Reparent an item, the expansion and selection of its subtree are kept
+        '''
+        subtree = self.get_subtree(item)
+        expanded_items = [subtree_item for subtree_item in subtree if subtree_item.isExpanded()]
+
+        self.take_item(item)
+        self.update_item_paths(item, path)
+        self.insert_item(parent_item, item)
+
+        for subtree_item in expanded_items:
+            subtree_item.setExpanded(True)
+        for subtree_item in subtree:
+            if subtree_item.data(0, self.PATH_ROLE) in self.selected_paths:
+                subtree_item.setSelected(True)
+
+    def remove_node(self, uuid):
+        for path in sorted(self.paths_by_uuid.get(uuid, ())):
+            item = self.items_by_path.get(path)
+            if item:
+                self.remove_item(item)
+
+    def remove_item(self, item):
+        for subtree_item in self.get_subtree(item):
+            path = subtree_item.data(0, self.PATH_ROLE)
+            if self.items_by_path.get(path) is subtree_item:
+                del self.items_by_path[path]
+                self.discard_uuid_path(subtree_item.data(0, self.UUID_ROLE), path)
+
+        self.take_item(item)
+
+    def discard_uuid_path(self, uuid, path):
+        uuid_paths = self.paths_by_uuid.get(uuid)
+        if uuid_paths is not None:
+            uuid_paths.discard(path)
+            if not uuid_paths:
+                del self.paths_by_uuid[uuid]
+
+    def update_item_paths(self, item, path):
+        '''
+        Re-key an item and its loaded descendants after a rename or reparent
+        '''
+        old_path = item.data(0, self.PATH_ROLE)
+        for subtree_item in self.get_subtree(item):
+            subtree_old_path = subtree_item.data(0, self.PATH_ROLE)
+            subtree_path = path + subtree_old_path[len(old_path):]
+
+            subtree_uuid = subtree_item.data(0, self.UUID_ROLE)
+            if self.items_by_path.get(subtree_old_path) is subtree_item:
+                del self.items_by_path[subtree_old_path]
+                self.discard_uuid_path(subtree_uuid, subtree_old_path)
+            self.items_by_path[subtree_path] = subtree_item
+            self.paths_by_uuid.setdefault(subtree_uuid, set()).add(subtree_path)
+            subtree_item.setData(0, self.PATH_ROLE, subtree_path)
+
+            if subtree_old_path in self.selected_paths:
+                self.selected_paths.discard(subtree_old_path)
+                self.selected_paths.add(subtree_path)
+
+        item.setText(0, path.rsplit('|', 1)[-1])
+
+    def get_subtree(self, item):
+        subtree = []
+        stack = [item]
+        while stack:
+            current_item = stack.pop()
+            subtree.append(current_item)
+            stack.extend([current_item.child(i) for i in range(current_item.childCount())])
+        return subtree
+
     def showEvent(self, e):
         super(TreeViewDialog, self).showEvent(e)
 
         if self.geometry:
             self.restoreGeometry(self.geometry)
 
-        self.refresh_tree_widget()
         self.set_script_job_enabled(True)
+        self.refresh_tree_widget()
 
     def closeEvent(self, e):
         if isinstance(self, TreeViewDialog):